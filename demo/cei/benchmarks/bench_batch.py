@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Benchmark for parallel batch evaluation."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator.parser import ExpressionParser
+
+
+def make_expressions(count: int) -> list:
+    """Build a batch of distinct expressions with some errors mixed in."""
+    return [
+        f"({i}+{i % 97})*{i % 13 + 1}/({i % 7})-{i % 31}.5" for i in range(count)
+    ]
+
+
+def bench_parse_many(count: int = 1_000_000) -> None:
+    """Measure expressions/second for increasing worker counts."""
+    parser = ExpressionParser()
+    expressions = make_expressions(count)
+    cpus = os.cpu_count() or 1
+    
+    print(f"parse_many over {count:,} expressions ({cpus} CPUs)")
+    print("-" * 60)
+    baseline = None
+    jobs = 1
+    while jobs <= cpus:
+        start = time.perf_counter()
+        results = parser.parse_many(expressions, jobs=jobs)
+        elapsed = time.perf_counter() - start
+        assert len(results) == count
+        baseline = baseline or elapsed
+        print(f"  jobs={jobs:<3} {count / elapsed:12,.0f} expr/s  speedup {baseline / elapsed:5.2f}x")
+        jobs *= 2
+
+
+if __name__ == "__main__":
+    bench_parse_many()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Headless replay of recorded keystrokes through the calculator controller."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator.controller import CalculatorController
+from calculator.profiling import LatencyHistogram
+
+# Recorded sessions: typing, corrections, calculations and clears
+SESSIONS = {
+    "simple sums": list("12+34=") + list("7*8=") + list("100/4-3=") + ['Escape'],
+    "corrections": (list("3.14*(2+") + ['BackSpace'] * 3 + list("1+1)*2=")
+                    + list("45/9") + ['BackSpace', 'BackSpace'] + list("*9=")),
+    "nested": list("((1+2)*(3+4)-(5-6))/(7*(8+9))=") + ['CE'] + list("(2*(3+(4*(5+6))))="),
+    "errors": list("1/0=") + list("5+=") + ['Escape'] + list("6*7="),
+    "long expression": list("+".join(f"{i}*{i % 7 + 1}" for i in range(40))) + ['='],
+}
+
+
+def replay(controller: CalculatorController, keys, key_interval: float,
+           keystrokes: LatencyHistogram, calculations: LatencyHistogram) -> float:
+    """
+    Feed keys through the controller the way a view's event loop would.
+
+    Each keystroke is followed by one poll(); between keystrokes the loop
+    sleeps until the next poll is due, polling while anything is pending.
+    After '=' the loop waits for the result before the next key.
+
+    Args:
+        keystrokes: Histogram receiving each press() plus poll() time
+        calculations: Histogram receiving the wait for each '=' result
+
+    Returns:
+        Wall time of the replay in seconds
+    """
+    start = time.perf_counter()
+    for key in keys:
+        began = time.perf_counter()
+        controller.press(key)
+        controller.poll()
+        keystrokes.record(time.perf_counter() - began)
+
+        if key == '=':
+            began = time.perf_counter()
+            while controller.busy:
+                time.sleep(controller.poll_delay())
+                controller.poll()
+            calculations.record(time.perf_counter() - began)
+        elif key_interval:
+            idle_until = time.perf_counter() + key_interval
+            while time.perf_counter() < idle_until:
+                delay = controller.poll_delay()
+                time.sleep(min(delay if delay is not None else key_interval,
+                               max(0.0, idle_until - time.perf_counter())))
+                controller.poll()
+    return time.perf_counter() - start
+
+
+def report(label: str, keystrokes: LatencyHistogram) -> None:
+    """Print keystrokes per second of controller time and latency percentiles."""
+    print(f"  {label:<28} {keystrokes.count / keystrokes.total:>10,.0f} keys/s  "
+          f"p50 {keystrokes.percentile(50) * 1e6:8.1f}  "
+          f"p90 {keystrokes.percentile(90) * 1e6:8.1f}  "
+          f"p99 {keystrokes.percentile(99) * 1e6:8.1f}  "
+          f"max {keystrokes.percentile(100) * 1e6:9.1f} us")
+
+
+def bench_throughput(repeat: int = 20) -> None:
+    """
+    Replay every session back to back with no pause between keys.
+
+    With the debounced preview the timer never fires, so this is the
+    controller's own cost per key; with no delay every key also hands the
+    text to the preview worker.
+    """
+    print(f"Controller throughput, sessions replayed {repeat}x without pauses")
+    for preview_delay, name in ((0.12, "debounced preview"), (0.0, "preview every key")):
+        controller = CalculatorController(time_budget=None, preview_delay=preview_delay)
+        # Warm up both worker processes
+        replay(controller, list("1+1="), 0.0, LatencyHistogram(), LatencyHistogram())
+        keystrokes = LatencyHistogram()
+        calculations = LatencyHistogram()
+        elapsed = 0.0
+        for _ in range(repeat):
+            for keys in SESSIONS.values():
+                elapsed += replay(controller, keys, 0.0, keystrokes, calculations)
+        report(name, keystrokes)
+        print(f"  {'':<28} {keystrokes.count:>10,} keys in {elapsed:.2f} s wall, "
+              f"{calculations.count:,} calculations, "
+              f"p50 wait {calculations.percentile(50) * 1e3:.2f} ms, "
+              f"p99 {calculations.percentile(99) * 1e3:.2f} ms")
+        controller.close()
+
+
+def bench_sessions(key_interval: float = 0.03) -> None:
+    """
+    Replay each session at a human typing pace.
+
+    Keystroke latency here includes the polls that start previews and
+    collect their outcomes, which is what the event loop pays per frame.
+    Keys 30 ms apart never pause long enough for the debounced preview.
+    """
+    print(f"\nPer-session replay at {key_interval * 1e3:.0f} ms per key")
+    for preview_delay, name in ((0.12, "debounced"), (0.0, "every key")):
+        controller = CalculatorController(time_budget=None, preview_delay=preview_delay)
+        replay(controller, list("1+1="), 0.0, LatencyHistogram(), LatencyHistogram())
+        evaluations = controller.preview.evaluations
+        for label, keys in SESSIONS.items():
+            keystrokes = LatencyHistogram()
+            replay(controller, keys, key_interval, keystrokes, LatencyHistogram())
+            report(f"{label} ({name})", keystrokes)
+        print(f"  {'':<28} {controller.preview.evaluations - evaluations} preview evaluations")
+        controller.close()
+
+
+if __name__ == "__main__":
+    bench_throughput()
+    bench_sessions()
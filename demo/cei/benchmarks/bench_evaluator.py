@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Benchmark for keeping the GUI event loop responsive during evaluation."""
+
+import heapq
+import itertools
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator.evaluator import BackgroundEvaluator
+from calculator.parser import ExpressionParser
+from calculator.preview import LivePreview
+
+# Interval at which the GUI polls the worker (controller.POLL_INTERVAL)
+POLL_SECONDS = 0.015
+
+
+def heavy_expression(terms: int) -> str:
+    """Build an expression that takes noticeable time to evaluate."""
+    return "+".join(str(i % 10) for i in range(terms))
+
+
+def event_loop(step, duration: float):
+    """
+    Run a fake event loop that calls step() every POLL_SECONDS until it returns True.
+
+    Returns:
+        (longest time spent in one iteration in seconds, iterations run)
+    """
+    worst = 0.0
+    frames = 0
+    last = start = time.perf_counter()
+    while True:
+        if step():
+            break
+        now = time.perf_counter()
+        worst = max(worst, now - last)
+        frames += 1
+        if now - start > duration:
+            break
+        time.sleep(POLL_SECONDS)
+        last = time.perf_counter()
+    return worst, frames
+
+
+def bench_responsiveness(term_counts=(50_000, 200_000, 800_000)) -> None:
+    """Compare the longest event-loop stall: inline parse vs background worker."""
+    print("Longest event-loop stall while calculating (ms; 16.7 ms = one 60 Hz frame)")
+    print("-" * 60)
+    parser = ExpressionParser()
+    with BackgroundEvaluator(time_budget=None) as evaluator:
+        evaluator.submit("1+1")
+        evaluator.wait()
+        for terms in term_counts:
+            expression = heavy_expression(terms)
+
+            start = time.perf_counter()
+            parser.parse(expression)
+            inline = time.perf_counter() - start
+
+            evaluator.submit(expression)
+            worst, frames = event_loop(lambda: evaluator.poll() is not None, 60.0)
+
+            print(f"  {terms:>8,} terms  inline {inline * 1e3:9.1f}"
+                  f"   background {worst * 1e3:6.1f} ({frames} frames drawn)")
+
+
+def bench_overhead(calculations: int = 1000) -> None:
+    """Measure the round-trip cost of a trivial calculation and of cancelling."""
+    print()
+    print("Background evaluation overhead")
+    print("-" * 60)
+    parser = ExpressionParser()
+    start = time.perf_counter()
+    for i in range(calculations):
+        parser.parse(f"{i}*2+1")
+    inline = (time.perf_counter() - start) / calculations
+
+    with BackgroundEvaluator(time_budget=None) as evaluator:
+        evaluator.submit("1+1")
+        evaluator.wait()
+        start = time.perf_counter()
+        for i in range(calculations):
+            evaluator.submit(f"{i}*2+1")
+            evaluator.wait()
+        background = (time.perf_counter() - start) / calculations
+
+        evaluator.submit(heavy_expression(800_000))
+        time.sleep(0.2)
+        start = time.perf_counter()
+        evaluator.cancel()
+        cancel = time.perf_counter() - start
+        start = time.perf_counter()
+        evaluator.submit("1+1")
+        evaluator.wait()
+        after_cancel = time.perf_counter() - start
+
+    print(f"  trivial calculation  inline {inline * 1e6:8.1f} us   background {background * 1e6:8.1f} us")
+    print(f"  cancel {cancel * 1e3:6.1f} ms   next calculation after cancel {after_cancel * 1e3:6.1f} ms")
+
+
+def type_and_preview(keystrokes, key_interval: float, delay: float, preview) -> float:
+    """
+    Replay keystrokes against a preview the way the GUI drives it.
+
+    Each keystroke restarts a debounce timer of delay seconds; when it fires
+    the text is requested and then polled every POLL_SECONDS.
+
+    Returns:
+        Seconds from the last keystroke until its preview was shown
+    """
+    timers = []
+    order = itertools.count()
+    state = {'text': "", 'keys': 0, 'shown': None}
+
+    def schedule(at, action):
+        heapq.heappush(timers, (at, next(order), action))
+
+    def fire_preview(keys):
+        if keys != state['keys']:
+            # A later keystroke restarted the debounce timer
+            return
+        outcome = preview.request(state['text'])
+        if outcome is not None:
+            show(outcome)
+        else:
+            schedule(time.perf_counter() + POLL_SECONDS, poll)
+
+    def poll():
+        outcome = preview.poll()
+        if outcome is not None:
+            show(outcome)
+        if preview.busy:
+            schedule(time.perf_counter() + POLL_SECONDS, poll)
+
+    def show(outcome):
+        if outcome.expression == state['text']:
+            state['shown'] = time.perf_counter()
+
+    def key(chunk):
+        state['text'] += chunk
+        state['keys'] += 1
+        state['shown'] = None
+        keys = state['keys']
+        if delay == 0:
+            fire_preview(keys)
+        else:
+            schedule(time.perf_counter() + delay, lambda: fire_preview(keys))
+
+    start = time.perf_counter()
+    for index, chunk in enumerate(keystrokes):
+        schedule(start + index * key_interval, lambda chunk=chunk: key(chunk))
+    last_key = start + (len(keystrokes) - 1) * key_interval
+
+    while timers and (state['shown'] is None or state['keys'] < len(keystrokes)):
+        at, _, action = heapq.heappop(timers)
+        time.sleep(max(0.0, at - time.perf_counter()))
+        action()
+    return state['shown'] - last_key
+
+
+def bench_preview() -> None:
+    """Compare preview work per keystroke: every keystroke vs debounced latest-wins."""
+    print()
+    print("Live preview while typing (evaluations run, latency after the last key)")
+    print("-" * 60)
+    typed = list("(1234.5+678)*9-87/6.5+(43-2.25)*19/7+1")
+    pasted = [heavy_expression(100_000)] + list("*2+1")
+    for label, keystrokes in (("typing 38 keys", typed), ("100k-term paste + 4 keys", pasted)):
+        # Without supersession every prefix is evaluated in turn
+        with BackgroundEvaluator(time_budget=None) as evaluator:
+            evaluator.submit("1+1")
+            evaluator.wait()
+            start = time.perf_counter()
+            text = ""
+            for chunk in keystrokes:
+                text += chunk
+                evaluator.submit(text)
+                evaluator.wait()
+            queued = time.perf_counter() - start
+
+        for name, delay in (("every key", 0.0), ("debounced", 0.12)):
+            preview = LivePreview(time_budget=None)
+            preview.request("1+1")
+            while preview.busy:
+                preview.poll()
+            evaluations = preview.evaluations
+            latency = type_and_preview(keystrokes, 0.03, delay, preview)
+            evaluations = preview.evaluations - evaluations
+            preview.close()
+            print(f"  {label:<25} {name:<10} {evaluations:3} evaluations  {latency * 1e3:8.1f} ms")
+        print(f"  {label:<25} {'queued':<10} {len(keystrokes):3} evaluations  "
+              f"{queued * 1e3:8.1f} ms total work")
+
+
+if __name__ == "__main__":
+    bench_responsiveness()
+    bench_overhead()
+    bench_preview()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""Benchmark for history storage."""
+
+import json
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator.history import HistoryEntry, HistoryManager
+from calculator.history_view import HistoryPanel, VirtualHistoryPanel
+from calculator.sqlite_history import SqliteHistoryManager
+
+
+class ListSliceHistory:
+    """The previous list storage: re-slices the whole list once full."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._history = []
+
+    def add_entry(self, expression: str, result: float) -> None:
+        self._history.append(HistoryEntry(expression, result))
+        if len(self._history) > self.max_entries:
+            self._history = self._history[-self.max_entries:]
+
+
+def time_inserts(manager, count: int) -> float:
+    """Return mean seconds per add_entry over count inserts."""
+    start = time.perf_counter()
+    for i in range(count):
+        manager.add_entry("1+2", 3.0)
+    return (time.perf_counter() - start) / count
+
+
+def bench_insert_cost(capacity: int = 1_000_000, window: int = 100_000) -> None:
+    """Show add_entry cost while filling and after the history is full."""
+    print(f"add_entry cost at max_entries={capacity:,} (microseconds per insert)")
+    print("-" * 60)
+    manager = HistoryManager(max_entries=capacity)
+    for filled in range(0, 2 * capacity, window * 4):
+        cost = time_inserts(manager, window)
+        state = "steady" if filled >= capacity else "filling"
+        print(f"  after {filled:>9,} inserts ({state:<7})  ring buffer {cost * 1e6:8.3f}")
+        time_inserts(manager, window * 3)
+
+    legacy = ListSliceHistory(capacity)
+    time_inserts(legacy, capacity)
+    cost = time_inserts(legacy, 50)
+    print(f"  list slicing, full history               {cost * 1e6:12.3f}")
+
+
+def bench_get_history(capacity: int = 1_000_000, calls: int = 1000) -> None:
+    """Compare a history_view() window against copying the full list."""
+    manager = HistoryManager(max_entries=capacity)
+    for i in range(capacity):
+        manager.add_entry("1+2", 3.0)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        manager.history_view(20)
+        manager.history_view()
+    view_cost = (time.perf_counter() - start) / calls
+
+    start = time.perf_counter()
+    for _ in range(10):
+        manager.get_history()
+    copy_cost = (time.perf_counter() - start) / 10
+
+    print()
+    print(f"history_view() vs get_history() at {capacity:,} entries")
+    print("-" * 60)
+    print(f"  read-only view   {view_cost * 1e6:10.3f} us")
+    print(f"  list copy        {copy_cost * 1e6:10.3f} us")
+
+
+def bench_memory(entries: int = 1_000_000) -> None:
+    """Compare traced memory of the object and columnar layouts."""
+    print()
+    print(f"Memory for {entries:,} entries (bytes per entry)")
+    print("-" * 60)
+    for label, distinct in (("unique expressions", entries), ("1,000 distinct expressions", 1000)):
+        for storage in ('objects', 'columnar'):
+            tracemalloc.start()
+            manager = HistoryManager(max_entries=entries, storage=storage)
+            start = time.perf_counter()
+            for i in range(entries):
+                manager.add_entry(f"{i % distinct}*{i % 97}", float(i))
+            elapsed = time.perf_counter() - start
+            used, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {label:<26} {storage:<9} {used / entries:8.1f}"
+                  f"   add_entry {elapsed / entries * 1e6:.2f} us")
+            del manager
+
+
+def bench_save_cost(sizes=(100, 1_000, 10_000), saves: int = 200) -> None:
+    """Compare saving after every calculation: full JSON rewrite vs journal append."""
+    print()
+    print("Save after each calculation (microseconds per save)")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in sizes:
+            json_path = os.path.join(tmpdir, f"history-{size}.json")
+            manager = HistoryManager(max_entries=size)
+            for i in range(size):
+                manager.add_entry(f"{i}+1", i + 1.0)
+            start = time.perf_counter()
+            for i in range(saves):
+                manager.add_entry("1+2", 3.0)
+                manager.save_to_file(json_path)
+            rewrite_cost = (time.perf_counter() - start) / saves
+
+            journal_path = os.path.join(tmpdir, f"history-{size}.jsonl")
+            manager = HistoryManager(max_entries=size)
+            manager.open_journal(journal_path)
+            for i in range(size):
+                manager.add_entry(f"{i}+1", i + 1.0)
+            start = time.perf_counter()
+            for i in range(saves):
+                manager.add_entry("1+2", 3.0)
+            journal_cost = (time.perf_counter() - start) / saves
+            manager.close_journal()
+
+            print(f"  {size:>7,} entries  save_to_file {rewrite_cost * 1e6:10.1f}"
+                  f"   journal {journal_cost * 1e6:8.1f}")
+
+
+def bench_autosave(sizes=(50, 1_000, 10_000), calculations: int = 500) -> None:
+    """Compare the caller's cost per calculation: save_to_file vs background autosave."""
+    print()
+    print("Caller time per calculation with saving (microseconds)")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in sizes:
+            path = os.path.join(tmpdir, f"history-{size}.json")
+            manager = HistoryManager(max_entries=size)
+            for i in range(size):
+                manager.add_entry(f"{i}+1", i + 1.0)
+            start = time.perf_counter()
+            for i in range(calculations):
+                manager.add_entry("1+2", 3.0)
+                manager.save_to_file(path)
+            sync_cost = (time.perf_counter() - start) / calculations
+
+            saver = manager.enable_autosave(path, interval=0.5)
+            start = time.perf_counter()
+            for i in range(calculations):
+                manager.add_entry("1+2", 3.0)
+            async_cost = (time.perf_counter() - start) / calculations
+            manager.disable_autosave()
+
+            print(f"  {size:>7,} entries  save_to_file {sync_cost * 1e6:10.1f}"
+                  f"   autosave {async_cost * 1e6:6.1f}   ({saver.saves} background writes)")
+
+
+def bench_history_panel(sizes=(20, 1_000, 100_000), calculations: int = 200) -> None:
+    """Compare per-calculation panel refresh: full rebuild vs incremental vs virtual."""
+    print()
+    print("History panel refresh per calculation (microseconds, rows touched)")
+    print("-" * 60)
+    for size in sizes:
+        manager = HistoryManager(max_entries=size)
+        for i in range(size):
+            manager.add_entry(f"{i}+1", i + 1.0)
+
+        # Previous approach: drop every row and reformat the whole history
+        rows = []
+        start = time.perf_counter()
+        for i in range(calculations):
+            manager.add_entry("1+2", 3.0)
+            rows = [entry.format_display() for entry in reversed(manager.get_history())]
+        rebuild = (time.perf_counter() - start) / calculations
+
+        panel = HistoryPanel(manager, limit=None)
+        panel.sync()
+        touched = 0
+        start = time.perf_counter()
+        for i in range(calculations):
+            manager.add_entry("1+2", 3.0)
+            for operation in panel.sync():
+                touched += len(operation[2]) if operation[0] == 'insert' \
+                    else operation[2] - operation[1] + 1
+        incremental = (time.perf_counter() - start) / calculations
+
+        virtual = VirtualHistoryPanel(manager, visible_rows=15)
+        start = time.perf_counter()
+        for i in range(calculations):
+            manager.add_entry("1+2", 3.0)
+            if virtual.sync():
+                rows = virtual.rows()
+        windowed = (time.perf_counter() - start) / calculations
+
+        print(f"  {size:>7,} entries  rebuild {rebuild * 1e6:10.1f} ({size:,} rows)"
+              f"   incremental {incremental * 1e6:6.1f} ({touched / calculations:.0f} rows)"
+              f"   virtual {windowed * 1e6:6.1f} ({len(rows)} rows)")
+
+
+def _shared_writer(path: str, worker: int, count: int, max_entries: int) -> None:
+    manager = HistoryManager(max_entries=max_entries)
+    manager.open_journal(path, shared=True)
+    for i in range(count):
+        manager.add_entry(f"{worker}:{i}", i)
+    manager.close_journal()
+
+
+def bench_shared_journal(process_counts=(1, 2, 4), appends: int = 5_000) -> None:
+    """Aggregate append throughput of several processes sharing one journal."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    print()
+    print(f"Shared journal, {appends:,} appends per process (cpus: {os.cpu_count()})")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for processes in process_counts:
+            path = os.path.join(tmpdir, f"shared-{processes}.jsonl")
+            HistoryManager().open_journal(path, shared=True).close()
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                start = time.perf_counter()
+                futures = [pool.submit(_shared_writer, path, worker, appends,
+                                       processes * appends)
+                           for worker in range(processes)]
+                for future in futures:
+                    future.result()
+                elapsed = time.perf_counter() - start
+
+            manager = HistoryManager(max_entries=processes * appends)
+            manager.open_journal(path, shared=True)
+            kept = manager.size()
+            manager.close_journal()
+            total = processes * appends
+            print(f"  {processes} process(es)  {total / elapsed:9,.0f} appends/s"
+                  f"   {kept:,}/{total:,} entries in the journal")
+
+
+def bench_search(entries: int = 1_000_000) -> None:
+    """Compare indexed search against a full scan."""
+    manager = HistoryManager(max_entries=entries)
+    for i in range(entries):
+        manager.add_entry(f"{i}*{i % 97}+{i % 13}", float(i * (i % 97) + i % 13))
+
+    print()
+    print(f"search() over {entries:,} entries (milliseconds)")
+    print("-" * 60)
+    start = time.perf_counter()
+    manager.search("build")
+    print(f"  build index      {(time.perf_counter() - start) * 1e3:10.1f}"
+          f"   ({manager.search_index_memory() / 1e6:.1f} MB)")
+
+    for query in ("123456*", "*42+", "*96+12", "99999"):
+        start = time.perf_counter()
+        matches = len(manager.search(query))
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        lowered = query.lower()
+        scanned = len([e for e in manager.history_view()
+                       if lowered in e.expression.lower() or lowered in str(e.result).lower()])
+        scan = time.perf_counter() - start
+        assert matches == scanned
+        print(f"  {query!r:<10} {matches:>7} hits  index {indexed * 1e3:8.2f}   scan {scan * 1e3:8.1f}")
+
+    start = time.perf_counter()
+    for i in range(10_000):
+        manager.add_entry(f"{i}+1", i + 1.0)
+    print(f"  add_entry with index (evicting)  {(time.perf_counter() - start) / 10_000 * 1e6:.2f} us")
+
+
+def bench_query(entries: int = 1_000_000) -> None:
+    """Compare range queries against filtering get_history()."""
+    manager = HistoryManager(max_entries=entries)
+    for i in range(entries):
+        manager.add_entry(f"{i}*{i % 97}", float(i * (i % 97)))
+    history = list(manager.get_history())
+    middle = history[entries // 2].timestamp
+    late = history[-1000].timestamp
+
+    print()
+    print(f"query() over {entries:,} entries (milliseconds)")
+    print("-" * 60)
+    start = time.perf_counter()
+    manager.query(result_min=0, result_max=0)
+    print(f"  build result index   {(time.perf_counter() - start) * 1e3:10.1f}")
+
+    cases = (
+        ("last 1000 by time", dict(since=late),
+         lambda e: e.timestamp >= late),
+        ("result in range", dict(result_min=1e6, result_max=1.001e6),
+         lambda e: 1e6 <= e.result <= 1.001e6),
+        ("time + result", dict(since=middle, result_max=100),
+         lambda e: e.timestamp >= middle and e.result <= 100),
+    )
+    for label, kwargs, predicate in cases:
+        start = time.perf_counter()
+        matches = manager.query(**kwargs)
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        scanned = [e for e in manager.history_view() if predicate(e)]
+        scan = time.perf_counter() - start
+        assert matches == scanned
+        print(f"  {label:<19} {len(matches):>7} hits  query {indexed * 1e3:8.2f}"
+              f"   scan {scan * 1e3:8.1f}")
+
+
+def eager_load(filepath: str) -> list:
+    """Baseline: json.load the whole file and build every entry, as before streaming."""
+    with open(filepath, 'r') as f:
+        data = json.load(f)
+    entries = [HistoryEntry.from_dict(d) for d in data.get('history', [])]
+    return entries[len(entries) - data.get('max_entries', 100):]
+
+
+def bench_load(records: int = 1_000_000, kept_sizes=(100, 10_000, 1_000_000)) -> None:
+    """Compare loading a large file eagerly vs streaming with lazy entries."""
+    print()
+    print(f"Load a {records:,}-record history file (ms, peak MB)")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = datetime(2024, 1, 1)
+        history = [
+            {'expression': f"{i}+1", 'result': i + 1.0,
+             'timestamp': (base + timedelta(seconds=i)).isoformat()}
+            for i in range(records)
+        ]
+        jsonl_path = os.path.join(tmpdir, "history.jsonl")
+        with open(jsonl_path, 'w') as f:
+            f.writelines(json.dumps(record) + "\n" for record in history)
+
+        for kept in kept_sizes:
+            path = os.path.join(tmpdir, f"history-{kept}.json")
+            with open(path, 'w') as f:
+                json.dump({'max_entries': kept, 'history': history}, f, indent=2)
+
+            def measure(load):
+                # Time without tracing, then trace a second run for peak memory
+                start = time.perf_counter()
+                load()
+                elapsed = time.perf_counter() - start
+                tracemalloc.start()
+                load()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                return elapsed, peak
+
+            eager_time, eager_peak = measure(lambda: eager_load(path))
+            lazy_time, lazy_peak = measure(lambda: HistoryManager().load_from_file(path))
+            manager = HistoryManager()
+            manager.load_from_file(path)
+            start = time.perf_counter()
+            manager.get_by_index(-1)
+            first_access = time.perf_counter() - start
+
+            start = time.perf_counter()
+            HistoryManager(max_entries=kept).load_from_file(jsonl_path)
+            tail_time = time.perf_counter() - start
+
+            print(f"  keep {kept:>9,}  eager {eager_time * 1e3:8.0f} ms {eager_peak / 1e6:6.0f} MB"
+                  f"   streaming {lazy_time * 1e3:7.0f} ms {lazy_peak / 1e6:6.0f} MB"
+                  f"   (first read {first_access * 1e6:.0f} us)"
+                  f"   jsonl tail {tail_time * 1e3:7.1f} ms")
+
+
+def bench_binary(sizes=(1_000, 100_000, 1_000_000), lookups: int = 10_000) -> None:
+    """Compare random access in the memory-mapped binary format with loading JSON."""
+    import random
+    from calculator.history_binary import BinaryHistory, write_binary_history
+
+    print()
+    print("Random get_by_index on a binary history file")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = datetime(2024, 1, 1)
+        for size in sizes:
+            entries = [HistoryEntry(f"{i}*2+1", i * 2 + 1.0, base + timedelta(seconds=i))
+                       for i in range(size)]
+            binary_path = os.path.join(tmpdir, f"history-{size}.chist")
+            write_binary_history(binary_path, entries, size)
+            json_path = os.path.join(tmpdir, f"history-{size}.json")
+            manager = HistoryManager(max_entries=size)
+            manager._history.extend(entries)
+            manager.save_to_file(json_path)
+            del entries, manager
+
+            start = time.perf_counter()
+            history = BinaryHistory(binary_path)
+            history.get_by_index(size // 2)
+            first_lookup = time.perf_counter() - start
+
+            indices = [random.randrange(size) for _ in range(lookups)]
+            start = time.perf_counter()
+            for index in indices:
+                history.get_by_index(index)
+            lookup_cost = (time.perf_counter() - start) / lookups
+            history.close()
+
+            start = time.perf_counter()
+            manager = HistoryManager()
+            manager.load_from_file(json_path)
+            manager.get_by_index(size // 2)
+            json_first = time.perf_counter() - start
+
+            print(f"  {size:>9,} entries  {os.path.getsize(binary_path) / 1e6:6.1f} MB"
+                  f"   open + lookup {first_lookup * 1e6:7.0f} us"
+                  f"   lookup {lookup_cost * 1e6:5.2f} us"
+                  f"   (JSON load + lookup {json_first * 1e3:8.1f} ms)")
+
+
+def bench_sqlite(rows: int = 1_000_000) -> None:
+    """Measure batched inserts, paging, queries and FTS search on a SQLite history."""
+    print()
+    print(f"SqliteHistoryManager with {rows:,} rows")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = SqliteHistoryManager(os.path.join(tmpdir, "history.db"), batch_size=10_000)
+        start = time.perf_counter()
+        for i in range(rows):
+            manager.add_entry(f"{i}*{i % 97}+{i % 13}", float(i * (i % 97) + i % 13))
+        manager.flush()
+        elapsed = time.perf_counter() - start
+        print(f"  insert            {rows / elapsed:12,.0f} rows/s")
+
+        for label, call in (
+            ("recent page", lambda: manager.get_history(limit=50)),
+            ("page at 500k", lambda: manager.get_history(limit=50, offset=rows // 2)),
+            ("get_by_index(-1)", lambda: manager.get_by_index(-1)),
+            ("get_by_index(mid)", lambda: manager.get_by_index(rows // 2)),
+            ("query result range", lambda: manager.query(result_min=1e6, result_max=1.001e6)),
+            ("search FTS", lambda: manager.search("*42+")),
+            ("search short", lambda: manager.search("7")),
+        ):
+            start = time.perf_counter()
+            call()
+            print(f"  {label:<18} {(time.perf_counter() - start) * 1e3:11.2f} ms")
+
+        manager.has_fts = False
+        start = time.perf_counter()
+        manager.search("*42+")
+        print(f"  search scan       {(time.perf_counter() - start) * 1e3:12.2f} ms")
+        manager.close()
+
+
+if __name__ == "__main__":
+    bench_insert_cost()
+    bench_get_history()
+    bench_memory()
+    bench_save_cost()
+    bench_autosave()
+    bench_history_panel()
+    bench_shared_journal()
+    bench_search()
+    bench_query()
+    bench_load()
+    bench_binary()
+    bench_sqlite()
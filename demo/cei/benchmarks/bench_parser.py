@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Benchmarks for the expression parser."""
+
+import sys
+import os
+import re
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator.incremental import IncrementalParser
+from calculator.parser import ExpressionParser
+from calculator.tokens import Token, TokenType
+
+EXPRESSIONS = [
+    "3+4*2",
+    "((12+8)*3)/4-5",
+    "100/(4*5)+3*7-(15-3)/(2+2)*5",
+]
+
+
+def bench_compiled(number: int = 20000) -> None:
+    """Compare parse() with and without the cache against compiled callables."""
+    print("parse() vs compiled expressions")
+    print("-" * 60)
+    for expression in EXPRESSIONS:
+        uncached = ExpressionParser(use_cache=False)
+        cached = ExpressionParser()
+        compiled = cached.compile(expression)
+        
+        t_uncached = timeit.timeit(lambda: uncached.parse(expression), number=number)
+        t_cached = timeit.timeit(lambda: cached.parse(expression), number=number)
+        t_compiled = timeit.timeit(compiled, number=number)
+        
+        print(f"{expression}")
+        print(f"  parse (no cache): {t_uncached / number * 1e6:8.2f} us")
+        print(f"  parse (cached):   {t_cached / number * 1e6:8.2f} us")
+        print(f"  compiled call:    {t_compiled / number * 1e6:8.2f} us "
+              f"({t_cached / t_compiled:.1f}x faster than cached parse)")
+
+
+class _DictToken:
+    """Token layout before __slots__ and shared operator tokens, for comparison."""
+    
+    def __init__(self, type_, value):
+        self.type = type_
+        self.value = value
+
+
+def bench_program_memory(count: int = 2000) -> None:
+    """Compare memory held by postfix token lists and compact programs."""
+    parser = ExpressionParser(use_cache=False)
+    expressions = [f"({i}+{i + 1})*{i + 2}-{i + 3}/({i + 4}+1)" for i in range(count)]
+    
+    def measure(build):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = [build(expression) for expression in expressions]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+        return size / len(kept)
+    
+    dict_bytes = measure(lambda e: [
+        _DictToken(t.type, t.value) for t in parser.infix_to_postfix(parser.tokenize(e))
+    ])
+    token_bytes = measure(lambda e: parser.infix_to_postfix(parser.tokenize(e)))
+    program_bytes = measure(parser.get_program)
+    
+    print("\nMemory per compiled expression")
+    print("-" * 60)
+    print(f"  dict-based tokens:  {dict_bytes:8.0f} bytes")
+    print(f"  postfix token list: {token_bytes:8.0f} bytes")
+    print(f"  compact Program:    {program_bytes:8.0f} bytes "
+          f"({dict_bytes / program_bytes:.1f}x smaller than dict-based tokens)")
+
+
+def _regex_tokenize(expression: str) -> list:
+    """Previous three-pass tokenizer, kept for comparison."""
+    expression = expression.replace(' ', '')
+    matches = re.findall(r'(\d+\.?\d*|[+\-*/()])', expression)
+    if ''.join(matches) != expression:
+        raise ValueError("Invalid characters in expression")
+    tokens = []
+    for match in matches:
+        if match in '+-*/':
+            tokens.append(Token(TokenType.OPERATOR, match))
+        elif match == '(':
+            tokens.append(Token(TokenType.LEFT_PAREN, match))
+        elif match == ')':
+            tokens.append(Token(TokenType.RIGHT_PAREN, match))
+        else:
+            tokens.append(Token(TokenType.NUMBER, float(match)))
+    return tokens
+
+
+def bench_tokenizer(megabytes: int = 4) -> None:
+    """Measure tokenizer throughput on multi-megabyte expressions."""
+    parser = ExpressionParser()
+    unit = "(12.5 + 3) * 42 - 7 / (1.25 + 8) + "
+    text = unit * (megabytes * 1024 * 1024 // len(unit)) + "1"
+    data = text.encode('ascii')
+    size_mb = len(data) / (1024 * 1024)
+    
+    print(f"\nTokenizer throughput on a {size_mb:.1f} MB expression")
+    print("-" * 60)
+    for label, func, arg in [
+        ("regex, three passes", _regex_tokenize, text),
+        ("scanner, str input", parser.tokenize, text),
+        ("scanner, bytes input", parser.tokenize, data),
+        ("scanner, memoryview", parser.tokenize, memoryview(data)),
+    ]:
+        start = time.perf_counter()
+        tokens = func(arg)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:22} {size_mb / elapsed:7.2f} MB/s ({len(tokens)} tokens)")
+
+
+def bench_incremental(term_counts=(1_000, 10_000, 100_000)) -> None:
+    """Compare edit-to-result latency: parse() from scratch vs incremental re-parse."""
+    print("\nEdit-to-result latency on a long expression (ms)")
+    print("-" * 60)
+    parser = ExpressionParser(use_cache=False)
+    for terms in term_counts:
+        text = "+".join(f"({i % 97}*2-1)" for i in range(terms))
+        middle = text.index("*", len(text) // 2) - 1
+        edits = [
+            ("type '*3' at the end", text + "*3"),
+            ("change the last digit", text[:-4] + "5-1)"),
+            ("change a middle digit", text[:middle] + "7" + text[middle + 1:]),
+        ]
+        incremental = IncrementalParser(ExpressionParser(use_cache=False))
+        start = time.perf_counter()
+        incremental.parse(text)
+        build = time.perf_counter() - start
+        print(f"  {terms:,} terms ({len(text):,} chars), first incremental parse {build * 1e3:.1f}")
+        for label, edited in edits:
+            start = time.perf_counter()
+            expected = parser.parse(edited)
+            full = time.perf_counter() - start
+
+            incremental.parse(text)
+            start = time.perf_counter()
+            result = incremental.parse(edited)
+            elapsed = time.perf_counter() - start
+            assert result == expected
+            print(f"    {label:24} parse() {full * 1e3:8.2f}   incremental {elapsed * 1e3:8.3f}"
+                  f"  ({incremental.reparsed} elements re-parsed)")
+
+
+if __name__ == "__main__":
+    bench_compiled()
+    bench_program_memory()
+    bench_tokenizer()
+    bench_incremental()
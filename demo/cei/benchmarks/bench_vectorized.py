@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Benchmarks for vectorized and blocked evaluation (requires NumPy)."""
+
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from calculator.parser import ExpressionParser
+
+EXPRESSION = "(a*x + b) / (x*x + 1) - (x - a) * (x + b) / (a*a + 1)"
+
+
+def _measure(func):
+    """Run func and return (seconds, peak traced bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_blocked(n: int = 10_000_000) -> None:
+    """Compare unblocked and blocked evaluation on a large input."""
+    parser = ExpressionParser()
+    x = np.random.default_rng(0).random(n)
+    out = np.empty(n)
+    input_mb = x.nbytes / 1e6
+    
+    print(f"{EXPRESSION}")
+    print(f"n = {n:,} ({input_mb:.0f} MB per column)")
+    print("-" * 60)
+    
+    unblocked = _measure(lambda: parser.evaluate_vectorized(EXPRESSION, x=x, a=2.0, b=3.0))
+    blocked = _measure(lambda: parser.evaluate_blocked(EXPRESSION, out=out, x=x, a=2.0, b=3.0))
+    
+    for label, (elapsed, peak) in [("unblocked", unblocked), ("blocked, out=", blocked)]:
+        print(f"  {label:14} {elapsed:6.3f} s  {n / elapsed / 1e6:7.1f} M elements/s  "
+              f"peak extra memory {peak / 1e6:8.1f} MB")
+
+
+def bench_columns(n: int = 20_000_000) -> None:
+    """Evaluate over memory-mapped column files and report throughput."""
+    parser = ExpressionParser()
+    with tempfile.TemporaryDirectory() as tmp:
+        x_path = os.path.join(tmp, "x.npy")
+        out_path = os.path.join(tmp, "out.f64")
+        # Write the input in pieces so the benchmark itself stays out-of-core
+        column = np.lib.format.open_memmap(x_path, mode='w+', dtype='<f8', shape=(n,))
+        for start in range(0, n, 1 << 20):
+            stop = min(start + (1 << 20), n)
+            column[start:stop] = np.arange(start, stop, dtype='<f8')
+        column.flush()
+        del column
+        
+        stats = parser.evaluate_files(EXPRESSION, out_path, x=x_path, a=2.0, b=3.0)
+        print(f"\nOut-of-core evaluation, n = {n:,}")
+        print("-" * 60)
+        print(f"  {stats.format_display()}")
+
+
+if __name__ == "__main__":
+    bench_blocked()
+    bench_columns()
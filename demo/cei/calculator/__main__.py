@@ -21,15 +21,79 @@ def main() -> None:
         action="store_true",
         help="Force CLI interface"
     )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Evaluate one expression per line of FILE ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Worker processes for --batch and --stream (default: CPU count "
+             "for --batch, 1 for --stream)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read expressions from stdin and write results to stdout "
+             "(default when stdin is not a terminal)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=("plain", "ndjson", "csv"),
+        default="plain",
+        help="Output format for --batch and --stream"
+    )
+    parser.add_argument(
+        "--history",
+        metavar="FILE",
+        help="History file for --gui: loaded at start and saved in the "
+             "background after each calculation"
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Seconds a --gui calculation may run before it is abandoned "
+             "(default: 10; 0 for no limit)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-stage parse timings to stderr at exit (batch worker "
+             "processes are not included; use --jobs 1)"
+    )
     
     args = parser.parse_args()
     
-    # If GUI is requested or no specific mode is set, try GUI
-    if args.gui or (not args.cli and not sys.stdin.isatty()):
+    if args.profile:
+        import atexit
+        from calculator.profiling import enable_global_profiling, print_global_summary
+        enable_global_profiling()
+        atexit.register(print_global_summary)
+    
+    if args.batch:
+        from calculator.batch import run_batch
+        errors = run_batch(args.batch, jobs=args.jobs, fmt=args.format)
+        sys.exit(1 if errors else 0)
+    
+    # Piped input means we are part of a pipeline, not an interactive session
+    if args.stream or (not args.gui and not args.cli and not sys.stdin.isatty()):
+        from calculator.stream import run_stream
+        errors = run_stream(fmt=args.format, jobs=args.jobs)
+        sys.exit(1 if errors else 0)
+    
+    if args.gui:
         try:
             import tkinter
             from calculator.gui import main as gui_main
-            gui_main()
+            options = {'history_file': args.history}
+            if args.time_budget is not None:
+                options['time_budget'] = args.time_budget
+            gui_main(**options)
         except ImportError:
             print("Error: Tkinter not available. Falling back to CLI mode.")
             run_calculator()
@@ -0,0 +1,105 @@
+"""
+Debounced background saving of calculation history.
+
+The thread that changes history (usually the GUI main loop) only sets a flag
+and an event. A writer thread waits for the first change, lets further
+changes accumulate for one debounce interval, then takes a snapshot of the
+entries and writes it atomically (temporary file plus rename), so a burst of
+calculations costs one write and the caller never waits on disk I/O.
+"""
+from typing import Optional
+import atexit
+import threading
+
+
+class AutoSaver:
+    """Background writer that keeps a history file in sync with a HistoryManager."""
+
+    def __init__(self, manager, filepath: str, interval: float = 1.0, fsync: bool = True):
+        """
+        Start the writer thread.
+
+        Args:
+            manager: HistoryManager to save
+            filepath: JSON file to write
+            interval: Seconds to wait after a change before saving
+            fsync: Flush each save to disk before the rename
+
+        Raises:
+            ValueError: If interval is negative
+        """
+        if interval < 0:
+            raise ValueError("Autosave interval must be non-negative")
+        self.manager = manager
+        self.filepath = filepath
+        self.interval = interval
+        self.fsync = fsync
+        # Number of files written so far
+        self.saves = 0
+        # Last exception raised by a background save, if any
+        self.error: Optional[BaseException] = None
+
+        self._pending = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # Serializes writes between the writer thread and flush()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="history-autosave", daemon=True)
+        self._thread.start()
+        # The writer is a daemon thread, so save whatever is pending at exit
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> bool:
+        """True if there are changes not yet written."""
+        return self._pending
+
+    def notify(self) -> None:
+        """Record that history changed. Cheap and safe to call from any thread."""
+        if not self._pending:
+            self._pending = True
+            self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            # Debounce: changes made during the interval join this save
+            if self._stop.wait(self.interval):
+                return
+            self._wake.clear()
+            self._save_pending()
+
+    def _save_pending(self) -> None:
+        with self._write_lock:
+            if not self._pending:
+                return
+            # Clear the flag before the snapshot so later changes save again
+            self._pending = False
+            try:
+                max_entries, entries = self.manager.snapshot()
+                self.manager.write_snapshot(self.filepath, max_entries, entries,
+                                            fsync=self.fsync)
+            except Exception as exc:
+                # Keep the changes pending and try again after another interval
+                self.error = exc
+                self._pending = True
+                self._wake.set()
+            else:
+                self.saves += 1
+
+    def flush(self) -> None:
+        """Write pending changes now, in the calling thread."""
+        self._save_pending()
+
+    def close(self) -> None:
+        """Stop the writer thread and write any pending changes."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        atexit.unregister(self.close)
+        self._save_pending()
+
+    def __repr__(self):
+        return f"AutoSaver({self.filepath!r}, interval={self.interval}, saves={self.saves})"
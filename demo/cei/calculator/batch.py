@@ -0,0 +1,220 @@
+"""
+Parallel batch evaluation of independent expressions.
+
+Expressions are sent to a process pool in chunks whose size adapts to the
+measured cost per expression, so pickling overhead stays small for cheap
+expressions while expensive ones still spread across workers. Results come
+back in input order; invalid expressions produce BatchError records instead
+of aborting the batch.
+"""
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+import sys
+import time
+
+
+# Chunk sizing: aim for chunks that take roughly this long in a worker
+TARGET_CHUNK_SECONDS = 0.05
+MIN_CHUNK_SIZE = 64
+MAX_CHUNK_SIZE = 65536
+INITIAL_CHUNK_SIZE = 256
+
+# Chunks submitted ahead per worker; bounds memory when reading a stream
+CHUNKS_IN_FLIGHT_PER_JOB = 3
+
+
+class BatchError:
+    """Error record for an expression that could not be evaluated."""
+
+    __slots__ = ('index', 'expression', 'error_type', 'message')
+
+    def __init__(self, index: int, expression: str, error_type: str, message: str):
+        """
+        Initialize an error record.
+
+        Args:
+            index: Position of the expression in the input
+            expression: The expression that failed
+            error_type: Exception class name (e.g. 'ZeroDivisionError')
+            message: Exception message
+        """
+        self.index = index
+        self.expression = expression
+        self.error_type = error_type
+        self.message = message
+
+    def __eq__(self, other):
+        if not isinstance(other, BatchError):
+            return NotImplemented
+        return (self.index, self.expression, self.error_type, self.message) == \
+            (other.index, other.expression, other.error_type, other.message)
+
+    def __repr__(self):
+        return (f"BatchError({self.index}, '{self.expression}', "
+                f"{self.error_type}: {self.message})")
+
+
+BatchResult = Union[float, BatchError]
+
+# Parser used by each worker process (created by _init_worker)
+_worker_parser = None
+
+
+def _init_worker(cache_size: int, use_cache: bool) -> None:
+    """Create the per-process parser."""
+    global _worker_parser
+    from calculator.parser import ExpressionParser
+    _worker_parser = ExpressionParser(cache_size=cache_size, use_cache=use_cache)
+
+
+def evaluate_chunk(parser, start_index: int, expressions: List[str]) -> List[BatchResult]:
+    """
+    Evaluate a list of expressions, turning per-item errors into records.
+
+    Args:
+        parser: ExpressionParser to use
+        start_index: Input position of the first expression
+        expressions: Expressions to evaluate
+
+    Returns:
+        One float or BatchError per expression
+    """
+    results = []
+    append = results.append
+    parse = parser.parse
+    for offset, expression in enumerate(expressions):
+        try:
+            append(parse(expression))
+        except (ValueError, ZeroDivisionError) as e:
+            append(BatchError(start_index + offset, expression, type(e).__name__, str(e)))
+    return results
+
+
+def _run_chunk(start_index: int, expressions: List[str]) -> Tuple[List[BatchResult], float]:
+    """Worker entry point: evaluate a chunk and report how long it took."""
+    start = time.perf_counter()
+    results = evaluate_chunk(_worker_parser, start_index, expressions)
+    return results, time.perf_counter() - start
+
+
+class ChunkSizer:
+    """Adapts chunk size so each chunk takes about TARGET_CHUNK_SECONDS."""
+
+    def __init__(self, initial: int = INITIAL_CHUNK_SIZE):
+        self.size = initial
+
+    def update(self, count: int, seconds: float) -> None:
+        """
+        Record the cost of a finished chunk.
+
+        Args:
+            count: Number of expressions in the chunk
+            seconds: Time the worker spent on it
+        """
+        if count == 0:
+            return
+        if seconds <= 0:
+            target = MAX_CHUNK_SIZE
+        else:
+            target = int(TARGET_CHUNK_SECONDS * count / seconds)
+        # Move halfway towards the target to damp noise
+        self.size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, (self.size + target + 1) // 2))
+
+
+def iter_parse_many(parser, expressions: Iterable[str], jobs: Optional[int] = None,
+                    chunk_size: Optional[int] = None) -> Iterator[BatchResult]:
+    """
+    Evaluate expressions in parallel, yielding results in input order.
+
+    Args:
+        parser: ExpressionParser whose cache settings the workers copy
+        expressions: Iterable (or stream) of expressions
+        jobs: Number of worker processes (defaults to the CPU count)
+        chunk_size: Fixed chunk size; adaptive when None
+
+    Yields:
+        One float or BatchError per expression
+    """
+    for _, result in iter_evaluated(parser, expressions, jobs, chunk_size):
+        yield result
+
+
+def iter_evaluated(parser, expressions: Iterable[str], jobs: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> Iterator[Tuple[str, BatchResult]]:
+    """
+    Like iter_parse_many, but yield (expression, result) pairs.
+
+    Args:
+        parser: ExpressionParser whose cache settings the workers copy
+        expressions: Iterable (or stream) of expressions
+        jobs: Number of worker processes (defaults to the CPU count)
+        chunk_size: Fixed chunk size; adaptive when None
+
+    Yields:
+        (expression, result) pairs in input order
+    """
+    jobs = jobs or os.cpu_count() or 1
+    iterator = iter(expressions)
+
+    if jobs == 1:
+        index = 0
+        size = chunk_size or MAX_CHUNK_SIZE
+        while True:
+            chunk = list(islice(iterator, size))
+            if not chunk:
+                return
+            yield from zip(chunk, evaluate_chunk(parser, index, chunk))
+            index += len(chunk)
+
+    sizer = ChunkSizer(chunk_size or INITIAL_CHUNK_SIZE)
+    cache = parser.cache_info()
+    pending = deque()
+    index = 0
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache['maxsize'], cache['maxsize'] > 0)) as pool:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < jobs * CHUNKS_IN_FLIGHT_PER_JOB:
+                chunk = list(islice(iterator, chunk_size or sizer.size))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append((chunk, pool.submit(_run_chunk, index, chunk)))
+                index += len(chunk)
+
+            if not pending:
+                return
+
+            chunk, future = pending.popleft()
+            results, seconds = future.result()
+            sizer.update(len(chunk), seconds)
+            yield from zip(chunk, results)
+
+
+def run_batch(path: str, jobs: Optional[int] = None, output=None, fmt: str = 'plain') -> int:
+    """
+    Evaluate every line of a file and write one result per line.
+
+    Args:
+        path: Input file, or '-' for standard input
+        jobs: Number of worker processes
+        output: Text stream to write to (defaults to stdout)
+        fmt: Output format: 'plain', 'ndjson' or 'csv'
+
+    Returns:
+        Number of expressions that failed
+    """
+    from calculator.parser import ExpressionParser
+    from calculator.stream import read_expressions, write_results
+
+    source = sys.stdin if path == '-' else open(path, 'r')
+    try:
+        results = iter_evaluated(ExpressionParser(), read_expressions(source), jobs=jobs)
+        return write_results(results, output or sys.stdout, fmt)
+    finally:
+        if source is not sys.stdin:
+            source.close()
@@ -0,0 +1,96 @@
+"""
+Bounded least-recently-used cache for compiled expressions.
+Thread-safe so a single parser can be shared between the GUI and worker threads.
+"""
+from typing import Any, Dict, Hashable, Optional
+from collections import OrderedDict
+import threading
+
+
+class LRUCache:
+    """
+    Fixed-size mapping that discards the least recently used item when full.
+    Keeps hit, miss and eviction counters for introspection.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of items to keep (0 disables storage)
+
+        Raises:
+            ValueError: If maxsize is negative
+        """
+        if maxsize < 0:
+            raise ValueError("Cache size must be non-negative")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a key, marking it as most recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None if the key is not present
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used item if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all items and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> Dict[str, int]:
+        """Return cache statistics."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
@@ -0,0 +1,219 @@
+"""
+Columnar, memory-compact storage for calculation history.
+
+Instead of one HistoryEntry object (with its own __dict__ and datetime) per
+calculation, the columnar ring buffer keeps three parallel columns: interned
+expression strings, an array('d') of results and an array('d') of epoch
+timestamps. Entries are handed out as small __slots__ views that only build
+a datetime when their timestamp is actually read.
+"""
+from typing import Any, List, Optional
+from array import array
+from datetime import datetime
+import sys
+import time
+from calculator.history import HistoryEntry
+from calculator.ringbuffer import RingBuffer
+
+
+class CompactEntry:
+    """Read-only view of one history entry with a lazily built timestamp."""
+
+    __slots__ = ('expression', 'result', 'epoch', '_timestamp')
+
+    def __init__(self, expression: str, result: float, epoch: float):
+        """
+        Initialize an entry view.
+
+        Args:
+            expression: The mathematical expression
+            result: The calculated result
+            epoch: When it was calculated, in seconds since the epoch
+        """
+        self.expression = expression
+        self.result = result
+        self.epoch = epoch
+        self._timestamp: Optional[datetime] = None
+
+    @classmethod
+    def now(cls, expression: str, result: float) -> 'CompactEntry':
+        """Create an entry timestamped with the current time."""
+        return cls(sys.intern(expression), float(result), time.time())
+
+    @property
+    def timestamp(self) -> datetime:
+        """When the calculation was performed, as a local datetime."""
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self.epoch)
+        return self._timestamp
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactEntry):
+            return NotImplemented
+        return (self.expression, self.result, self.epoch) == \
+            (other.expression, other.result, other.epoch)
+
+    def __hash__(self):
+        return hash((self.expression, self.result, self.epoch))
+
+    __repr__ = HistoryEntry.__repr__
+    to_dict = HistoryEntry.to_dict
+    format_display = HistoryEntry.format_display
+
+
+class ColumnarRingBuffer(RingBuffer):
+    """
+    RingBuffer of history entries stored as columns.
+
+    Accepts HistoryEntry or CompactEntry items and returns CompactEntry views.
+    """
+
+    __slots__ = ('_results', '_epochs')
+
+    def __init__(self, capacity: int):
+        """
+        Initialize empty columns.
+
+        Args:
+            capacity: Maximum number of entries kept
+
+        Raises:
+            ValueError: If capacity is negative
+        """
+        super().__init__(capacity)
+        # _items holds the expressions; results and epochs share its slots
+        self._results = array('d')
+        self._epochs = array('d')
+
+    def _entry(self, slot: int) -> CompactEntry:
+        return CompactEntry(self._items[slot], self._results[slot], self._epochs[slot])
+
+    def append(self, item: Any) -> Optional[CompactEntry]:
+        """
+        Append an entry, evicting the oldest one if the buffer is full.
+
+        Args:
+            item: HistoryEntry or CompactEntry to store
+
+        Returns:
+            View of the evicted entry, or None if nothing was evicted
+        """
+        if isinstance(item, CompactEntry):
+            expression, result, epoch = item.expression, item.result, item.epoch
+        else:
+            expression = sys.intern(item.expression)
+            result = float(item.result)
+            epoch = item.timestamp.timestamp()
+
+        if len(self._items) < self._capacity:
+            self._items.append(expression)
+            self._results.append(result)
+            self._epochs.append(epoch)
+            return None
+        if self._capacity == 0:
+            return item if isinstance(item, CompactEntry) else CompactEntry(expression, result, epoch)
+
+        start = self._start
+        evicted = self._entry(start)
+        self._items[start] = expression
+        self._results[start] = result
+        self._epochs[start] = epoch
+        self._start = start + 1 if start + 1 < self._capacity else 0
+        self._first_seq += 1
+        return evicted
+
+    def clear(self) -> None:
+        """Remove all entries (sequence numbers continue from where they were)."""
+        super().clear()
+        self._results = array('d')
+        self._epochs = array('d')
+
+    def resize(self, capacity: int) -> None:
+        """
+        Change the capacity, keeping the most recent entries that still fit.
+
+        Args:
+            capacity: New maximum number of entries
+
+        Raises:
+            ValueError: If capacity is negative
+        """
+        if capacity < 0:
+            raise ValueError("Capacity must be non-negative")
+        start = self._start
+        size = len(self._items)
+        dropped = max(0, size - capacity)
+
+        def order(column):
+            return (column[start:] + column[:start])[dropped:]
+
+        self._items = order(self._items)
+        self._results = order(self._results)
+        self._epochs = order(self._epochs)
+        self._start = 0
+        self._first_seq += dropped
+        self._capacity = capacity
+
+    def copy(self) -> 'ColumnarRingBuffer':
+        """Copy the columns into a new buffer."""
+        clone = super().copy()
+        start = self._start
+        clone._results = self._results[start:] + self._results[:start]
+        clone._epochs = self._epochs[start:] + self._epochs[:start]
+        return clone
+
+    def to_list(self) -> List[CompactEntry]:
+        """Create views of the entries, oldest first, in a new list."""
+        return list(self)
+
+    def get_seq(self, seq: int) -> CompactEntry:
+        """
+        Get an entry by sequence number.
+
+        Raises:
+            IndexError: If the entry was evicted or has not been appended yet
+        """
+        offset = seq - self._first_seq
+        if not 0 <= offset < len(self._items):
+            raise IndexError(f"Sequence number {seq} is not in the buffer")
+        return self._entry((self._start + offset) % self._capacity)
+
+    def memory_usage(self) -> int:
+        """
+        Estimate the memory held by the columns.
+
+        Returns:
+            Approximate size in bytes, counting each distinct expression once
+        """
+        strings = {id(expression): expression for expression in self._items}
+        return (sys.getsizeof(self._items) + sys.getsizeof(self._results) +
+                sys.getsizeof(self._epochs) + sum(map(sys.getsizeof, strings.values())))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        size = len(self._items)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RingBuffer index out of range")
+        return self._entry((self._start + index) % self._capacity)
+
+    def __iter__(self):
+        entry = self._entry
+        start = self._start
+        for slot in range(start, len(self._items)):
+            yield entry(slot)
+        for slot in range(start):
+            yield entry(slot)
+
+    def __reversed__(self):
+        entry = self._entry
+        start = self._start
+        for slot in range(start - 1, -1, -1):
+            yield entry(slot)
+        for slot in range(len(self._items) - 1, start - 1, -1):
+            yield entry(slot)
+
+    def __repr__(self):
+        return f"ColumnarRingBuffer(capacity={self._capacity}, size={len(self._items)})"
@@ -0,0 +1,284 @@
+"""
+Out-of-core evaluation over column files.
+
+Columns are `.npy` files or raw little-endian float64 files. Each chunk of
+rows is mapped with numpy.memmap at its own offset, evaluated with the
+blocked evaluator straight into a mapping of the output file, and unmapped
+again, so no column is ever loaded (or kept mapped) as a whole.
+"""
+from typing import Any, Dict, Mapping, Optional
+import argparse
+import ast
+import numbers
+import os
+import struct
+import time
+from calculator.program import Program
+from calculator.vectorized import (
+    DEFAULT_CHUNK_SIZE, check_policy, evaluate_program_blocked, require_numpy
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+
+# Rows mapped per chunk: 1M float64 rows = 8 MB per column
+DEFAULT_CHUNK_ROWS = 1 << 20
+
+RAW_DTYPE = '<f8'
+
+
+def _read_npy_header_3_0(f):
+    """
+    Read a version 3.0 `.npy` header (2.0 layout with a UTF-8 dict literal).
+
+    NumPy only exposes readers for versions 1.0 and 2.0.
+
+    Returns:
+        Tuple of (shape, fortran_order, dtype)
+
+    Raises:
+        ValueError: If the header is malformed
+    """
+    try:
+        (length,) = struct.unpack('<I', f.read(4))
+        header = ast.literal_eval(f.read(length).decode('utf8'))
+        return (tuple(header['shape']), bool(header['fortran_order']),
+                np.lib.format.descr_to_dtype(header['descr']))
+    except (struct.error, SyntaxError, UnicodeDecodeError, KeyError, TypeError,
+            ValueError) as exc:
+        raise ValueError(f"Invalid .npy header: {exc}") from None
+
+
+class Column:
+    """A one-dimensional column stored in a file, mapped chunk by chunk."""
+
+    def __init__(self, path: str, dtype, offset: int, length: int):
+        """
+        Initialize a column.
+
+        Args:
+            path: File path
+            dtype: NumPy dtype of the stored values
+            offset: Byte offset of the first value
+            length: Number of values
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.offset = offset
+        self.length = length
+
+    @classmethod
+    def open(cls, path: str) -> 'Column':
+        """
+        Open an existing `.npy` or raw float64 column file.
+
+        Args:
+            path: File path
+
+        Returns:
+            Column describing the file's data
+
+        Raises:
+            ValueError: If a `.npy` file is not a one-dimensional numeric array
+                or has an unsupported format version, or a raw file size is
+                not a multiple of 8 bytes
+        """
+        require_numpy()
+        path = os.fspath(path)
+        if path.endswith('.npy'):
+            with open(path, 'rb') as f:
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                elif version == (2, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                elif version == (3, 0):
+                    shape, fortran_order, dtype = _read_npy_header_3_0(f)
+                else:
+                    raise ValueError(f"{path}: unsupported .npy format version "
+                                     f"{version[0]}.{version[1]}")
+                offset = f.tell()
+            if len(shape) != 1 or dtype.hasobject or dtype.kind not in 'biuf':
+                raise ValueError(f"{path}: expected a one-dimensional numeric array")
+            return cls(path, dtype, offset, shape[0])
+
+        size = os.path.getsize(path)
+        itemsize = np.dtype(RAW_DTYPE).itemsize
+        if size % itemsize:
+            raise ValueError(f"{path}: size is not a multiple of {itemsize} bytes")
+        return cls(path, RAW_DTYPE, 0, size // itemsize)
+
+    @classmethod
+    def create(cls, path: str, length: int) -> 'Column':
+        """
+        Create a float64 output column of the given length.
+
+        Args:
+            path: File path (`.npy` gets a NumPy header, anything else is raw)
+            length: Number of values
+
+        Returns:
+            Column describing the new file
+        """
+        require_numpy()
+        path = os.fspath(path)
+        if path.endswith('.npy'):
+            mapped = np.lib.format.open_memmap(path, mode='w+', dtype=RAW_DTYPE, shape=(length,))
+            offset = mapped.offset
+            del mapped
+            return cls(path, RAW_DTYPE, offset, length)
+
+        with open(path, 'wb') as f:
+            f.truncate(length * np.dtype(RAW_DTYPE).itemsize)
+        return cls(path, RAW_DTYPE, 0, length)
+
+    def map(self, start: int, stop: int, mode: str = 'r'):
+        """
+        Map rows [start, stop) of the column.
+
+        Args:
+            start: First row
+            stop: One past the last row
+            mode: 'r' for reading, 'r+' for writing
+
+        Returns:
+            numpy.memmap over just those rows
+        """
+        return np.memmap(self.path, dtype=self.dtype, mode=mode,
+                         offset=self.offset + start * self.dtype.itemsize,
+                         shape=(stop - start,))
+
+
+class EvaluationStats:
+    """Throughput figures for an out-of-core evaluation."""
+
+    def __init__(self, rows: int, seconds: float, bytes_read: int, bytes_written: int):
+        self.rows = rows
+        self.seconds = seconds
+        self.bytes_read = bytes_read
+        self.bytes_written = bytes_written
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows evaluated per second of wall time."""
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+    def __repr__(self):
+        return (f"EvaluationStats(rows={self.rows}, seconds={self.seconds:.3f}, "
+                f"bytes_read={self.bytes_read}, bytes_written={self.bytes_written})")
+
+    def format_display(self) -> str:
+        """Format statistics for display."""
+        return (f"{self.rows:,} rows in {self.seconds:.3f} s "
+                f"({self.rows_per_second:,.0f} rows/s), "
+                f"read {self.bytes_read / 1e6:.1f} MB, wrote {self.bytes_written / 1e6:.1f} MB")
+
+
+def evaluate_program_columns(program: Program, inputs: Mapping[str, Any], output: str,
+                             chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                             zero_division: str = 'nan') -> EvaluationStats:
+    """
+    Evaluate a program over column files, writing an output column file.
+
+    Args:
+        program: Compiled program
+        inputs: For each variable, a column file path or a scalar value
+        output: Output file path (`.npy` or raw float64)
+        chunk_rows: Rows mapped and evaluated per chunk
+        zero_division: 'nan' or 'raise'
+
+    Returns:
+        EvaluationStats for the run
+
+    Raises:
+        ValueError: If columns differ in length, a variable has no value or
+            the policy is not supported for file output
+        ZeroDivisionError: If zero_division='raise' and a divisor is zero
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    check_policy(zero_division)
+    if zero_division == 'mask':
+        raise ValueError("zero_division='mask' is not supported for file output")
+    if chunk_rows < 1:
+        raise ValueError("Chunk size must be positive")
+
+    columns: Dict[str, Column] = {}
+    scalars: Dict[str, float] = {}
+    length: Optional[int] = None
+    for name in program.names:
+        if name not in inputs:
+            raise ValueError(f"Undefined variable: {name}")
+        value = inputs[name]
+        # numbers.Real also covers NumPy scalars such as np.int64 and np.float32
+        if isinstance(value, numbers.Real):
+            scalars[name] = float(value)
+            continue
+        column = Column.open(value)
+        if length is None:
+            length = column.length
+        elif column.length != length:
+            raise ValueError(
+                f"Column {name} has {column.length} rows, expected {length}"
+            )
+        columns[name] = column
+    if length is None:
+        raise ValueError("At least one input must be a column file")
+
+    start_time = time.perf_counter()
+    result = Column.create(output, length)
+    bytes_read = 0
+
+    for start in range(0, length, chunk_rows):
+        stop = min(start + chunk_rows, length)
+        chunk = dict(scalars)
+        for name, column in columns.items():
+            chunk[name] = column.map(start, stop)
+            bytes_read += (stop - start) * column.dtype.itemsize
+        out = result.map(start, stop, mode='r+')
+        evaluate_program_blocked(program, chunk, out=out,
+                                 chunk_size=DEFAULT_CHUNK_SIZE, zero_division=zero_division)
+        out.flush()
+        # Drop the mappings before the next chunk so resident memory stays bounded
+        del out, chunk
+
+    seconds = time.perf_counter() - start_time
+    return EvaluationStats(length, seconds, bytes_read, length * result.dtype.itemsize)
+
+
+def main(argv=None) -> None:
+    """Command-line entry point: python -m calculator.columns EXPR OUTPUT NAME=FILE..."""
+    from calculator.parser import ExpressionParser
+
+    parser = argparse.ArgumentParser(
+        description="Evaluate an expression over column files without loading them"
+    )
+    parser.add_argument("expression", help="Expression using column names as variables")
+    parser.add_argument("output", help="Output file (.npy or raw float64)")
+    parser.add_argument("inputs", nargs="+", metavar="NAME=FILE|VALUE",
+                        help="Column file or scalar value for each variable")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="Rows processed per chunk")
+    args = parser.parse_args(argv)
+
+    inputs = {}
+    for item in args.inputs:
+        name, sep, value = item.partition('=')
+        if not sep:
+            parser.error(f"Expected NAME=FILE or NAME=VALUE, got {item!r}")
+        try:
+            inputs[name] = float(value)
+        except ValueError:
+            inputs[name] = value
+
+    stats = ExpressionParser().evaluate_files(
+        args.expression, args.output, chunk_rows=args.chunk_rows, **inputs
+    )
+    print(stats.format_display())
+
+
+if __name__ == "__main__":
+    main()
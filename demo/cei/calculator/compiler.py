@@ -0,0 +1,135 @@
+"""
+Compiles programs into reusable Python callables.
+
+The generated source is built only from the program's float constant pool
+and the four arithmetic operators, so no user text ever reaches compile().
+Variables become positional parameters v0, v1, ... rather than their own
+names. Each operation becomes one assignment to a temporary, which keeps
+the code flat regardless of how deeply the expression is nested.
+"""
+from typing import Callable
+import math
+from calculator.program import (
+    Program, OP_CONST, OP_LOAD, OP_ADD, OP_SUB, OP_MUL, OP_DIV, lookup_variable
+)
+
+
+# Python operator emitted for each opcode
+_PY_OPERATORS = {OP_ADD: '+', OP_SUB: '-', OP_MUL: '*', OP_DIV: '/'}
+
+
+class CompiledExpression:
+    """
+    A callable built once from an expression's compiled program.
+    Calling it returns the same value as ExpressionParser.parse().
+    """
+
+    __slots__ = ('expression', 'program', 'cost', 'source', '_func')
+
+    def __init__(self, expression: str, program: Program, source: str,
+                 func: Callable[..., float]):
+        """
+        Initialize a compiled expression.
+
+        Args:
+            expression: The original expression string
+            program: Program the callable was generated from
+            source: Generated Python source
+            func: Compiled function evaluating the program
+        """
+        self.expression = expression
+        self.program = program
+        self.cost = estimate_cost(program)
+        self.source = source
+        self._func = func
+
+    def __call__(self, **variables: float) -> float:
+        """
+        Evaluate the expression.
+
+        Args:
+            **variables: Values for names used in the expression
+
+        Returns:
+            Result of the expression
+
+        Raises:
+            ValueError: If a variable has no value
+            ZeroDivisionError: If division by zero occurs
+        """
+        names = self.program.names
+        args = [lookup_variable(variables, name) for name in names] if names else ()
+        try:
+            return self._func(*args)
+        except ZeroDivisionError:
+            raise ZeroDivisionError("Division by zero") from None
+
+    def __repr__(self):
+        return f"CompiledExpression('{self.expression}', cost={self.cost})"
+
+
+def estimate_cost(program: Program) -> int:
+    """
+    Estimate the evaluation cost of a program.
+
+    Args:
+        program: Compiled program
+
+    Returns:
+        Number of evaluation steps (operand loads plus operations)
+    """
+    return len(program)
+
+
+def generate_source(program: Program) -> str:
+    """
+    Generate Python source for a program.
+
+    Args:
+        program: Compiled program
+
+    Returns:
+        Source of a function named _compiled taking one argument per variable
+    """
+    params = ", ".join(f"v{index}" for index in range(len(program.names)))
+    lines = [f"def _compiled({params}):"]
+    stack = []
+    temp_count = 0
+    constants = iter(program.constants)
+    name_refs = iter(program.name_refs)
+
+    for op in program.code:
+        if op == OP_CONST:
+            value = next(constants)
+            # Literals too large for a float overflow to infinity, which has no repr literal
+            stack.append(repr(value) if math.isfinite(value) else "_inf")
+        elif op == OP_LOAD:
+            stack.append(f"v{next(name_refs)}")
+        else:
+            b = stack.pop()
+            a = stack.pop()
+            temp = f"t{temp_count}"
+            temp_count += 1
+            lines.append(f"    {temp} = {a} {_PY_OPERATORS[op]} {b}")
+            stack.append(temp)
+
+    lines.append(f"    return {stack[0]}")
+    return "\n".join(lines) + "\n"
+
+
+def compile_program(expression: str, program: Program) -> CompiledExpression:
+    """
+    Compile a program into a callable.
+
+    Args:
+        expression: The original expression string
+        program: Compiled program
+
+    Returns:
+        CompiledExpression wrapping the generated function
+    """
+    source = generate_source(program)
+    namespace = {}
+    code = compile(source, f"<expression {expression!r}>", "exec")
+    exec(code, {'__builtins__': {}, '_inf': math.inf}, namespace)
+    return CompiledExpression(expression, program, source, namespace['_compiled'])
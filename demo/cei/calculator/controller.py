@@ -0,0 +1,297 @@
+"""
+Calculator state machine shared by the Tkinter GUIs.
+
+CalculatorController owns everything the GUIs used to keep in widgets'
+callbacks: the expression being typed, the result display text, error
+state, the background evaluator, the live preview and the history. It
+never touches Tk. A view forwards keys with press(), re-reads the display
+state afterwards, and calls poll() again after poll_delay() seconds while
+anything is pending (a debounced preview or a calculation in a worker).
+Timers are deadlines on an injectable clock rather than ``after`` ids, so
+the same logic runs headless in tests and benchmarks.
+"""
+from typing import Callable, Optional
+import os
+import time
+from calculator.evaluator import BackgroundEvaluator, DEFAULT_TIME_BUDGET, Evaluation
+from calculator.history import HistoryManager
+from calculator.preview import LivePreview
+
+
+# Seconds between checks for a background evaluation's outcome
+POLL_INTERVAL = 0.015
+
+# Typing pause in seconds after which the live preview is evaluated
+PREVIEW_DELAY = 0.12
+
+# Keys appended to the expression as typed
+EXPRESSION_KEYS = frozenset('0123456789+-*/().')
+
+
+class CalculatorController:
+    """
+    Expression entry, calculation, preview and history without a display.
+    """
+
+    def __init__(self, time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+                 history_manager: Optional[HistoryManager] = None,
+                 evaluator: Optional[BackgroundEvaluator] = None,
+                 preview: Optional[LivePreview] = None,
+                 preview_delay: float = PREVIEW_DELAY,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the controller and start its worker processes.
+
+        Args:
+            time_budget: Seconds a calculation may run before it is abandoned
+                (None or 0 for no limit)
+            history_manager: History to add calculations to (default: a new
+                one keeping 50 entries)
+            evaluator: Evaluator for calculations instead of starting one
+            preview: Live preview to use instead of starting one
+            preview_delay: Typing pause in seconds before the preview is
+                evaluated
+            clock: Monotonic time source in seconds
+        """
+        # Calculations run in a worker process so the view keeps repainting
+        self.evaluator = evaluator or BackgroundEvaluator(time_budget=time_budget)
+        # Live result preview while typing, in its own worker process
+        self.preview = preview or LivePreview()
+        self.history_manager = history_manager or HistoryManager(max_entries=50)
+        self.preview_delay = preview_delay
+        self._clock = clock
+        # When the debounced preview is due, or None
+        self._preview_due: Optional[float] = None
+
+        # Display state
+        self.expression = ""
+        self.result = "0"
+        self.last_result = ""
+        self.error_state = False
+        # True while result shows a preview rather than a calculation
+        self.previewing = False
+
+        self._actions = {
+            '=': self.calculate,
+            'Return': self.calculate,
+            'KP_Enter': self.calculate,
+            'Escape': self.escape,
+            'BackSpace': self.backspace,
+            'Delete': self.clear_entry,
+            'C': self.clear,
+            'CE': self.clear_entry,
+        }
+
+    @property
+    def busy(self) -> bool:
+        """True while a calculation is running."""
+        return self.evaluator.busy
+
+    def press(self, key: str) -> None:
+        """
+        Handle a key or button.
+
+        Args:
+            key: A character of EXPRESSION_KEYS, '=', 'C', 'CE' or a Tk key
+                name ('Return', 'KP_Enter', 'Escape', 'BackSpace', 'Delete')
+
+        Raises:
+            ValueError: If the key is not recognized
+        """
+        if key in EXPRESSION_KEYS:
+            self.append(key)
+            return
+        action = self._actions.get(key)
+        if action is None:
+            raise ValueError(f"Unknown key: {key!r}")
+        action()
+
+    def append(self, text: str) -> None:
+        """Append text to the expression."""
+        if self.error_state:
+            self.clear()
+        self.expression += text
+        self._schedule_preview()
+
+    def backspace(self) -> None:
+        """Remove the last character from the expression."""
+        if self.expression:
+            self.expression = self.expression[:-1]
+            self._schedule_preview()
+
+    def paste(self, text: str) -> None:
+        """Append pasted text to the expression, dropping whitespace."""
+        text = "".join(text.split())
+        if text:
+            # One append, so a large paste costs one preview evaluation
+            self.append(text)
+
+    def escape(self) -> None:
+        """Cancel a running calculation, or clear the display if there is none."""
+        if self.evaluator.busy:
+            self.cancel()
+        else:
+            self.clear()
+
+    def clear(self) -> None:
+        """Clear the expression and the result."""
+        self._cancel_preview()
+        self.expression = ""
+        self.result = "0"
+        self.error_state = False
+
+    def clear_entry(self) -> None:
+        """Clear the expression, showing the last result again (CE)."""
+        self._cancel_preview()
+        self.expression = ""
+        if not self.error_state:
+            self.result = self.last_result or "0"
+        self.error_state = False
+
+    def restore(self, expression: str) -> None:
+        """Replace the expression, e.g. with one picked from history."""
+        self.expression = expression
+
+    def calculate(self) -> None:
+        """Start calculating the expression in the background."""
+        if not self.expression or self.evaluator.busy:
+            return
+        self._cancel_preview()
+        # The preview may already have evaluated exactly this text
+        outcome = self.preview.cached(self.expression)
+        if outcome is not None:
+            self._show_outcome(outcome)
+            return
+        self.evaluator.submit(self.expression)
+        self.result = "Computing…"
+
+    def cancel(self) -> bool:
+        """
+        Abandon the running calculation.
+
+        Returns:
+            True if a calculation was cancelled
+        """
+        if not self.evaluator.cancel():
+            return False
+        self.result = "Cancelled"
+        return True
+
+    def poll(self) -> bool:
+        """
+        Start a due preview and collect finished evaluations without blocking.
+
+        Returns:
+            True if the display state changed
+        """
+        changed = False
+        if self._preview_due is not None and self._clock() >= self._preview_due:
+            self._preview_due = None
+            changed = self._start_preview()
+        if self.evaluator.busy:
+            outcome = self.evaluator.poll()
+            if outcome is not None:
+                self._show_outcome(outcome)
+                changed = True
+        if self.preview.busy:
+            outcome = self.preview.poll()
+            if outcome is not None:
+                changed = self._show_preview(outcome) or changed
+        return changed
+
+    def poll_delay(self) -> Optional[float]:
+        """
+        Seconds until poll() should be called next.
+
+        Returns:
+            Delay in seconds, or None if nothing is pending
+        """
+        delay = None
+        if self.evaluator.busy or self.preview.busy:
+            delay = POLL_INTERVAL
+        if self._preview_due is not None:
+            due = max(0.0, self._preview_due - self._clock())
+            delay = due if delay is None else min(delay, due)
+        return delay
+
+    def clear_history(self) -> None:
+        """Delete all calculation history."""
+        self.history_manager.clear_history()
+
+    def open_history_file(self, history_file: str) -> None:
+        """
+        Load saved history and save changes in the background.
+
+        Autosave is enabled even if loading fails.
+
+        Args:
+            history_file: JSON history file (need not exist yet)
+
+        Raises:
+            OSError: If the file could not be read
+            ValueError: If the file is not valid history
+        """
+        try:
+            if os.path.exists(history_file):
+                self.history_manager.load_from_file(history_file)
+        finally:
+            # Saving runs on a writer thread; calculations only notify it
+            self.history_manager.enable_autosave(history_file)
+
+    def close(self) -> None:
+        """Stop the worker processes and write pending history."""
+        self.evaluator.close()
+        self._cancel_preview()
+        self.preview.close()
+        self.history_manager.disable_autosave()
+
+    def _show_outcome(self, outcome: Evaluation) -> None:
+        """Display a finished calculation and add it to history."""
+        if outcome.ok:
+            result = f"{outcome.result:.10g}"
+            self.result = result
+            self.last_result = result
+            self.history_manager.add_entry(outcome.expression, outcome.result)
+            # Clear the expression for the next calculation (unless edited meanwhile)
+            if self.expression == outcome.expression:
+                self.expression = ""
+            self.error_state = False
+        elif isinstance(outcome.error, ZeroDivisionError):
+            self.result = "Error: Division by zero"
+            self.error_state = True
+        else:
+            self.result = f"Error: {outcome.error}"
+            self.error_state = True
+
+    def _schedule_preview(self) -> None:
+        """Restart the debounce timer for the live preview."""
+        self._preview_due = self._clock() + self.preview_delay
+
+    def _start_preview(self) -> bool:
+        """Request a preview once typing has paused; True if the display changed."""
+        if self.evaluator.busy:
+            return False
+        if not self.expression:
+            self._cancel_preview()
+            self.result = self.last_result or "0"
+            return True
+        outcome = self.preview.request(self.expression)
+        return outcome is not None and self._show_preview(outcome)
+
+    def _show_preview(self, outcome: Evaluation) -> bool:
+        """Show a preview result, or nothing while the expression is incomplete."""
+        if self.evaluator.busy or outcome.expression != self.expression:
+            return False
+        self.result = f"{outcome.result:.10g}" if outcome.ok else ""
+        self.previewing = True
+        return True
+
+    def _cancel_preview(self) -> None:
+        """Stop previewing and return to the normal result display."""
+        self._preview_due = None
+        self.preview.cancel()
+        self.previewing = False
+
+    def __repr__(self):
+        return (f"CalculatorController(expression='{self.expression}', "
+                f"result='{self.result}', busy={self.busy})")
@@ -0,0 +1,278 @@
+"""
+Expression evaluation in a background worker process.
+
+The GUI has to keep repainting while an expensive expression is evaluated.
+A thread would hold the GIL for most of the work and cannot be interrupted,
+so expressions are sent over a pipe to a persistent worker process and the
+caller polls for the outcome without blocking (the GUI from a Tk ``after``
+callback). Cancelling, or exceeding the time budget, terminates the worker
+and immediately starts a fresh one, so the next evaluation does not pay for
+process start-up.
+
+Workers are started with the ``spawn`` method, which re-imports the main
+script in each worker. A script that creates a BackgroundEvaluator (or a
+GUI, controller or preview using one) must do so under an
+``if __name__ == "__main__":`` guard; otherwise every worker fails during
+start-up and each evaluation reports that the worker exited unexpectedly.
+"""
+from typing import Optional, Tuple
+import multiprocessing
+import time
+
+
+# Seconds an evaluation may run before it is abandoned
+DEFAULT_TIME_BUDGET = 10.0
+
+
+def _worker_main(connection, cache_size: int, incremental: bool = False) -> None:
+    """Worker process loop: evaluate (job, expression) requests until told to stop."""
+    from calculator.parser import ExpressionParser
+    parser = ExpressionParser(cache_size=cache_size, use_cache=cache_size > 0)
+    evaluate = parser.parse
+    if incremental:
+        # Successive requests are edits of one another while typing
+        from calculator.incremental import IncrementalParser
+        evaluate = IncrementalParser(parser).parse
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        job, expression = request
+        try:
+            reply: Tuple = (job, evaluate(expression), None)
+        except Exception as exc:
+            reply = (job, None, exc)
+        try:
+            connection.send(reply)
+        except Exception as exc:
+            # The exception could not be pickled; send its text instead
+            connection.send((job, None, RuntimeError(str(reply[2] or exc))))
+
+
+class Evaluation:
+    """Outcome of one background evaluation."""
+
+    __slots__ = ('job', 'expression', 'result', 'error', 'elapsed')
+
+    def __init__(self, job: int, expression: str, result: Optional[float],
+                 error: Optional[BaseException], elapsed: float):
+        """
+        Initialize an outcome.
+
+        Args:
+            job: Job number returned by submit()
+            expression: The expression that was evaluated
+            result: The result, or None if evaluation failed
+            error: The exception raised (TimeoutError if the time budget
+                ran out), or None on success
+            elapsed: Seconds between submission and the outcome
+        """
+        self.job = job
+        self.expression = expression
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """True if the expression was evaluated successfully."""
+        return self.error is None
+
+    def __repr__(self):
+        outcome = self.result if self.error is None else f"{type(self.error).__name__}: {self.error}"
+        return f"Evaluation({self.job}, '{self.expression}', {outcome}, {self.elapsed:.3f}s)"
+
+
+class BackgroundEvaluator:
+    """Evaluates one expression at a time in a worker process."""
+
+    def __init__(self, time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+                 cache_size: int = 256, incremental: bool = False):
+        """
+        Start the worker process.
+
+        Args:
+            time_budget: Seconds an evaluation may run before it is
+                abandoned (None or 0 for no limit)
+            cache_size: Compiled-expression cache size of the worker's parser
+            incremental: Evaluate each expression as an edit of the previous
+                one with an IncrementalParser
+
+        Raises:
+            ValueError: If time_budget is negative
+        """
+        if time_budget is not None and time_budget < 0:
+            raise ValueError("Time budget must be non-negative")
+        self.time_budget = time_budget or None
+        self.cache_size = cache_size
+        self.incremental = incremental
+        # Workers are spawned rather than forked so they never inherit the
+        # GUI's open display connection
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._connection = None
+        self._jobs = 0
+        # (job, expression, start time) of the evaluation in progress
+        self._running: Optional[Tuple[int, str, float]] = None
+        self._start_worker()
+
+    @property
+    def busy(self) -> bool:
+        """True while an evaluation is in progress."""
+        return self._running is not None
+
+    @property
+    def running_time(self) -> Optional[float]:
+        """Seconds the evaluation in progress has been running, or None if idle."""
+        if self._running is None:
+            return None
+        return time.monotonic() - self._running[2]
+
+    def _start_worker(self) -> None:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child, self.cache_size, self.incremental),
+            name="calculator-evaluator",
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        self._process = process
+        self._connection = parent
+
+    def _stop_worker(self) -> None:
+        process = self._process
+        if process is None:
+            return
+        process.terminate()
+        process.join(1.0)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def submit(self, expression: str) -> int:
+        """
+        Start evaluating an expression. Any evaluation in progress is cancelled.
+
+        Args:
+            expression: Expression to evaluate
+
+        Returns:
+            Job number, repeated in the Evaluation returned by poll()
+        """
+        if self._running is not None or self._process is None:
+            self.cancel()
+            if self._process is None:
+                self._start_worker()
+        self._jobs += 1
+        try:
+            self._connection.send((self._jobs, expression))
+        except OSError:
+            # The worker died while idle; start another and resend
+            self._restart()
+            self._connection.send((self._jobs, expression))
+        self._running = (self._jobs, expression, time.monotonic())
+        return self._jobs
+
+    def poll(self) -> Optional[Evaluation]:
+        """
+        Check for the outcome of the evaluation in progress without blocking.
+
+        Returns:
+            Evaluation once it has finished, failed or run out of time;
+            None while it is still running or if nothing was submitted
+        """
+        if self._running is None:
+            return None
+        job, expression, started = self._running
+        elapsed = time.monotonic() - started
+        try:
+            ready = self._connection.poll()
+            reply = self._connection.recv() if ready else None
+        except (EOFError, OSError):
+            # The worker died (e.g. killed for using too much memory)
+            self._restart()
+            return Evaluation(job, expression, None,
+                              RuntimeError("Evaluation worker exited unexpectedly"), elapsed)
+        if reply is not None:
+            self._running = None
+            return Evaluation(job, expression, reply[1], reply[2], elapsed)
+        if self.time_budget is not None and elapsed > self.time_budget:
+            self._restart()
+            return Evaluation(job, expression, None, TimeoutError(
+                f"Evaluation exceeded the {self.time_budget:g} s time budget"), elapsed)
+        return None
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Evaluation]:
+        """
+        Block until the evaluation in progress has an outcome.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits for the outcome,
+                which the time budget bounds if set)
+
+        Returns:
+            Evaluation, or None if nothing was submitted or timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._running is not None:
+            outcome = self.poll()
+            if outcome is not None:
+                return outcome
+            step = 0.05
+            if deadline is not None:
+                step = min(step, deadline - time.monotonic())
+                if step <= 0:
+                    return None
+            try:
+                self._connection.poll(step)
+            except (EOFError, OSError):
+                pass
+        return None
+
+    def cancel(self) -> bool:
+        """
+        Abandon the evaluation in progress.
+
+        Returns:
+            True if an evaluation was cancelled
+        """
+        if self._running is None:
+            return False
+        self._restart()
+        return True
+
+    def _restart(self) -> None:
+        self._running = None
+        self._stop_worker()
+        self._start_worker()
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        self._running = None
+        process = self._process
+        if process is None:
+            return
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        process.join(1.0)
+        self._stop_worker()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        state = "busy" if self.busy else "idle"
+        return f"BackgroundEvaluator(time_budget={self.time_budget}, {state})"
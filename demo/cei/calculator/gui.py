@@ -5,8 +5,13 @@ Provides a graphical interface for the calculator with expression parsing.
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from typing import Optional, Callable
-from calculator.parser import ExpressionParser
-from calculator.history import HistoryManager
+from calculator.controller import CalculatorController, EXPRESSION_KEYS
+from calculator.evaluator import DEFAULT_TIME_BUDGET
+from calculator.history_view import HistoryPanel
+
+
+# Text colour of the result display while it shows a preview
+PREVIEW_COLOR = '#888888'
 
 
 class CalculatorGUI:
@@ -15,25 +20,29 @@ class CalculatorGUI:
     Features a display, number/operation buttons, and calculation history.
     """
     
-    def __init__(self, master: tk.Tk):
+    def __init__(self, master: tk.Tk, history_file: Optional[str] = None,
+                 time_budget: Optional[float] = DEFAULT_TIME_BUDGET):
         """
         Initialize the calculator GUI.
         
         Args:
             master: The root Tkinter window
+            history_file: JSON file to load history from and autosave to
+            time_budget: Seconds a calculation may run before it is abandoned
+                (None or 0 for no limit)
         """
         self.master = master
         self.master.title("Calculator")
         self.master.resizable(False, False)
         
-        # Initialize components
-        self.parser = ExpressionParser()
-        self.history_manager = HistoryManager(max_entries=50)
-        
-        # State variables
-        self.current_expression = ""
-        self.last_result = ""
-        self.error_state = False
+        # Expression, result, calculation, preview and history state
+        self.controller = CalculatorController(time_budget=time_budget)
+        self.history_manager = self.controller.history_manager
+        # after() id of the next controller poll
+        self._poll_id = None
+        self._computing = False
+        # Tracks which entries the listbox shows so updates touch only changed rows
+        self.history_panel = HistoryPanel(self.history_manager, limit=20)
         
         # Configure styles
         self._configure_styles()
@@ -55,6 +64,9 @@ class CalculatorGUI:
         
         # Focus on the window
         self.master.focus_set()
+        
+        self._open_history_file(history_file)
+        self.master.protocol("WM_DELETE_WINDOW", self._on_close)
     
     def _configure_styles(self):
         """Configure GUI styles and colors."""
@@ -86,13 +98,13 @@ class CalculatorGUI:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Clear History", command=self._clear_history)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.master.quit)
+        file_menu.add_command(label="Exit", command=self._on_close)
         
         # Edit menu
         edit_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Edit", menu=edit_menu)
-        edit_menu.add_command(label="Clear", command=self._clear_display, accelerator="Esc")
-        edit_menu.add_command(label="Clear Entry", command=self._clear_entry, accelerator="CE")
+        edit_menu.add_command(label="Clear", command=lambda: self._press('C'), accelerator="Esc")
+        edit_menu.add_command(label="Clear Entry", command=lambda: self._press('CE'), accelerator="CE")
         
         # View menu
         view_menu = tk.Menu(menubar, tearoff=0)
@@ -144,6 +156,18 @@ class CalculatorGUI:
         )
         self.result_display.pack(fill='x')
         
+        # Shown only while a calculation is running
+        self.cancel_button = tk.Button(
+            display_frame,
+            text="Cancel (Esc)",
+            command=self._cancel_calculation,
+            font=('Arial', 10),
+            bg='#f44336',
+            fg='black'
+        )
+        self.cancel_button.grid(row=2, column=0, sticky="e", pady=(5, 0))
+        self.cancel_button.grid_remove()
+        
         # Configure grid weights
         display_frame.columnconfigure(0, weight=1)
     
@@ -155,30 +179,30 @@ class CalculatorGUI:
         # Button layout
         buttons = [
             # Row 0
-            [('C', self._clear_display, 'Clear.TButton'), 
-             ('CE', self._clear_entry, 'Clear.TButton'),
-             ('(', lambda: self._append_to_expression('('), 'Operator.TButton'),
-             (')', lambda: self._append_to_expression(')'), 'Operator.TButton')],
+            [('C', lambda: self._press('C'), 'Clear.TButton'), 
+             ('CE', lambda: self._press('CE'), 'Clear.TButton'),
+             ('(', lambda: self._press('('), 'Operator.TButton'),
+             (')', lambda: self._press(')'), 'Operator.TButton')],
             # Row 1
-            [('7', lambda: self._append_to_expression('7'), 'Number.TButton'),
-             ('8', lambda: self._append_to_expression('8'), 'Number.TButton'),
-             ('9', lambda: self._append_to_expression('9'), 'Number.TButton'),
-             ('/', lambda: self._append_to_expression('/'), 'Operator.TButton')],
+            [('7', lambda: self._press('7'), 'Number.TButton'),
+             ('8', lambda: self._press('8'), 'Number.TButton'),
+             ('9', lambda: self._press('9'), 'Number.TButton'),
+             ('/', lambda: self._press('/'), 'Operator.TButton')],
             # Row 2
-            [('4', lambda: self._append_to_expression('4'), 'Number.TButton'),
-             ('5', lambda: self._append_to_expression('5'), 'Number.TButton'),
-             ('6', lambda: self._append_to_expression('6'), 'Number.TButton'),
-             ('*', lambda: self._append_to_expression('*'), 'Operator.TButton')],
+            [('4', lambda: self._press('4'), 'Number.TButton'),
+             ('5', lambda: self._press('5'), 'Number.TButton'),
+             ('6', lambda: self._press('6'), 'Number.TButton'),
+             ('*', lambda: self._press('*'), 'Operator.TButton')],
             # Row 3
-            [('1', lambda: self._append_to_expression('1'), 'Number.TButton'),
-             ('2', lambda: self._append_to_expression('2'), 'Number.TButton'),
-             ('3', lambda: self._append_to_expression('3'), 'Number.TButton'),
-             ('-', lambda: self._append_to_expression('-'), 'Operator.TButton')],
+            [('1', lambda: self._press('1'), 'Number.TButton'),
+             ('2', lambda: self._press('2'), 'Number.TButton'),
+             ('3', lambda: self._press('3'), 'Number.TButton'),
+             ('-', lambda: self._press('-'), 'Operator.TButton')],
             # Row 4
-            [('0', lambda: self._append_to_expression('0'), 'Number.TButton'),
-             ('.', lambda: self._append_to_expression('.'), 'Number.TButton'),
-             ('=', self._calculate, 'Equals.TButton'),
-             ('+', lambda: self._append_to_expression('+'), 'Operator.TButton')]
+            [('0', lambda: self._press('0'), 'Number.TButton'),
+             ('.', lambda: self._press('.'), 'Number.TButton'),
+             ('=', lambda: self._press('='), 'Equals.TButton'),
+             ('+', lambda: self._press('+'), 'Operator.TButton')]
         ]
         
         # Create buttons
@@ -277,125 +301,111 @@ class CalculatorGUI:
     
     def _bind_keyboard_events(self):
         """Bind keyboard shortcuts."""
-        # Number keys
-        for i in range(10):
-            self.master.bind(str(i), lambda e, n=str(i): self._append_to_expression(n))
-        
-        # Operators
-        self.master.bind('+', lambda e: self._append_to_expression('+'))
-        self.master.bind('-', lambda e: self._append_to_expression('-'))
-        self.master.bind('*', lambda e: self._append_to_expression('*'))
-        self.master.bind('/', lambda e: self._append_to_expression('/'))
-        
-        # Parentheses
-        self.master.bind('(', lambda e: self._append_to_expression('('))
-        self.master.bind(')', lambda e: self._append_to_expression(')'))
-        
-        # Decimal point
-        self.master.bind('.', lambda e: self._append_to_expression('.'))
+        # Numbers, operators, parentheses and the decimal point
+        for key in EXPRESSION_KEYS:
+            self.master.bind(key, lambda e, k=key: self._press(k))
         
         # Special keys
-        self.master.bind('<Return>', lambda e: self._calculate())
-        self.master.bind('<KP_Enter>', lambda e: self._calculate())
-        self.master.bind('=', lambda e: self._calculate())
-        self.master.bind('<Escape>', lambda e: self._clear_display())
-        self.master.bind('<BackSpace>', lambda e: self._backspace())
-        self.master.bind('<Delete>', lambda e: self._clear_entry())
+        for key in ('=', 'Return', 'KP_Enter', 'Escape', 'BackSpace', 'Delete'):
+            sequence = key if key == '=' else f'<{key}>'
+            self.master.bind(sequence, lambda e, k=key: self._press(k))
+        self.master.bind('<<Paste>>', lambda e: self._paste())
     
-    def _append_to_expression(self, value: str):
-        """Append a value to the current expression."""
-        if self.error_state:
-            self._clear_display()
-        
-        self.current_expression += value
-        self.expression_var.set(self.current_expression)
-        print(f"Button clicked: {value}, Expression: {self.current_expression}")  # Debug
+    def _press(self, key: str):
+        """Forward a key or button to the controller and redraw."""
+        self.controller.press(key)
+        self._refresh()
     
-    def _backspace(self):
-        """Remove the last character from the expression."""
-        if self.current_expression:
-            self.current_expression = self.current_expression[:-1]
-            self.expression_var.set(self.current_expression)
+    def _paste(self):
+        """Append the clipboard text to the expression."""
+        try:
+            text = self.master.clipboard_get()
+        except tk.TclError:
+            return
+        self.controller.paste(text)
+        self._refresh()
     
-    def _clear_display(self):
-        """Clear the entire display."""
-        self.current_expression = ""
-        self.expression_var.set("")
-        self.result_var.set("0")
-        self.error_state = False
+    def _cancel_calculation(self):
+        """Abandon the running calculation."""
+        self.controller.cancel()
+        self._refresh()
     
-    def _clear_entry(self):
-        """Clear the current entry (CE functionality)."""
-        self.current_expression = ""
-        self.expression_var.set("")
-        if not self.error_state:
-            self.result_var.set(self.last_result if self.last_result else "0")
-        self.error_state = False
+    def _refresh(self):
+        """Show the controller's state and schedule its next poll."""
+        controller = self.controller
+        self.expression_var.set(controller.expression)
+        self.result_var.set(controller.result)
+        self.result_display.config(fg=PREVIEW_COLOR if controller.previewing else 'black')
+        if controller.busy != self._computing:
+            self._set_computing(controller.busy)
+        self._update_history_display()
+        
+        if self._poll_id is not None:
+            self.master.after_cancel(self._poll_id)
+            self._poll_id = None
+        delay = controller.poll_delay()
+        if delay is not None:
+            self._poll_id = self.master.after(max(1, round(delay * 1000)), self._poll)
     
-    def _calculate(self):
-        """Calculate the current expression."""
-        if not self.current_expression:
-            return
-        
-        try:
-            # Parse and evaluate expression
-            result = self.parser.parse(self.current_expression)
-            
-            # Format result
-            result_str = f"{result:.10g}"
-            self.result_var.set(result_str)
-            self.last_result = result_str
-            
-            # Add to history
-            self.history_manager.add_entry(self.current_expression, result)
-            self._update_history_display()
-            
-            # Clear expression for next calculation
-            self.current_expression = ""
-            self.expression_var.set("")
-            self.error_state = False
-            
-        except ZeroDivisionError:
-            self.result_var.set("Error: Division by zero")
-            self.error_state = True
-        except Exception as e:
-            self.result_var.set(f"Error: {str(e)}")
-            self.error_state = True
+    def _poll(self):
+        """Let the controller start previews and collect outcomes."""
+        self._poll_id = None
+        self.controller.poll()
+        self._refresh()
+    
+    def _set_computing(self, computing: bool):
+        """Show or hide the computing state."""
+        self._computing = computing
+        if computing:
+            self.cancel_button.grid()
+            self.master.config(cursor='watch')
+        else:
+            self.cancel_button.grid_remove()
+            self.master.config(cursor='')
     
     def _update_history_display(self):
-        """Update the history listbox."""
-        self.history_listbox.delete(0, tk.END)
-        
-        # Get recent history
-        history = self.history_manager.get_recent(20)
-        
-        # Add entries to listbox (most recent at top)
-        for entry in reversed(history):
-            display_text = entry.format_display()
-            self.history_listbox.insert(0, display_text)
+        """Update the history listbox, inserting new rows and dropping evicted ones."""
+        # Most recent at top
+        for operation in self.history_panel.sync():
+            if operation[0] == 'delete':
+                self.history_listbox.delete(operation[1], operation[2])
+            else:
+                self.history_listbox.insert(operation[1], *operation[2])
     
     def _restore_from_history(self, event):
         """Restore an expression from history."""
         selection = self.history_listbox.curselection()
         if selection:
             # Get the selected history entry
-            index = selection[0]
-            # History is displayed in reverse order
-            history = self.history_manager.get_recent(20)
-            entry_index = len(history) - 1 - index
-            
-            if 0 <= entry_index < len(history):
-                entry = history[entry_index]
-                self.current_expression = entry.expression
-                self.expression_var.set(self.current_expression)
+            entry = self.history_panel.entry_for_row(selection[0])
+            if entry is not None:
+                self.controller.restore(entry.expression)
+                self._refresh()
     
     def _clear_history(self):
         """Clear calculation history."""
         if messagebox.askyesno("Clear History", 
                                "Are you sure you want to clear all calculation history?"):
-            self.history_manager.clear_history()
+            self.controller.clear_history()
             self._update_history_display()
     
+    def _open_history_file(self, history_file: Optional[str]):
+        """Load saved history and save changes in the background."""
+        if history_file is None:
+            return
+        try:
+            self.controller.open_history_file(history_file)
+        except (OSError, ValueError) as e:
+            messagebox.showwarning("History", f"Could not load history: {e}")
+        self._update_history_display()
+    
+    def _on_close(self):
+        """Stop the workers, write pending history and close the window."""
+        if self._poll_id is not None:
+            self.master.after_cancel(self._poll_id)
+        self.controller.close()
+        self.master.destroy()
+    
     def _toggle_history(self):
         """Toggle history panel visibility."""
         if self.show_history.get():
@@ -425,7 +435,7 @@ class CalculatorGUI:
         Decimal: .
         
         Enter/= : Calculate
-        Escape : Clear all
+        Escape : Cancel calculation / Clear all
         Backspace : Delete last character
         Delete : Clear entry
         
@@ -434,10 +444,17 @@ class CalculatorGUI:
         messagebox.showinfo("Keyboard Shortcuts", shortcuts)
 
 
-def main():
-    """Run the calculator GUI."""
+def main(history_file: Optional[str] = None,
+         time_budget: Optional[float] = DEFAULT_TIME_BUDGET):
+    """
+    Run the calculator GUI.
+    
+    Args:
+        history_file: JSON file to load history from and autosave to
+        time_budget: Seconds a calculation may run (None or 0 for no limit)
+    """
     root = tk.Tk()
-    app = CalculatorGUI(root)
+    app = CalculatorGUI(root, history_file=history_file, time_budget=time_budget)
     root.mainloop()
 
 
@@ -4,8 +4,13 @@ Fixed GUI Calculator using Labels for display.
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional
-from calculator.parser import ExpressionParser
-from calculator.history import HistoryManager
+from calculator.controller import CalculatorController, EXPRESSION_KEYS
+from calculator.evaluator import DEFAULT_TIME_BUDGET
+from calculator.history_view import VirtualHistoryPanel
+
+
+# Text colour of the result display while it shows a preview
+PREVIEW_COLOR = '#888888'
 
 
 class CalculatorGUI:
@@ -13,19 +18,20 @@ class CalculatorGUI:
     Fixed calculator GUI using Labels instead of Entry widgets for display.
     """
     
-    def __init__(self, master: tk.Tk):
+    def __init__(self, master: tk.Tk, history_file: Optional[str] = None,
+                 time_budget: Optional[float] = DEFAULT_TIME_BUDGET):
         self.master = master
         self.master.title("Calculator")
         self.master.resizable(False, False)
         
-        # Initialize components
-        self.parser = ExpressionParser()
-        self.history_manager = HistoryManager(max_entries=50)
-        
-        # State variables
-        self.current_expression = ""
-        self.last_result = ""
-        self.error_state = False
+        # Expression, result, calculation, preview and history state
+        self.controller = CalculatorController(time_budget=time_budget)
+        self.history_manager = self.controller.history_manager
+        # after() id of the next controller poll
+        self._poll_id = None
+        self._computing = False
+        # Only the rows that fit in the listbox are ever inserted
+        self.history_panel = VirtualHistoryPanel(self.history_manager, visible_rows=15)
         
         # Create GUI components
         self._create_display_frame()
@@ -41,6 +47,9 @@ class CalculatorGUI:
         
         # Focus on the window
         self.master.focus_set()
+        
+        self._open_history_file(history_file)
+        self.master.protocol("WM_DELETE_WINDOW", self._on_close)
     
     def _create_display_frame(self):
         """Create the display area using Labels."""
@@ -78,6 +87,16 @@ class CalculatorGUI:
             padx=10
         )
         self.result_display.pack(fill='x', pady=(0, 5))
+        
+        # Shown only while a calculation is running
+        self.cancel_button = tk.Button(
+            display_frame,
+            text="Cancel (Esc)",
+            command=self._cancel_calculation,
+            font=('Arial', 10),
+            bg='#f44336',
+            fg='black'
+        )
     
     def _create_button_frame(self):
         """Create the calculator button grid."""
@@ -87,30 +106,30 @@ class CalculatorGUI:
         # Button layout
         buttons = [
             # Row 0
-            [('C', self._clear_display, '#f44336'), 
-             ('CE', self._clear_entry, '#f44336'),
-             ('(', lambda: self._append_to_expression('('), '#2196F3'),
-             (')', lambda: self._append_to_expression(')'), '#2196F3')],
+            [('C', lambda: self._press('C'), '#f44336'), 
+             ('CE', lambda: self._press('CE'), '#f44336'),
+             ('(', lambda: self._press('('), '#2196F3'),
+             (')', lambda: self._press(')'), '#2196F3')],
             # Row 1
-            [('7', lambda: self._append_to_expression('7'), '#e0e0e0'),
-             ('8', lambda: self._append_to_expression('8'), '#e0e0e0'),
-             ('9', lambda: self._append_to_expression('9'), '#e0e0e0'),
-             ('/', lambda: self._append_to_expression('/'), '#ff9500')],
+            [('7', lambda: self._press('7'), '#e0e0e0'),
+             ('8', lambda: self._press('8'), '#e0e0e0'),
+             ('9', lambda: self._press('9'), '#e0e0e0'),
+             ('/', lambda: self._press('/'), '#ff9500')],
             # Row 2
-            [('4', lambda: self._append_to_expression('4'), '#e0e0e0'),
-             ('5', lambda: self._append_to_expression('5'), '#e0e0e0'),
-             ('6', lambda: self._append_to_expression('6'), '#e0e0e0'),
-             ('*', lambda: self._append_to_expression('*'), '#ff9500')],
+            [('4', lambda: self._press('4'), '#e0e0e0'),
+             ('5', lambda: self._press('5'), '#e0e0e0'),
+             ('6', lambda: self._press('6'), '#e0e0e0'),
+             ('*', lambda: self._press('*'), '#ff9500')],
             # Row 3
-            [('1', lambda: self._append_to_expression('1'), '#e0e0e0'),
-             ('2', lambda: self._append_to_expression('2'), '#e0e0e0'),
-             ('3', lambda: self._append_to_expression('3'), '#e0e0e0'),
-             ('-', lambda: self._append_to_expression('-'), '#ff9500')],
+            [('1', lambda: self._press('1'), '#e0e0e0'),
+             ('2', lambda: self._press('2'), '#e0e0e0'),
+             ('3', lambda: self._press('3'), '#e0e0e0'),
+             ('-', lambda: self._press('-'), '#ff9500')],
             # Row 4
-            [('0', lambda: self._append_to_expression('0'), '#e0e0e0'),
-             ('.', lambda: self._append_to_expression('.'), '#e0e0e0'),
-             ('=', self._calculate, '#4CAF50'),
-             ('+', lambda: self._append_to_expression('+'), '#ff9500')]
+            [('0', lambda: self._press('0'), '#e0e0e0'),
+             ('.', lambda: self._press('.'), '#e0e0e0'),
+             ('=', lambda: self._press('='), '#4CAF50'),
+             ('+', lambda: self._press('+'), '#ff9500')]
         ]
         
         # Create buttons
@@ -147,17 +166,19 @@ class CalculatorGUI:
             self.history_frame,
             font=('Arial', 10),
             width=30,
-            height=15,
+            height=self.history_panel.visible_rows,
             selectmode=tk.SINGLE,
             bg='#f5f5f5'
         )
         self.history_listbox.pack(side='left', fill='both', expand=True, padx=5, pady=5)
         
-        # Scrollbar
-        scrollbar = tk.Scrollbar(self.history_frame, orient="vertical", 
-                                command=self.history_listbox.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.history_listbox.config(yscrollcommand=scrollbar.set)
+        # Scrollbar drives the virtual panel, not the listbox itself
+        self.history_scrollbar = tk.Scrollbar(self.history_frame, orient="vertical",
+                                              command=self._scroll_history)
+        self.history_scrollbar.pack(side='right', fill='y')
+        self.history_listbox.bind('<MouseWheel>', self._on_mouse_wheel)
+        self.history_listbox.bind('<Button-4>', lambda e: self._scroll_history('scroll', -1, 'units'))
+        self.history_listbox.bind('<Button-5>', lambda e: self._scroll_history('scroll', 1, 'units'))
         
         # Bind double-click to restore expression
         self.history_listbox.bind('<Double-Button-1>', self._restore_from_history)
@@ -176,120 +197,135 @@ class CalculatorGUI:
     
     def _bind_keyboard_events(self):
         """Bind keyboard shortcuts."""
-        # Number keys
-        for i in range(10):
-            self.master.bind(str(i), lambda e, n=str(i): self._append_to_expression(n))
-        
-        # Operators
-        self.master.bind('+', lambda e: self._append_to_expression('+'))
-        self.master.bind('-', lambda e: self._append_to_expression('-'))
-        self.master.bind('*', lambda e: self._append_to_expression('*'))
-        self.master.bind('/', lambda e: self._append_to_expression('/'))
-        
-        # Parentheses
-        self.master.bind('(', lambda e: self._append_to_expression('('))
-        self.master.bind(')', lambda e: self._append_to_expression(')'))
-        
-        # Decimal point
-        self.master.bind('.', lambda e: self._append_to_expression('.'))
+        # Numbers, operators, parentheses and the decimal point
+        for key in EXPRESSION_KEYS:
+            self.master.bind(key, lambda e, k=key: self._press(k))
         
         # Special keys
-        self.master.bind('<Return>', lambda e: self._calculate())
-        self.master.bind('<KP_Enter>', lambda e: self._calculate())
-        self.master.bind('=', lambda e: self._calculate())
-        self.master.bind('<Escape>', lambda e: self._clear_display())
-        self.master.bind('<BackSpace>', lambda e: self._backspace())
+        for key in ('=', 'Return', 'KP_Enter', 'Escape', 'BackSpace', 'Delete'):
+            sequence = key if key == '=' else f'<{key}>'
+            self.master.bind(sequence, lambda e, k=key: self._press(k))
+        self.master.bind('<<Paste>>', lambda e: self._paste())
     
-    def _append_to_expression(self, value: str):
-        """Append a value to the current expression."""
-        if self.error_state:
-            self._clear_display()
-        
-        self.current_expression += value
-        self.expression_var.set(self.current_expression)
-        print(f"Expression updated: {self.current_expression}")  # Debug
-    
-    def _backspace(self):
-        """Remove the last character from the expression."""
-        if self.current_expression:
-            self.current_expression = self.current_expression[:-1]
-            self.expression_var.set(self.current_expression)
+    def _press(self, key: str):
+        """Forward a key or button to the controller and redraw."""
+        self.controller.press(key)
+        self._refresh()
     
-    def _clear_display(self):
-        """Clear the entire display."""
-        self.current_expression = ""
-        self.expression_var.set("")
-        self.result_var.set("0")
-        self.error_state = False
+    def _paste(self):
+        """Append the clipboard text to the expression."""
+        try:
+            text = self.master.clipboard_get()
+        except tk.TclError:
+            return
+        self.controller.paste(text)
+        self._refresh()
     
-    def _clear_entry(self):
-        """Clear the current entry (CE functionality)."""
-        self.current_expression = ""
-        self.expression_var.set("")
-        if not self.error_state:
-            self.result_var.set(self.last_result if self.last_result else "0")
+    def _cancel_calculation(self):
+        """Abandon the running calculation."""
+        self.controller.cancel()
+        self._refresh()
     
-    def _calculate(self):
-        """Calculate the result of the current expression."""
-        if not self.current_expression:
-            return
+    def _refresh(self):
+        """Show the controller's state and schedule its next poll."""
+        controller = self.controller
+        self.expression_var.set(controller.expression)
+        self.result_var.set(controller.result)
+        self.result_display.config(fg=PREVIEW_COLOR if controller.previewing else 'black')
+        if controller.busy != self._computing:
+            self._set_computing(controller.busy)
+        self._update_history_display()
         
-        try:
-            result = self.parser.parse(self.current_expression)
-            result_str = f"{result:.10g}"  # Remove trailing zeros
-            
-            self.result_var.set(result_str)
-            self.last_result = result_str
-            
-            # Add to history
-            self.history_manager.add_entry(self.current_expression, result)
-            self._update_history_display()
-            
-            # Clear expression for next calculation
-            self.current_expression = ""
-            self.expression_var.set("")
-            self.error_state = False
-            
-        except ZeroDivisionError:
-            self.result_var.set("Error: Division by zero")
-            self.error_state = True
-        except Exception as e:
-            self.result_var.set(f"Error: {str(e)}")
-            self.error_state = True
+        if self._poll_id is not None:
+            self.master.after_cancel(self._poll_id)
+            self._poll_id = None
+        delay = controller.poll_delay()
+        if delay is not None:
+            self._poll_id = self.master.after(max(1, round(delay * 1000)), self._poll)
+    
+    def _poll(self):
+        """Let the controller start previews and collect outcomes."""
+        self._poll_id = None
+        self.controller.poll()
+        self._refresh()
+    
+    def _set_computing(self, computing: bool):
+        """Show or hide the computing state."""
+        self._computing = computing
+        if computing:
+            self.cancel_button.pack(anchor='e', padx=10, pady=(0, 5))
+            self.master.config(cursor='watch')
+        else:
+            self.cancel_button.pack_forget()
+            self.master.config(cursor='')
     
     def _update_history_display(self):
-        """Update the history listbox."""
+        """Update the history listbox if the visible entries changed."""
+        if self.history_panel.sync():
+            self._render_history()
+    
+    def _render_history(self):
+        """Redraw the visible window of history rows (most recent first)."""
         self.history_listbox.delete(0, tk.END)
-        
-        history = self.history_manager.get_history()
-        for entry in reversed(history):  # Show most recent first
-            display_text = f"{entry.format_display()}"
-            self.history_listbox.insert(0, display_text)
+        self.history_listbox.insert(0, *self.history_panel.rows())
+        self.history_scrollbar.set(*self.history_panel.yview())
+    
+    def _scroll_history(self, *args):
+        """Scroll the virtual history panel (scrollbar and mouse wheel)."""
+        self.history_panel.handle_scroll(*args)
+        self._render_history()
+        return 'break'
+    
+    def _on_mouse_wheel(self, event):
+        """Scroll one row per wheel event (delta is ±120 on Windows, ±1..10 on macOS)."""
+        if not event.delta:
+            return 'break'
+        return self._scroll_history('scroll', -1 if event.delta > 0 else 1, 'units')
     
     def _restore_from_history(self, event):
         """Restore an expression from history."""
         selection = self.history_listbox.curselection()
         if selection:
-            index = selection[0]
-            history = self.history_manager.get_history()
-            entry_index = len(history) - 1 - index  # Reverse the index
-            
-            if 0 <= entry_index < len(history):
-                entry = history[entry_index]
-                self.current_expression = entry.expression
-                self.expression_var.set(self.current_expression)
+            entry = self.history_panel.entry_for_row(selection[0])
+            if entry is not None:
+                self.controller.restore(entry.expression)
+                self._refresh()
+    
+    def _open_history_file(self, history_file: Optional[str]):
+        """Load saved history and save changes in the background."""
+        if history_file is None:
+            return
+        try:
+            self.controller.open_history_file(history_file)
+        except (OSError, ValueError) as e:
+            messagebox.showwarning("History", f"Could not load history: {e}")
+        self._update_history_display()
+    
+    def _on_close(self):
+        """Stop the workers, write pending history and close the window."""
+        if self._poll_id is not None:
+            self.master.after_cancel(self._poll_id)
+        self.controller.close()
+        self.master.destroy()
     
     def _clear_history(self):
         """Clear the calculation history."""
-        self.history_manager.clear_history()
-        self.history_listbox.delete(0, tk.END)
+        self.controller.clear_history()
+        self._update_history_display()
         print("History cleared")
 
 
-def run_gui():
-    """Run the calculator GUI."""
+def run_gui(history_file: Optional[str] = None,
+            time_budget: Optional[float] = DEFAULT_TIME_BUDGET):
+    """
+    Run the calculator GUI.
+    
+    Args:
+        history_file: JSON file to load history from and autosave to
+        time_budget: Seconds a calculation may run (None or 0 for no limit)
+    """
     root = tk.Tk()
-    app = CalculatorGUI(root)
+    app = CalculatorGUI(root, history_file=history_file, time_budget=time_budget)
     print("Calculator GUI (Fixed Version) started")
     print("Using Labels instead of Entry widgets for display")
     root.mainloop()
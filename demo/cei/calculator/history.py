@@ -2,9 +2,18 @@
 History management for calculator operations.
 Stores calculation history and provides methods to retrieve and manage it.
 """
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+from bisect import bisect_left
 from datetime import datetime
+from operator import attrgetter
 import json
+import math
+import os
+import sys
+import threading
+from calculator.ringbuffer import RingBuffer, RingView
+from calculator.sorted_index import SortedResultIndex
+from calculator.trigram import MIN_QUERY_LENGTH, TrigramIndex
 
 
 class HistoryEntry:
@@ -50,21 +59,140 @@ class HistoryEntry:
         return f"{self.expression} = {result_str}"
 
 
+STORAGE_LAYOUTS = ('objects', 'columnar')
+
+
+def _write_json_atomic(filepath: str, data: Dict, fsync: bool = False) -> None:
+    """
+    Write JSON to a temporary file and rename it over filepath.
+    
+    Readers see either the old file or the complete new one, never a
+    partially written file.
+    
+    Args:
+        filepath: Destination path
+        data: JSON-serializable data
+        fsync: Flush the temporary file to disk before the rename
+    """
+    temp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class _Timestamps:
+    """Sequence of the timestamps of a history view, for bisect."""
+    
+    __slots__ = ('_view',)
+    
+    def __init__(self, view: RingView):
+        self._view = view
+    
+    def __len__(self) -> int:
+        return len(self._view)
+    
+    def __getitem__(self, index: int) -> datetime:
+        return self._view[index].timestamp
+
+
 class HistoryManager:
     """
     Manages calculation history.
     Stores history in memory with optional persistence to file.
+    
+    Entries live in a fixed-capacity ring buffer, so adding an entry is O(1)
+    even when the oldest one has to be evicted, and history_view() returns a
+    read-only view instead of copying.
+    
+    With storage='columnar', entries are kept as parallel columns (interned
+    expressions, array('d') results and epoch timestamps) and handed out as
+    lightweight CompactEntry views, which uses far less memory per entry.
     """
     
-    def __init__(self, max_entries: int = 100):
+    def __init__(self, max_entries: int = 100, storage: str = 'objects'):
         """
         Initialize history manager.
         
         Args:
             max_entries: Maximum number of entries to keep in history
+            storage: 'objects' (a HistoryEntry per calculation) or 'columnar'
+            
+        Raises:
+            ValueError: If the storage layout is unknown
         """
-        self.max_entries = max_entries
-        self._history: List[HistoryEntry] = []
+        if storage not in STORAGE_LAYOUTS:
+            raise ValueError(
+                f"Invalid storage: {storage}. Valid layouts: {', '.join(STORAGE_LAYOUTS)}"
+            )
+        self.storage = storage
+        if storage == 'columnar':
+            from calculator.columnar import ColumnarRingBuffer, CompactEntry
+            self._storage_class = ColumnarRingBuffer
+            self._new_entry = CompactEntry.now
+            # Compare epoch floats so ordering checks never build datetimes
+            self._time_key = attrgetter('epoch')
+        else:
+            self._storage_class = RingBuffer
+            self._new_entry = HistoryEntry
+            self._time_key = attrgetter('timestamp')
+        self._history = self._storage_class(max_entries)
+        # Append-only journal that add_entry writes through to, if open
+        self._journal = None
+        # Trigram index for search(); built on first use, then kept up to date
+        self._search_index: Optional[TrigramIndex] = None
+        # Sorted result index for query(); built on first use, then kept up to date
+        self._result_index: Optional[SortedResultIndex] = None
+        # Sequence number of the newest entry timestamped before its predecessor
+        # (None until checked, after a lazy load)
+        self._disorder_seq: Optional[int] = -1
+        # Background writer notified of every change, if autosave is enabled
+        self._autosave = None
+        # Bumped whenever the storage is replaced, which renumbers entries
+        self._generation = 0
+        # Held briefly by mutations, lookups and snapshot(), so other threads
+        # can read consistent entries while this one keeps adding
+        self._lock = threading.RLock()
+    
+    @property
+    def max_entries(self) -> int:
+        """Maximum number of entries kept in history."""
+        return self._history.capacity
+    
+    @max_entries.setter
+    def max_entries(self, value: int) -> None:
+        # Shrinking drops the oldest entries, as the next add_entry used to
+        with self._lock:
+            self._history.resize(value)
+            self._drop_indexes()
+            if self._journal is not None:
+                self._journal.max_entries = value
+        if self._autosave is not None:
+            self._autosave.notify()
+    
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest entry (entries are numbered as added)."""
+        return self._history.first_seq
+    
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next added entry will get."""
+        return self._history.next_seq
+    
+    @property
+    def generation(self) -> int:
+        """Changes whenever loading replaces the entries and their numbering."""
+        return self._generation
     
     def add_entry(self, expression: str, result: float) -> None:
         """
@@ -74,12 +202,40 @@ class HistoryManager:
             expression: The mathematical expression
             result: The calculated result
         """
-        entry = HistoryEntry(expression, result)
-        self._history.append(entry)
-        
-        # Maintain max entries limit
-        if len(self._history) > self.max_entries:
-            self._history = self._history[-self.max_entries:]
+        entry = self._new_entry(expression, result)
+        journal = self._journal
+        with self._lock:
+            if journal is not None and journal.shared:
+                # Merge what other processes wrote, so memory matches file order
+                self._merge(journal.append(entry))
+                self._append_locked(entry)
+            else:
+                self._append_locked(entry)
+                # Under the lock, so concurrent writers journal in memory order
+                if journal is not None:
+                    journal.append(entry)
+        if self._autosave is not None:
+            self._autosave.notify()
+    
+    def _append_locked(self, entry) -> None:
+        """Append an entry and keep the indexes up to date (lock held)."""
+        history = self._history
+        if (self._disorder_seq is not None and history and
+                self._time_key(entry) < self._time_key(history[-1])):
+            self._disorder_seq = history.next_seq
+        # The ring buffer evicts the oldest entry once max_entries is reached
+        evicted = history.append(entry)
+        seq = history.next_seq - 1
+        if self._search_index is not None:
+            if evicted is not None:
+                self._search_index.remove_oldest(history.first_seq - 1,
+                                                 self._search_text(evicted))
+            self._search_index.add(seq, self._search_text(entry))
+        if self._result_index is not None:
+            if evicted is not None and not math.isnan(evicted.result):
+                self._result_index.remove_oldest(evicted.result, history.first_seq - 1)
+            if not math.isnan(entry.result):
+                self._result_index.add(entry.result, seq)
     
     def get_history(self, limit: Optional[int] = None) -> List[HistoryEntry]:
         """
@@ -91,11 +247,8 @@ class HistoryManager:
         Returns:
             List of history entries, most recent last
         """
-        if limit is None:
-            return self._history.copy()
-        
-        # Return the last 'limit' entries
-        return self._history[-limit:] if limit > 0 else []
+        with self._lock:
+            return list(self.history_view(limit))
     
     def get_recent(self, count: int = 10) -> List[HistoryEntry]:
         """
@@ -109,9 +262,39 @@ class HistoryManager:
         """
         return self.get_history(limit=count)
     
+    def history_view(self, limit: Optional[int] = None) -> RingView:
+        """
+        Return a read-only view of the history without copying it.
+        
+        The view stays valid across appends until its entries are evicted or
+        the history is cleared; reading an entry after that raises
+        RuntimeError. Use get_history() to keep entries.
+        
+        Args:
+            limit: Maximum number of entries to include (None for all)
+            
+        Returns:
+            View of history entries, most recent last
+        """
+        if limit is None:
+            return self._history.view()
+        
+        # View the last 'limit' entries
+        return self._history.view(-limit) if limit > 0 else self._history.view(0, 0)
+    
     def clear_history(self) -> None:
         """Clear all history entries."""
-        self._history.clear()
+        journal = self._journal
+        with self._lock:
+            if journal is not None and journal.shared:
+                self._merge(journal.append_clear())
+            self._history.clear()
+            self._drop_indexes()
+            # Under the lock, so a concurrent add is journaled after the clear
+            if journal is not None and not journal.shared:
+                journal.append_clear()
+        if self._autosave is not None:
+            self._autosave.notify()
     
     def is_empty(self) -> bool:
         """Check if history is empty."""
@@ -121,22 +304,187 @@ class HistoryManager:
         """Get the number of entries in history."""
         return len(self._history)
     
+    def query(self, result_min: Optional[float] = None, result_max: Optional[float] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: Optional[int] = None) -> List[HistoryEntry]:
+        """
+        Find entries by result range and/or time range.
+        
+        Time ranges are found by binary search over timestamps and result
+        ranges with a sorted result index built on first use; when both are
+        given, the side with fewer entries is walked. The cost is
+        O(log n + k) for k entries in the smaller range. If timestamps are out of order
+        (e.g. after loading a hand-edited file) the history is scanned.
+        
+        Args:
+            result_min: Smallest result to include
+            result_max: Largest result to include
+            since: Earliest timestamp to include
+            until: Timestamps before this are included (exclusive)
+            limit: Return at most this many of the most recent matches
+            
+        Returns:
+            Matching entries, most recent last
+        """
+        with self._lock:
+            if limit is not None and limit <= 0:
+                return []
+            history = self._history
+            has_result_range = result_min is not None or result_max is not None
+            if self._disorder_seq is None:
+                self._check_order()
+        
+            def in_range(entry: HistoryEntry) -> bool:
+                result = entry.result
+                return ((result_min is None or result >= result_min) and
+                        (result_max is None or result <= result_max))
+        
+            if self._disorder_seq > history.first_seq:
+                matches = [
+                    entry for entry in history
+                    if in_range(entry) and
+                       (since is None or entry.timestamp >= since) and
+                       (until is None or entry.timestamp < until)
+                ]
+            else:
+                view = history.view()
+                timestamps = _Timestamps(view)
+                start = 0 if since is None else bisect_left(timestamps, since)
+                stop = len(view) if until is None else bisect_left(timestamps, until, start)
+            
+                if has_result_range and self._result_index is None:
+                    self._build_result_index()
+                if not has_result_range or stop - start <= self._result_index.count(result_min,
+                                                                                   result_max):
+                    # The time window is the smaller set: walk it backwards so a
+                    # limit stops the scan early
+                    matches = []
+                    for entry in reversed(view[start:stop]):
+                        if in_range(entry):
+                            matches.append(entry)
+                            if limit is not None and len(matches) == limit:
+                                break
+                    matches.reverse()
+                    return matches
+            
+                first_seq = history.first_seq + start
+                stop_seq = history.first_seq + stop
+                seqs = sorted(seq for seq in self._result_index.irange(result_min, result_max)
+                              if first_seq <= seq < stop_seq)
+                matches = list(map(history.get_seq, seqs))
+        
+            if limit is not None:
+                matches = matches[-limit:]
+            return matches
+    
+    def _build_result_index(self) -> None:
+        """Index the result of every entry currently in history."""
+        self._result_index = SortedResultIndex.from_sorted(sorted(
+            (entry.result, seq)
+            for seq, entry in enumerate(self._history, self._history.first_seq)
+            if not math.isnan(entry.result)
+        ))
+    
+    def _drop_indexes(self) -> None:
+        """Discard lazily built indexes after a bulk change to history."""
+        self._search_index = None
+        self._result_index = None
+    
+    def _replace_storage(self, history: RingBuffer, check_order: bool = True) -> None:
+        """Swap in new storage and recheck timestamp order (now or on first query)."""
+        with self._lock:
+            self._history = history
+            self._generation += 1
+            self._drop_indexes()
+            self._disorder_seq = None
+        if check_order:
+            self._check_order()
+        if self._autosave is not None:
+            self._autosave.notify()
+    
+    def _check_order(self) -> None:
+        """Find the newest entry timestamped before its predecessor."""
+        self._disorder_seq = -1
+        time_key = self._time_key
+        previous = None
+        for seq, entry in enumerate(self._history, self._history.first_seq):
+            timestamp = time_key(entry)
+            if previous is not None and timestamp < previous:
+                self._disorder_seq = seq
+            previous = timestamp
+    
     def search(self, query: str) -> List[HistoryEntry]:
         """
         Search history for entries containing the query.
         
+        Queries of three or more characters are narrowed with a trigram
+        index before matching; shorter ones scan the whole history.
+        
         Args:
             query: Search string
             
         Returns:
             List of matching history entries
         """
-        query = query.lower()
-        return [
-            entry for entry in self._history
-            if query in entry.expression.lower() or 
-               query in str(entry.result).lower()
-        ]
+        with self._lock:
+            query = query.lower()
+            if len(query) < MIN_QUERY_LENGTH:
+                entries = iter(self._history)
+            else:
+                if self._search_index is None:
+                    self._build_search_index()
+                entries = map(self._history.get_seq, self._search_index.candidates(query))
+                if len(query) == MIN_QUERY_LENGTH:
+                    # A single trigram: every candidate is an exact match
+                    return list(entries)
+            return [
+                entry for entry in entries
+                if query in entry.expression.lower() or 
+                   query in str(entry.result).lower()
+            ]
+    
+    @staticmethod
+    def _search_text(entry: HistoryEntry) -> Tuple[str, str]:
+        """Fields matched by search(), lowercased."""
+        return entry.expression.lower(), str(entry.result).lower()
+    
+    def _build_search_index(self) -> None:
+        """Index every entry currently in history."""
+        index = TrigramIndex()
+        for seq, entry in enumerate(self._history, self._history.first_seq):
+            index.add(seq, self._search_text(entry))
+        self._search_index = index
+    
+    def storage_memory(self) -> int:
+        """
+        Estimate the memory held by the stored entries.
+        
+        Returns:
+            Approximate size in bytes of the storage and the entries in it
+            (each distinct string and datetime counted once)
+        """
+        history = self._history
+        if hasattr(history, 'memory_usage'):
+            return history.memory_usage()
+        seen = set()
+        total = sys.getsizeof(history._items)
+        for entry in history:
+            for part in (entry, entry.__dict__, entry.expression, entry.result, entry.timestamp):
+                if id(part) not in seen:
+                    seen.add(id(part))
+                    total += sys.getsizeof(part)
+        return total
+    
+    def search_index_memory(self) -> int:
+        """
+        Get the memory overhead of the search index.
+        
+        Returns:
+            Approximate size in bytes (0 until the first indexed search)
+        """
+        if self._search_index is None:
+            return 0
+        return self._search_index.memory_usage()
     
     def get_by_index(self, index: int) -> Optional[HistoryEntry]:
         """
@@ -148,29 +496,80 @@ class HistoryManager:
         Returns:
             HistoryEntry or None if index out of range
         """
-        try:
-            return self._history[index]
-        except IndexError:
-            return None
+        with self._lock:
+            try:
+                return self._history[index]
+            except IndexError:
+                return None
+    
+    def get_by_seq(self, seq: int) -> Optional[HistoryEntry]:
+        """
+        Get history entry by sequence number.
+        
+        Args:
+            seq: Sequence number (see first_seq and next_seq)
+            
+        Returns:
+            HistoryEntry or None if it was evicted or does not exist yet
+        """
+        with self._lock:
+            try:
+                return self._history.get_seq(seq)
+            except IndexError:
+                return None
     
     def save_to_file(self, filepath: str) -> None:
         """
         Save history to JSON file.
         
+        The file is written under a temporary name and renamed into place,
+        so an interrupted save never leaves a truncated file behind.
+        
         Args:
             filepath: Path to save file
         """
+        self.write_snapshot(filepath, *self.snapshot())
+    
+    def snapshot(self) -> Tuple[int, List[HistoryEntry]]:
+        """
+        Copy the current entries, safe to call from another thread.
+        
+        Writers are only held up while the storage is copied; the entries
+        are built from the copy after the lock is released.
+        
+        Returns:
+            Tuple of (max_entries, entries oldest first)
+        """
+        with self._lock:
+            history = self._history.copy()
+        return history.capacity, history.to_list()
+    
+    @staticmethod
+    def write_snapshot(filepath: str, max_entries: int, entries: List[HistoryEntry],
+                       fsync: bool = False) -> None:
+        """
+        Write a snapshot in the save_to_file format, atomically.
+        
+        Args:
+            filepath: Path to save file
+            max_entries: Capacity to record
+            entries: Entries to write, oldest first
+            fsync: Flush to disk before replacing the old file
+        """
         data = {
-            'max_entries': self.max_entries,
-            'history': [entry.to_dict() for entry in self._history]
+            'max_entries': max_entries,
+            'history': [entry.to_dict() for entry in entries]
         }
-        
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        _write_json_atomic(filepath, data, fsync=fsync)
     
     def load_from_file(self, filepath: str) -> None:
         """
-        Load history from JSON file.
+        Load history from a JSON file (or the tail of a .jsonl journal).
+        
+        The file is streamed and only the newest max_entries records are
+        kept. With the default object storage, each HistoryEntry and its
+        timestamp are only built when the entry is first read, so loading
+        costs in proportion to what is kept rather than to the file size.
         
         Args:
             filepath: Path to load file
@@ -178,15 +577,132 @@ class HistoryManager:
         Raises:
             FileNotFoundError: If file doesn't exist
             json.JSONDecodeError: If file is not valid JSON
+            ValueError: If a kept record is corrupt or lacks a field
+        """
+        from calculator.lazyload import LazyRingBuffer, read_json_history, read_jsonl_tail
+        
+        if filepath.endswith('.jsonl'):
+            max_entries = self.max_entries
+            records = read_jsonl_tail(filepath, max_entries)
+        else:
+            # Rebuild storage at the saved capacity, keeping the newest entries
+            max_entries, records = read_json_history(filepath, self.max_entries)
+        
+        if self.storage == 'objects':
+            history = LazyRingBuffer(max_entries)
+            history.extend(records)
+            self._replace_storage(history, check_order=False)
+        else:
+            history = self._storage_class(max_entries)
+            history.extend(map(HistoryEntry.from_dict, records))
+            self._replace_storage(history)
+    
+    def open_journal(self, filepath: str, fsync: str = 'never', shared: bool = False,
+                     **options):
+        """
+        Load history from an append-only journal and keep it up to date.
+        
+        Every later add_entry and clear_history appends one record to the
+        journal, so each save is O(1) instead of rewriting the whole file.
+        
+        With shared=True several processes can use the same journal: each
+        write takes an fcntl lock and first merges the records other
+        processes appended, so no entry is lost and every process sees the
+        same order. Call refresh() to pick up their entries without writing.
+        
+        Args:
+            filepath: Journal file (created if missing)
+            fsync: 'never', 'interval' or 'always'
+            shared: Coordinate with other processes using the same file
+            **options: Further HistoryJournal options (fsync_interval,
+                compact_ratio, min_compact_records, and background when
+                not shared)
+            
+        Returns:
+            The open HistoryJournal
+            
+        Raises:
+            ValueError: If the journal is corrupt or the policy is unknown
+        """
+        from calculator.journal import HistoryJournal, SharedHistoryJournal
+        
+        self.close_journal()
+        journal_class = SharedHistoryJournal if shared else HistoryJournal
+        journal = journal_class(filepath, max_entries=self.max_entries, fsync=fsync, **options)
+        history = self._storage_class(self.max_entries)
+        history.extend(journal.load())
+        self._replace_storage(history)
+        self._journal = journal
+        return journal
+    
+    def close_journal(self) -> None:
+        """Sync and close the journal, if one is open."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+    
+    def refresh(self) -> int:
         """
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        Pick up entries other processes wrote to a shared journal.
         
-        self.max_entries = data.get('max_entries', self.max_entries)
-        self._history = [
-            HistoryEntry.from_dict(entry_data) 
-            for entry_data in data.get('history', [])
-        ]
+        Returns:
+            Number of records merged (0 without a shared journal)
+        """
+        journal = self._journal
+        if journal is None or not journal.shared:
+            return 0
+        with self._lock:
+            reset, changes = journal.refresh()
+            self._merge((reset, changes))
+        if changes and self._autosave is not None:
+            self._autosave.notify()
+        return len(changes)
+    
+    def _merge(self, merged) -> None:
+        """Apply (reset, changes) read from a shared journal (lock held)."""
+        reset, changes = merged
+        if reset:
+            history = self._storage_class(self.max_entries)
+            history.extend(changes)
+            self._replace_storage(history)
+            return
+        for entry in changes:
+            if entry is None:
+                self._history.clear()
+                self._drop_indexes()
+            else:
+                self._append_locked(entry)
+    
+    def enable_autosave(self, filepath: str, interval: float = 1.0, fsync: bool = True):
+        """
+        Save history in the background whenever it changes.
+        
+        Changes only notify a writer thread, which waits interval seconds so
+        a burst of changes becomes one save, then writes a snapshot to a
+        temporary file and renames it over filepath.
+        
+        Args:
+            filepath: JSON file to keep up to date
+            interval: Debounce interval in seconds
+            fsync: Flush each save to disk before the rename
+            
+        Returns:
+            The running AutoSaver
+            
+        Raises:
+            ValueError: If interval is negative
+        """
+        from calculator.autosave import AutoSaver
+        
+        self.disable_autosave()
+        self._autosave = AutoSaver(self, filepath, interval=interval, fsync=fsync)
+        return self._autosave
+    
+    def disable_autosave(self) -> None:
+        """Write any pending changes and stop autosaving, if enabled."""
+        if self._autosave is not None:
+            autosave, self._autosave = self._autosave, None
+            autosave.close()
     
     def format_history_display(self, limit: Optional[int] = None) -> str:
         """
@@ -0,0 +1,263 @@
+"""
+Memory-mapped binary history files.
+
+Layout (all integers little-endian):
+
+    header    magic, version, record size, entry count, max_entries and the
+              offsets of the three sections below
+    heap      UTF-8 expression strings, back to back
+    records   one fixed-width (result float64, timestamp int64) record per entry
+    offsets   entry count + 1 uint64 heap offsets; expression i is
+              heap[offsets[i]:offsets[i + 1]]
+
+Results are stored as float64 and timestamps as microseconds since
+1970-01-01 in naive local time, so they round-trip exactly through the JSON
+format. The file is opened with mmap and get_by_index(i) reads one record,
+two offsets and one string, so a lookup costs the same however large the
+file is.
+"""
+from typing import Iterable, Iterator, Optional, Sequence
+from array import array
+from datetime import datetime, timedelta
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from calculator.history import HistoryEntry
+
+
+MAGIC = b'CALCHIST'
+VERSION = 1
+
+# magic, version, record size, count, max_entries, heap, records, offsets
+_HEADER = struct.Struct('<8sIIQQQQQ')
+_RECORD = struct.Struct('<dq')
+_OFFSET_PAIR = struct.Struct('<QQ')
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(timestamp: datetime) -> int:
+    """Convert a timestamp to naive local microseconds since 1970."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def write_binary_history(filepath: str, entries: Iterable[HistoryEntry],
+                         max_entries: int) -> int:
+    """
+    Write history entries to a binary history file.
+
+    Args:
+        filepath: Path of the file to create
+        entries: Entries to write, oldest first
+        max_entries: History capacity to record in the header
+
+    Returns:
+        Number of entries written
+    """
+    records = bytearray()
+    offsets = array('Q', [0])
+    pack_record = _RECORD.pack
+
+    with open(filepath, 'wb') as f:
+        f.write(bytes(_HEADER.size))
+        heap_offset = f.tell()
+        heap_size = 0
+        for entry in entries:
+            encoded = entry.expression.encode('utf-8')
+            f.write(encoded)
+            heap_size += len(encoded)
+            offsets.append(heap_size)
+            records += pack_record(entry.result, _to_micros(entry.timestamp))
+
+        records_offset = heap_offset + heap_size
+        f.write(records)
+        offsets_offset = records_offset + len(records)
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        f.write(offsets.tobytes())
+
+        count = len(offsets) - 1
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size, count, max_entries,
+                             heap_offset, records_offset, offsets_offset))
+    return count
+
+
+class BinaryHistory(Sequence):
+    """
+    Read-only, memory-mapped view of a binary history file.
+
+    Entries are decoded on access; nothing is read up front beyond the header.
+    """
+
+    def __init__(self, filepath: str):
+        """
+        Open a binary history file.
+
+        Args:
+            filepath: Path of the file
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If the file is not a valid binary history file
+        """
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{filepath}: not a binary history file")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, record_size, count, max_entries,
+             heap, records, offsets) = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{filepath}: not a binary history file")
+            if version != VERSION or record_size != _RECORD.size:
+                raise ValueError(f"{filepath}: unsupported binary history version {version}")
+            if (records + count * record_size > offsets or
+                    offsets + (count + 1) * 8 > size or heap > records):
+                raise ValueError(f"{filepath}: truncated binary history file")
+        except BaseException:
+            if hasattr(self, '_map'):
+                self._map.close()
+            self._file.close()
+            raise
+        self._count = count
+        self.max_entries = max_entries
+        self._heap = heap
+        self._records = records
+        self._offsets = offsets
+
+    def _entry(self, index: int) -> HistoryEntry:
+        mapped = self._map
+        result, micros = _RECORD.unpack_from(mapped, self._records + index * _RECORD.size)
+        start, end = _OFFSET_PAIR.unpack_from(mapped, self._offsets + index * 8)
+        expression = mapped[self._heap + start:self._heap + end].decode('utf-8')
+        return HistoryEntry(expression, result, _EPOCH + micros * _MICROSECOND)
+
+    def get_by_index(self, index: int) -> Optional[HistoryEntry]:
+        """
+        Get history entry by index.
+
+        Args:
+            index: Index in history (negative indices supported)
+
+        Returns:
+            HistoryEntry or None if index out of range
+        """
+        try:
+            return self[index]
+        except IndexError:
+            return None
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("BinaryHistory index out of range")
+        return self._entry(index)
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        for index in range(self._count):
+            yield self._entry(index)
+
+    def __repr__(self):
+        return f"BinaryHistory({self.filepath!r}, entries={self._count})"
+
+
+def json_to_binary(json_path: str, binary_path: str) -> int:
+    """
+    Convert a save_to_file JSON history to the binary format.
+
+    Only the newest max_entries records are converted, as load_from_file
+    would keep.
+
+    Args:
+        json_path: Source JSON file
+        binary_path: Binary file to create
+
+    Returns:
+        Number of entries written
+
+    Raises:
+        FileNotFoundError: If the JSON file doesn't exist
+        json.JSONDecodeError: If it is not valid JSON
+    """
+    from calculator.lazyload import read_json_history
+
+    # Same default capacity as HistoryManager
+    max_entries, records = read_json_history(json_path, 100)
+    return write_binary_history(binary_path, map(HistoryEntry.from_dict, records), max_entries)
+
+
+def binary_to_json(binary_path: str, json_path: str) -> int:
+    """
+    Convert a binary history file to the save_to_file JSON format.
+
+    The output is written entry by entry in the same layout as save_to_file
+    (results come back as floats).
+
+    Args:
+        binary_path: Source binary file
+        json_path: JSON file to create
+
+    Returns:
+        Number of entries written
+
+    Raises:
+        ValueError: If the binary file is invalid
+    """
+    with BinaryHistory(binary_path) as history, open(json_path, 'w') as f:
+        f.write('{\n  "max_entries": %s,\n  "history": [' % json.dumps(history.max_entries))
+        separator = '\n'
+        for entry in history:
+            record = json.dumps(entry.to_dict(), indent=2)
+            f.write(separator + '    ' + record.replace('\n', '\n    '))
+            separator = ',\n'
+        f.write('\n  ]\n}' if len(history) else ']\n}')
+        return len(history)
+
+
+def main(argv=None) -> None:
+    """Command-line entry point: python -m calculator.history_binary INPUT OUTPUT"""
+    parser = argparse.ArgumentParser(
+        description="Convert history between the JSON and binary formats"
+    )
+    parser.add_argument("input", help="JSON or binary history file")
+    parser.add_argument("output", help="File to write in the other format")
+    args = parser.parse_args(argv)
+
+    with open(args.input, 'rb') as f:
+        is_binary = f.read(len(MAGIC)) == MAGIC
+    if is_binary:
+        count = binary_to_json(args.input, args.output)
+        print(f"Wrote {count} entries as JSON to {args.output}")
+    else:
+        count = json_to_binary(args.input, args.output)
+        print(f"Wrote {count} entries as binary history to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Tk-free view models for the GUI history panel.
+
+Rather than deleting every Listbox row and reinserting the history after each
+calculation, the panel models remember which entries (by sequence number) are
+on screen and report only the rows to delete and insert. A row maps back to
+its entry by arithmetic, so restoring a clicked entry is O(1).
+
+VirtualHistoryPanel covers the whole history but renders only the rows that
+fit in the widget, so refreshing and scrolling cost the same for 20 entries
+or 100k+.
+"""
+from typing import List, Optional, Tuple
+from calculator.history import HistoryEntry
+
+
+class HistoryPanel:
+    """Incrementally updated list of the most recent entries, newest first."""
+
+    def __init__(self, manager, limit: Optional[int] = 20):
+        """
+        Initialize an empty panel.
+
+        Args:
+            manager: HistoryManager to display
+            limit: Number of most recent entries shown (None for all)
+        """
+        self.manager = manager
+        self.limit = limit
+        self._generation: Optional[int] = None
+        # Shown entries are sequence numbers [_first, _next), newest in row 0
+        self._first = 0
+        self._next = 0
+
+    def __len__(self) -> int:
+        return self._next - self._first
+
+    def sync(self) -> List[Tuple]:
+        """
+        Bring the panel up to date with the history.
+
+        Returns:
+            Widget operations to apply in order: ('delete', first_row,
+            last_row) with an inclusive row range, and ('insert', row, texts)
+        """
+        manager = self.manager
+        generation = manager.generation
+        first = manager.first_seq
+        next_seq = manager.next_seq
+        if self.limit is not None:
+            first = max(first, next_seq - self.limit)
+
+        operations: List[Tuple] = []
+        shown = len(self)
+        if generation != self._generation or first >= self._next:
+            # Nothing on screen survives (cleared, reloaded or all evicted)
+            if shown:
+                operations.append(('delete', 0, shown - 1))
+            self._next = first
+        elif first > self._first:
+            # The oldest entries were evicted from the bottom
+            operations.append(('delete', shown - (first - self._first), shown - 1))
+
+        if next_seq > self._next:
+            texts = []
+            for seq in range(next_seq - 1, self._next - 1, -1):
+                entry = manager.get_by_seq(seq)
+                texts.append(entry.format_display() if entry is not None else "")
+            operations.append(('insert', 0, texts))
+
+        self._generation = generation
+        self._first = first
+        self._next = next_seq
+        return operations
+
+    def entry_for_row(self, row: int) -> Optional[HistoryEntry]:
+        """
+        Get the entry shown in a row.
+
+        Args:
+            row: Row index, 0 being the newest entry
+
+        Returns:
+            HistoryEntry or None if the row is empty or its entry is gone
+        """
+        if not 0 <= row < len(self):
+            return None
+        return self.manager.get_by_seq(self._next - 1 - row)
+
+
+class VirtualHistoryPanel:
+    """Scrollable window onto the whole history, newest first."""
+
+    def __init__(self, manager, visible_rows: int = 15):
+        """
+        Initialize a panel scrolled to the newest entry.
+
+        Args:
+            manager: HistoryManager to display
+            visible_rows: Number of rows the widget shows
+        """
+        self.manager = manager
+        self.visible_rows = visible_rows
+        # Row shown at the top of the widget (0 is the newest entry)
+        self.top = 0
+        self._state = (manager.generation, manager.first_seq, manager.next_seq)
+
+    @property
+    def total(self) -> int:
+        """Number of rows the scrollbar represents."""
+        return self.manager.size()
+
+    def sync(self) -> bool:
+        """
+        Account for entries added or removed since the last call.
+
+        A panel at the top keeps showing the newest entries; one scrolled
+        down keeps showing the same entries.
+
+        Returns:
+            True if the visible rows need to be redrawn
+        """
+        manager = self.manager
+        state = (manager.generation, manager.first_seq, manager.next_seq)
+        if state == self._state:
+            return False
+        if state[0] != self._state[0]:
+            self.top = 0
+        elif self.top:
+            self.top += state[2] - self._state[2]
+        self._state = state
+        self._clamp()
+        return True
+
+    def _clamp(self) -> None:
+        self.top = max(0, min(self.top, self.total - self.visible_rows))
+
+    def rows(self) -> List[str]:
+        """Display texts of the visible rows, top to bottom."""
+        texts = []
+        for row in range(self.top, min(self.top + self.visible_rows, self.total)):
+            entry = self.manager.get_by_seq(self.manager.next_seq - 1 - row)
+            texts.append(entry.format_display() if entry is not None else "")
+        return texts
+
+    def entry_for_row(self, visible_row: int) -> Optional[HistoryEntry]:
+        """
+        Get the entry shown in a visible row.
+
+        Args:
+            visible_row: Row index within the widget
+
+        Returns:
+            HistoryEntry or None if the row is empty
+        """
+        row = self.top + visible_row
+        if not 0 <= visible_row < self.visible_rows or row >= self.total:
+            return None
+        return self.manager.get_by_seq(self.manager.next_seq - 1 - row)
+
+    def scroll(self, rows: int) -> None:
+        """Scroll by a number of rows (positive is towards older entries)."""
+        self.top += rows
+        self._clamp()
+
+    def scroll_to(self, fraction: float) -> None:
+        """Scroll so the given fraction of the history is above the window."""
+        self.top = int(fraction * self.total)
+        self._clamp()
+
+    def yview(self) -> Tuple[float, float]:
+        """Visible fraction of the history, as a Tk scrollbar expects."""
+        total = self.total
+        if total <= self.visible_rows:
+            return 0.0, 1.0
+        return self.top / total, (self.top + self.visible_rows) / total
+
+    def handle_scroll(self, *args) -> None:
+        """
+        Apply a Tk scrollbar command.
+
+        Args:
+            *args: ('moveto', fraction) or ('scroll', count, 'units'|'pages')
+        """
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]))
+        elif args[0] == 'scroll':
+            count = int(args[1])
+            self.scroll(count * self.visible_rows if args[2] == 'pages' else count)
@@ -0,0 +1,678 @@
+"""
+Incremental re-parsing and re-evaluation of an expression being edited.
+
+ExpressionParser.parse() starts from scratch for every string. While a user
+edits one digit of a long expression almost all of that work repeats, so
+IncrementalParser keeps the previous text, its token list (with character
+spans) and an expression tree whose nodes cache their values:
+
+- Only the tokens touching the edited characters are lexed again.
+- The tree is descended to the innermost parenthesized group or term that
+  contains the edit, and just the affected operands of that chain are parsed
+  again; untouched operands (numbers, whole groups, whole terms) are reused
+  as they are.
+- Each chain stores the running value after every operand, so a changed
+  operand is folded from its position onwards and the change is passed up
+  through its ancestors.
+
+Operands are folded left to right exactly as the postfix program does, so
+results are bit-for-bit those of parse(). That also means a chain of n
+operands is refolded from the edited operand to its end: an edit near the end
+of a chain (the usual case while typing) costs the size of the edit plus the
+depth of the tree, one near the start of a long flat chain costs a float
+operation per later operand, still without lexing or parsing it again.
+
+Text the tree cannot represent (juxtaposed operands such as "2(3)", an
+extra closing parenthesis or invalid characters) is evaluated with the
+regular parser, so errors and results always match parse().
+"""
+from typing import List, Mapping, Optional
+from bisect import bisect_left, bisect_right
+import re
+from calculator.parser import ExpressionParser
+from calculator.program import MAX_VARIABLES, Program, lookup_variable
+from calculator.tokens import (
+    Token, TokenType, OPERATOR_TOKENS, LEFT_PAREN_TOKEN, RIGHT_PAREN_TOKEN
+)
+
+
+# Token spans; only used once ExpressionParser.tokenize() has accepted the text
+_TOKEN_SPANS = re.compile(r'[0-9]+(?:\.[0-9]*)?|[A-Za-z_][A-Za-z0-9_]*|[^ ]')
+
+# Operator tokens are shared instances, so they are looked up by identity
+_ADDITIVE = {OPERATOR_TOKENS[op]: op for op in '+-'}
+_MULTIPLICATIVE = {OPERATOR_TOKENS[op]: op for op in '*/'}
+
+
+class _Reparse(Exception):
+    """The tokens of a region do not form a chain at that level."""
+
+
+class _Leaf:
+    """A number or variable name."""
+
+    __slots__ = ('token', 'value', 'names')
+
+    size = 1
+    missing = 0
+    unclosed = 0
+
+    def __init__(self, token: Token, variables: Optional[Mapping[str, float]]):
+        self.token = token
+        self.names = 0
+        if token.type == TokenType.NUMBER:
+            self.value = token.value
+        else:
+            try:
+                self.value = lookup_variable(variables, token.value)
+            except ValueError:
+                self.value = None
+                self.names = 1
+
+
+class _Group:
+    """A parenthesized chain; the closing parenthesis may still be missing at the end."""
+
+    __slots__ = ('inner', 'closed', 'size', 'value', 'missing', 'names', 'unclosed')
+
+    def __init__(self, inner: '_Chain', closed: bool):
+        self.inner = inner
+        self.closed = closed
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Copy size, value and counts from the inner chain after it changed."""
+        inner = self.inner
+        self.size = inner.size + 1 + self.closed
+        self.value = inner.value
+        self.missing = inner.missing
+        self.names = inner.names
+        self.unclosed = inner.unclosed + (not self.closed)
+
+
+class _Chain:
+    """
+    Operands joined by operators of one precedence level.
+
+    Sums hold terms (numbers, groups or products); products hold factors.
+    A missing operand ("1+", "*2", "()") is stored as None.
+    """
+
+    __slots__ = ('items', 'ops', 'product', 'offsets', 'folds', 'size', 'value',
+                 'missing', 'names', 'unclosed')
+
+    def __init__(self, items: list, ops: List[str], product: bool):
+        self.items = items
+        self.ops = ops
+        self.product = product
+        # Token offset of each operand relative to the start of the chain
+        self.offsets: List[int] = []
+        # Value of the chain up to each operand, as far as it could be folded
+        self.folds: List[float] = []
+        self.missing = self.names = self.unclosed = 0
+        self._count(items, 1)
+        self._reindex(0)
+        self._refold(0)
+
+    def _count(self, items: list, sign: int) -> None:
+        for item in items:
+            if item is None:
+                self.missing += sign
+            else:
+                self.missing += sign * item.missing
+                self.names += sign * item.names
+                self.unclosed += sign * item.unclosed
+
+    def _reindex(self, start: int) -> None:
+        """Recompute operand offsets and the chain size from operand start onwards."""
+        items = self.items
+        offsets = self.offsets
+        del offsets[start:]
+        if start:
+            previous = items[start - 1]
+            position = offsets[-1] + (previous.size if previous is not None else 0) + 1
+        else:
+            position = 0
+        for index in range(start, len(items)):
+            offsets.append(position)
+            item = items[index]
+            position += (item.size if item is not None else 0) + 1
+        self.size = position - 1
+
+    def _refold(self, start: int) -> None:
+        """Fold the operands from index start onwards into the chain value."""
+        folds = self.folds
+        if start > len(folds):
+            # The fold already stops at an earlier operand
+            return
+        del folds[start:]
+        items = self.items
+        ops = self.ops
+        self.value = None
+        if start == 0:
+            first = items[0]
+            if first is None or first.value is None:
+                return
+            folds.append(first.value)
+            start = 1
+        value = folds[-1]
+        for index in range(start, len(items)):
+            item = items[index]
+            if item is None or item.value is None:
+                return
+            operand = item.value
+            op = ops[index - 1]
+            if op == '+':
+                value = value + operand
+            elif op == '-':
+                value = value - operand
+            elif op == '*':
+                value = value * operand
+            else:
+                if operand == 0:
+                    return
+                value = value / operand
+            folds.append(value)
+        self.value = value
+
+    def splice(self, first: int, last: int, items: list, ops: List[str]) -> None:
+        """Replace operands first..last (and the operators between them)."""
+        self._count(self.items[first:last + 1], -1)
+        self._count(items, 1)
+        self.items[first:last + 1] = items
+        self.ops[first:last] = ops
+        self._reindex(first)
+        self._refold(first)
+
+    def child_changed(self, index: int, missing: int, names: int, unclosed: int,
+                      size: int) -> None:
+        """Take in a change to operand index, given its counts and size before the change."""
+        item = self.items[index]
+        self.missing += item.missing - missing
+        self.names += item.names - names
+        self.unclosed += item.unclosed - unclosed
+        if item.size != size:
+            self._reindex(index + 1)
+        self._refold(index)
+
+
+class _RegionParser:
+    """
+    Recursive-descent parser over tokens mixed with reused tree nodes.
+
+    Numbers, names and groups that were not edited are passed in as nodes
+    and taken as factors without looking inside them; unedited products are
+    taken as terms, or extended when an edit multiplies onto them.
+    """
+
+    def __init__(self, elements: list, allow_open: bool,
+                 variables: Optional[Mapping[str, float]]):
+        # None marks the end, so looking ahead needs no bounds check
+        elements.append(None)
+        self.elements = elements
+        self.position = 0
+        # A group may lack its ")" only when the region ends the expression
+        self.allow_open = allow_open
+        self.variables = variables
+
+    def chain(self, product: bool):
+        """Parse the whole region as the operands and operators of one chain."""
+        if product:
+            items = [self._factor()]
+            ops: List[str] = []
+            self._extend_product(items, ops)
+        else:
+            items, ops = self._terms()
+        if self.position != len(self.elements) - 1:
+            # Juxtaposed operands, an extra ")" or (in a product) a + or -
+            raise _Reparse()
+        return items, ops
+
+    def _terms(self):
+        elements = self.elements
+        items = [self._term()]
+        ops = []
+        op = _ADDITIVE.get(elements[self.position])
+        while op is not None:
+            self.position += 1
+            ops.append(op)
+            items.append(self._term())
+            op = _ADDITIVE.get(elements[self.position])
+        return items, ops
+
+    def _term(self):
+        element = self.elements[self.position]
+        if element.__class__ is _Chain:
+            self.position += 1
+            if self.elements[self.position] not in _MULTIPLICATIVE:
+                return element
+            items, ops = list(element.items), list(element.ops)
+        else:
+            factor = self._factor()
+            if self.elements[self.position] not in _MULTIPLICATIVE:
+                return factor
+            items, ops = [factor], []
+        self._extend_product(items, ops)
+        return _Chain(items, ops, True)
+
+    def _extend_product(self, items: list, ops: List[str]) -> None:
+        elements = self.elements
+        op = _MULTIPLICATIVE.get(elements[self.position])
+        while op is not None:
+            self.position += 1
+            ops.append(op)
+            element = elements[self.position]
+            if element.__class__ is _Chain:
+                # An unedited product multiplied onto from the left
+                self.position += 1
+                items.extend(element.items)
+                ops.extend(element.ops)
+            else:
+                items.append(self._factor())
+            op = _MULTIPLICATIVE.get(elements[self.position])
+
+    def _factor(self):
+        element = self.elements[self.position]
+        if element.__class__ is not Token:
+            if element is not None:
+                # A reused number, name or group
+                self.position += 1
+            return element
+        if element.type is TokenType.NUMBER or element.type is TokenType.IDENTIFIER:
+            self.position += 1
+            return _Leaf(element, self.variables)
+        if element is LEFT_PAREN_TOKEN:
+            self.position += 1
+            items, ops = self._terms()
+            closing = self.elements[self.position]
+            if closing is RIGHT_PAREN_TOKEN:
+                self.position += 1
+                return _Group(_Chain(items, ops, False), True)
+            if closing is None and self.allow_open:
+                return _Group(_Chain(items, ops, False), False)
+            raise _Reparse()
+        # An operator or ")" where an operand should be
+        return None
+
+
+class IncrementalParser:
+    """
+    Evaluates successive versions of an expression, reusing the work done
+    for the previous version.
+    """
+
+    def __init__(self, parser: Optional[ExpressionParser] = None,
+                 variables: Optional[Mapping[str, float]] = None):
+        """
+        Initialize an incremental parser with empty text.
+
+        Args:
+            parser: Parser for lexing and for text the tree cannot represent
+            variables: Values for names used in the expression
+        """
+        self.parser = parser or ExpressionParser()
+        self.variables = variables
+        self.text = ""
+        # Tokens of the text with their character spans; None after a lexing error
+        self._tokens: Optional[List[Token]] = []
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        # Operator tokens in the text (all operators are single characters)
+        self._operators = 0
+        # Expression tree, or None when the tokens do not form one
+        self._root: Optional[_Chain] = None
+        # Characters lexed and tree elements parsed by the last edit
+        self.relexed = 0
+        self.reparsed = 0
+        # Edits that had to lex and parse the whole text
+        self.full_parses = 0
+
+    def update(self, text: str) -> None:
+        """
+        Replace the text, working out which part of it changed.
+
+        Args:
+            text: New text of the expression
+        """
+        old = self.text
+        if text == old:
+            return
+        start = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - start)
+        self.edit(start, len(old) - suffix, text[start:len(text) - suffix])
+
+    def edit(self, start: int, end: int, replacement: str) -> None:
+        """
+        Replace the characters between start and end of the text.
+
+        Args:
+            start: Index of the first replaced character
+            end: Index after the last replaced character
+            replacement: Text to put in their place
+
+        Raises:
+            ValueError: If start and end are not a range of the text
+        """
+        old = self.text
+        if not 0 <= start <= end <= len(old):
+            raise ValueError(f"Invalid edit range {start}:{end} for text of length {len(old)}")
+        text = old[:start] + replacement + old[end:]
+        self.text = text
+        self.relexed = self.reparsed = 0
+        tokens = self._tokens
+        if tokens is None or (self._root is None and not tokens):
+            self._rebuild()
+            return
+
+        # Tokens touching the edit are lexed again; the characters on either
+        # side of that window are spaces, so no other token can change
+        starts, ends = self._starts, self._ends
+        first = bisect_left(ends, start)
+        last = bisect_right(starts, end)
+        window_start = min(start, starts[first]) if first < last else start
+        window_end = max(end, ends[last - 1]) if first < last else end
+        delta = len(replacement) - (end - start)
+        new_tokens, new_starts, new_ends = self._lex(text, window_start, window_end + delta)
+        if new_tokens is None:
+            return
+        self._operators += (_count_operators(text, window_start, window_end + delta)
+                            - _count_operators(old, window_start, window_end))
+
+        starts[first:last] = new_starts
+        ends[first:last] = new_ends
+        following = first + len(new_tokens)
+        if delta and following < len(starts):
+            starts[following:] = [position + delta for position in starts[following:]]
+            ends[following:] = [position + delta for position in ends[following:]]
+
+        # Tokens that came out the same need no change in the tree
+        head = 0
+        while (head < len(new_tokens) and first < last
+               and _same_token(tokens[first], new_tokens[head])):
+            first += 1
+            head += 1
+        tail = len(new_tokens)
+        while tail > head and first < last and _same_token(tokens[last - 1], new_tokens[tail - 1]):
+            last -= 1
+            tail -= 1
+        new_tokens = new_tokens[head:tail]
+        tokens[first:last] = new_tokens
+
+        if first == last and not new_tokens:
+            # Only spaces changed
+            return
+        if not tokens:
+            self._root = None
+            return
+        try:
+            if self._root is None:
+                self._root = self._parse_elements(list(tokens), False, True)
+            elif not self._edit_chain(self._root, 0, first, last, len(new_tokens)):
+                # Not absorbed by any chain: parse the top level again
+                root = self._root
+                self._root = self._reparse(root, 0, first, last, len(new_tokens),
+                                           0, len(root.items) - 1, whole=True)
+        except (_Reparse, RecursionError):
+            self._root = None
+
+    def evaluate(self) -> float:
+        """
+        Evaluate the current text.
+
+        Returns:
+            Result of the expression, the same as ExpressionParser.parse()
+
+        Raises:
+            ValueError: If the expression is invalid
+            ZeroDivisionError: If division by zero occurs
+        """
+        root = self._root
+        if root is None or (self.variables is not None and len(self.variables) > MAX_VARIABLES):
+            # Only then can the text use more names than a program allows
+            return self._evaluate_tokens()
+        if root.unclosed:
+            raise ValueError("Mismatched parentheses: unclosed opening parenthesis")
+        if root.missing:
+            # Fewer operands than operators always underflows the postfix stack
+            if self._operators:
+                raise ValueError("Invalid expression: not enough operands")
+            raise ValueError("Invalid expression: too many operands")
+        if root.names:
+            if self._too_many_names():
+                return self._evaluate_tokens()
+            raise ValueError(f"Undefined variable: {_first_undefined(root)}")
+        if root.value is None:
+            raise ZeroDivisionError("Division by zero")
+        return root.value
+
+    def parse(self, text: str) -> float:
+        """
+        Update the text and evaluate it.
+
+        Args:
+            text: New text of the expression
+
+        Returns:
+            Result of the expression
+
+        Raises:
+            ValueError: If the expression is invalid
+            ZeroDivisionError: If division by zero occurs
+        """
+        self.update(text)
+        return self.evaluate()
+
+    def _evaluate_tokens(self) -> float:
+        """Evaluate text the tree cannot represent with the regular parser."""
+        if self._tokens is None:
+            return self.parser.parse(self.text, self.variables)
+        if not self._tokens:
+            raise ValueError("Empty expression")
+        program = Program.from_postfix(self.parser.infix_to_postfix(self._tokens))
+        return program.evaluate(self.variables)
+
+    def _rebuild(self) -> None:
+        """Lex and parse the whole text."""
+        self.full_parses += 1
+        self._tokens = []
+        self._starts, self._ends = [], []
+        self._operators = 0
+        self._root = None
+        tokens, starts, ends = self._lex(self.text, 0, len(self.text))
+        if tokens is None:
+            return
+        self._tokens, self._starts, self._ends = tokens, starts, ends
+        self._operators = _count_operators(self.text, 0, len(self.text))
+        if tokens:
+            try:
+                self._root = self._parse_elements(list(tokens), False, True)
+            except (_Reparse, RecursionError):
+                pass
+
+    def _lex(self, text: str, start: int, end: int):
+        """Tokenize text[start:end]; returns (None, None, None) after a lexing error."""
+        window = text[start:end]
+        self.relexed += len(window)
+        try:
+            tokens = self.parser.tokenize(window)
+        except ValueError:
+            # The error (and its position) comes from parse() on the whole text
+            self._tokens = None
+            self._root = None
+            return None, None, None
+        matches = list(_TOKEN_SPANS.finditer(window))
+        starts = [match.start() + start for match in matches]
+        ends = [match.end() + start for match in matches]
+        return tokens, starts, ends
+
+    def _too_many_names(self) -> bool:
+        names = {token.value for token in self._tokens if token.type is TokenType.IDENTIFIER}
+        return len(names) > MAX_VARIABLES
+
+    def _parse_elements(self, elements: list, product: bool, allow_open: bool):
+        """Parse elements into a chain (or the operands and operators of one)."""
+        self.reparsed += len(elements)
+        items, ops = _RegionParser(elements, allow_open, self.variables).chain(product)
+        return _Chain(items, ops, product)
+
+    def _edit_chain(self, chain: _Chain, base: int, first: int, last: int, count: int) -> bool:
+        """
+        Apply an edit to a chain, in its innermost operand that can take it.
+
+        Args:
+            chain: Chain containing the edit
+            base: Index of the chain's first token in the token list
+            first: Index of the first replaced token (in the old token list)
+            last: Index after the last replaced token (in the old token list)
+            count: Number of tokens that replaced them
+
+        Returns:
+            False if the edit does not fit in this chain and its parent has
+            to parse the region around it again
+        """
+        lo, hi = first - base, last - base
+        offsets = chain.offsets
+        index = bisect_right(offsets, lo) - 1
+        item = chain.items[index]
+        offset = offsets[index]
+        if item is not None and hi <= offset + item.size:
+            before = (item.missing, item.names, item.unclosed, item.size)
+            if isinstance(item, _Chain) and lo >= offset:
+                if self._edit_chain(item, base + offset, first, last, count):
+                    chain.child_changed(index, *before)
+                    return True
+            elif isinstance(item, _Group) and lo > offset and hi <= offset + 1 + item.inner.size:
+                if self._edit_chain(item.inner, base + offset + 1, first, last, count):
+                    item.refresh()
+                    chain.child_changed(index, *before)
+                    return True
+
+        # Parse the operands around the edit again
+        last_index = index
+        if hi > lo:
+            last_index = bisect_right(offsets, hi - 1) - 1
+            end_item = chain.items[last_index]
+            if hi - 1 >= offsets[last_index] + (end_item.size if end_item is not None else 0):
+                # The operator after that operand was replaced too
+                last_index += 1
+        try:
+            items, ops = self._reparse(chain, base, first, last, count, index, last_index)
+        except _Reparse:
+            return False
+        chain.splice(index, last_index, items, ops)
+        return True
+
+    def _reparse(self, chain: _Chain, base: int, first: int, last: int, count: int,
+                 first_index: int, last_index: int, whole: bool = False):
+        """Parse operands first_index..last_index of a chain with the edit applied."""
+        lo, hi = first - base, last - base
+        new_tokens = self._tokens[first:first + count]
+        offsets = chain.offsets
+        elements: list = []
+        pending = [new_tokens]
+
+        def keep(position: int, element) -> None:
+            if pending and position >= lo:
+                elements.extend(pending.pop())
+            elements.append(element)
+
+        def flatten(node, start: int) -> None:
+            if node is None:
+                return
+            end = start + node.size
+            if (end <= lo or start >= hi) and _delimited(node):
+                # Untouched by the edit: reuse the node
+                keep(start, node)
+            elif isinstance(node, _Group):
+                if not lo <= start < hi:
+                    keep(start, LEFT_PAREN_TOKEN)
+                flatten_chain(node.inner, start + 1)
+                if node.closed and not lo <= end - 1 < hi:
+                    keep(end - 1, RIGHT_PAREN_TOKEN)
+            elif isinstance(node, _Chain):
+                flatten_chain(node, start)
+            # An edited number or name is replaced by the new tokens
+
+        def flatten_chain(node: _Chain, start: int, first_index: int = 0,
+                          last_index: Optional[int] = None) -> None:
+            if last_index is None:
+                last_index = len(node.items) - 1
+            for position in range(first_index, last_index + 1):
+                offset = start + node.offsets[position]
+                if position > first_index and not lo <= offset - 1 < hi:
+                    keep(offset - 1, OPERATOR_TOKENS[node.ops[position - 1]])
+                flatten(node.items[position], offset)
+
+        flatten_chain(chain, 0, first_index, last_index)
+        if pending:
+            elements.extend(pending.pop())
+
+        end_item = chain.items[last_index]
+        region_end = offsets[last_index] + (end_item.size if end_item is not None else 0)
+        allow_open = base + region_end + count - (hi - lo) == len(self._tokens)
+        if whole:
+            return self._parse_elements(elements, chain.product, allow_open)
+        self.reparsed += len(elements)
+        return _RegionParser(elements, allow_open, self.variables).chain(chain.product)
+
+
+def _count_operators(text: str, start: int, end: int) -> int:
+    return sum(text.count(op, start, end) for op in '+-*/')
+
+
+def _same_token(a: Token, b: Token) -> bool:
+    return a.type == b.type and a.value == b.value
+
+
+def _delimited(node) -> bool:
+    """
+    False for nodes that join up with the tokens next to them: a product
+    starting or ending with a missing operand ("/2", "2*") or a group whose
+    ")" has not been typed yet.
+    """
+    if isinstance(node, _Group):
+        return node.closed
+    return not isinstance(node, _Chain) or (node.items[0] is not None
+                                            and node.items[-1] is not None)
+
+
+def _first_undefined(node) -> str:
+    """Name of the first undefined variable in the tree, in text order."""
+    while not isinstance(node, _Leaf):
+        if isinstance(node, _Group):
+            node = node.inner
+        else:
+            node = next(item for item in node.items if item is not None and item.names)
+    return node.token.value
+
+
+def _common_prefix(a: str, b: str) -> int:
+    """Length of the common prefix, comparing slices rather than characters."""
+    n = min(len(a), len(b))
+    if a[:n] == b[:n]:
+        return n
+    lo, hi = 0, n
+    while hi - lo > 1:
+        middle = (lo + hi) // 2
+        if a[lo:middle] == b[lo:middle]:
+            lo = middle
+        else:
+            hi = middle
+    return lo
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix, at most limit characters."""
+    if limit <= 0:
+        return 0
+    la, lb = len(a), len(b)
+    if a[la - limit:] == b[lb - limit:]:
+        return limit
+    lo, hi = 0, limit
+    while hi - lo > 1:
+        middle = (lo + hi) // 2
+        if a[la - middle:la - lo] == b[lb - middle:lb - lo]:
+            lo = middle
+        else:
+            hi = middle
+    return lo
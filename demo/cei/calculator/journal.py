@@ -0,0 +1,527 @@
+"""
+Append-only journal persistence for calculation history.
+
+Each calculation is appended to the journal as one JSON line, so saving costs
+O(1) no matter how long the history is. A clear is journaled as a marker
+record. Records that can no longer be loaded (evicted by max_entries or
+cleared) are dead weight; once they outnumber the live ones, the journal is
+rewritten in a background thread. Appends made during that rewrite are
+copied into the new file before it atomically replaces the old one.
+
+A crash while appending can leave a partial last line. Loading ignores that
+torn record and truncates it away; damage anywhere else is reported.
+"""
+from typing import List, Optional
+import contextlib
+import json
+import os
+import threading
+import time
+from calculator.history import HistoryEntry
+
+
+FSYNC_POLICIES = ('never', 'interval', 'always')
+
+# Compact once dead records exceed this fraction of the journal...
+DEFAULT_COMPACT_RATIO = 0.5
+# ...and the journal has at least this many records
+DEFAULT_MIN_COMPACT_RECORDS = 1000
+
+_CLEAR_RECORD = b'{"clear": true}\n'
+
+
+def _encode(entry: HistoryEntry) -> bytes:
+    return (json.dumps(entry.to_dict()) + "\n").encode('utf-8')
+
+
+def _read_records(path: str, max_entries: int, end: Optional[int] = None):
+    """
+    Replay a journal.
+
+    Args:
+        path: Journal file
+        max_entries: Number of most recent entries that are live
+        end: Stop reading at this byte offset (whole file when None)
+
+    Returns:
+        Tuple of (live entries, record count, adds since the last clear,
+        offset just past the last valid record)
+
+    Raises:
+        ValueError: If a record other than the last one is corrupt
+    """
+    with open(path, 'rb') as f:
+        data = f.read() if end is None else f.read(end)
+
+    entries: List[HistoryEntry] = []
+    records = 0
+    adds = 0
+    offset = 0
+    lines = data.split(b'\n')
+    # Anything after the final newline is a record whose write never finished
+    complete, tail = lines[:-1], lines[-1]
+
+    for number, line in enumerate(complete, 1):
+        try:
+            record = json.loads(line)
+            if record.get('clear'):
+                entry = None
+            else:
+                entry = HistoryEntry.from_dict(record)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            if number == len(complete) and not tail:
+                break  # Torn last record that happened to end in a newline
+            raise ValueError(f"{path}: corrupt journal record at line {number}") from None
+
+        records += 1
+        offset += len(line) + 1
+        if entry is None:
+            entries.clear()
+            adds = 0
+        else:
+            entries.append(entry)
+            adds += 1
+            if len(entries) > 2 * max_entries + 64:
+                del entries[:len(entries) - max_entries]
+
+    live = entries[-max_entries:] if max_entries else []
+    return live, records, adds, offset
+
+
+class HistoryJournal:
+    """Append-only JSONL file of history entries."""
+
+    # Whether other processes may append to the same file
+    shared = False
+
+    def __init__(self, path: str, max_entries: int = 100, fsync: str = 'never',
+                 fsync_interval: float = 1.0, compact_ratio: float = DEFAULT_COMPACT_RATIO,
+                 min_compact_records: int = DEFAULT_MIN_COMPACT_RECORDS,
+                 background: bool = True):
+        """
+        Initialize a journal. Call load() before appending.
+
+        Args:
+            path: Journal file (created if missing)
+            max_entries: Number of most recent entries that are live
+            fsync: 'never' (leave it to the OS), 'interval' (at most once per
+                fsync_interval seconds, and at most fsync_interval seconds
+                after a record) or 'always' (after every record)
+            fsync_interval: Seconds between fsyncs for the 'interval' policy
+            compact_ratio: Dead-record fraction that triggers compaction
+            min_compact_records: Journal size below which compaction is skipped
+            background: Compact in a background thread instead of inline
+
+        Raises:
+            ValueError: If the fsync policy is unknown
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy: {fsync}. Valid policies: {', '.join(FSYNC_POLICIES)}"
+            )
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self.min_compact_records = min_compact_records
+        self.background = background
+
+        self.records = 0
+        self._adds_since_clear = 0
+        self._file = None
+        self._last_fsync = 0.0
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._sync_timer: Optional[threading.Timer] = None
+        # Last error raised by a background compaction, if any
+        self.compaction_error: Optional[BaseException] = None
+        # Last error raised by a timed 'interval' fsync, if any
+        self.sync_error: Optional[BaseException] = None
+
+    @property
+    def live(self) -> int:
+        """Number of records that load() would return."""
+        return min(self._adds_since_clear, self.max_entries)
+
+    @property
+    def dead(self) -> int:
+        """Number of records that no longer contribute to the history."""
+        return self.records - self.live
+
+    def load(self) -> List[HistoryEntry]:
+        """
+        Replay the journal and open it for appending.
+
+        A torn last record is dropped and truncated from the file.
+
+        Returns:
+            The live entries, oldest first
+
+        Raises:
+            ValueError: If a record before the last one is corrupt
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                open(self.path, 'ab').close()
+            entries, self.records, self._adds_since_clear, valid_end = \
+                _read_records(self.path, self.max_entries)
+            if os.path.getsize(self.path) != valid_end:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid_end)
+            self._file = open(self.path, 'ab')
+        return entries
+
+    def append(self, entry: HistoryEntry) -> None:
+        """
+        Append one entry.
+
+        Args:
+            entry: Entry to persist
+        """
+        self._write(_encode(entry))
+        self._adds_since_clear += 1
+        self._maybe_compact()
+
+    def append_clear(self) -> None:
+        """Record that the history was cleared."""
+        self._write(_CLEAR_RECORD)
+        self._adds_since_clear = 0
+        self._maybe_compact()
+
+    def _write(self, data: bytes) -> None:
+        with self._lock:
+            if self._file is None:
+                raise ValueError("Journal is not open; call load() first")
+            self._file.write(data)
+            self._file.flush()
+            self.records += 1
+            self._fsync_written()
+
+    def _fsync_written(self) -> None:
+        # Called with the lock held after a record is written
+        if self.fsync == 'always':
+            os.fsync(self._file.fileno())
+        elif self.fsync == 'interval':
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+            elif self._sync_timer is None:
+                # Sync this record even if no other write follows
+                self._sync_timer = threading.Timer(
+                    self._last_fsync + self.fsync_interval - now, self._sync_when_due)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def _sync_when_due(self) -> None:
+        try:
+            self.sync()
+        except Exception as e:  # The next write or close() syncs again
+            self.sync_error = e
+
+    def _cancel_sync_timer(self) -> None:
+        # Called with the lock held
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+            self._sync_timer = None
+
+    def _maybe_compact(self) -> None:
+        if (self.records < self.min_compact_records
+                or self.dead <= self.compact_ratio * self.records):
+            return
+        if not self.background:
+            self.compact()
+        elif self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(target=self._compact_in_background,
+                                               name="history-journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:  # Keep appending to the old journal
+            self.compaction_error = e
+
+    def compact(self) -> None:
+        """Rewrite the journal with only its live records."""
+        temp_path = self.path + '.compact'
+        with self._lock:
+            self._file.flush()
+            snapshot_end = self._file.tell()
+            snapshot_records = self.records
+
+        # Appends continue while the snapshot is rewritten
+        entries, _, _, _ = _read_records(self.path, self.max_entries, snapshot_end)
+        try:
+            with open(temp_path, 'wb') as out:
+                for entry in entries:
+                    out.write(_encode(entry))
+
+                with self._lock:
+                    # Copy records appended since the snapshot, then swap files
+                    self._file.flush()
+                    with open(self.path, 'rb') as current:
+                        current.seek(snapshot_end)
+                        tail = current.read()
+                    out.write(tail)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    os.replace(temp_path, self.path)
+                    self._file.close()
+                    self._file = open(self.path, 'ab')
+                    self.records = len(entries) + (self.records - snapshot_records)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        """Block until a running background compaction finishes."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join(timeout)
+
+    def sync(self) -> None:
+        """Flush and fsync everything appended so far."""
+        with self._lock:
+            self._cancel_sync_timer()
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        """Wait for compaction, sync and close the file."""
+        self.wait_for_compaction()
+        self.sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SharedHistoryJournal(HistoryJournal):
+    """
+    Journal shared by several processes.
+
+    Every append, clear, refresh and compaction runs under an exclusive
+    fcntl.flock on a side file (path + '.lock'), which is never replaced. In
+    that critical section the journal first reads the records other processes
+    appended since it last looked, so each process can merge them into its
+    history in file order before its own record is written (merge on write).
+    Compaction rewrites the file in place of the old one while holding the
+    lock; other processes notice the new inode and reload.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, max_entries: int = 100, fsync: str = 'never',
+                 fsync_interval: float = 1.0, compact_ratio: float = DEFAULT_COMPACT_RATIO,
+                 min_compact_records: int = DEFAULT_MIN_COMPACT_RECORDS):
+        """
+        Initialize a shared journal. Call load() before appending.
+
+        Args:
+            path: Journal file (created if missing)
+            max_entries: Number of most recent entries that are live
+            fsync: 'never', 'interval' or 'always' (see HistoryJournal)
+            fsync_interval: Seconds between fsyncs for the 'interval' policy
+            compact_ratio: Dead-record fraction that triggers compaction
+            min_compact_records: Journal size below which compaction is skipped
+
+        Raises:
+            ValueError: If the fsync policy is unknown
+        """
+        import fcntl  # POSIX only
+
+        # Compaction must hold the file lock, so it always runs inline
+        super().__init__(path, max_entries, fsync, fsync_interval, compact_ratio,
+                         min_compact_records, background=False)
+        self._fcntl = fcntl
+        self.lock_path = self.path + '.lock'
+        self._lock_file = None
+        # Read handle on the same file as _file, for catching up
+        self._reader = None
+        # Byte offset up to which this process has read the journal
+        self._read_offset = 0
+        self._inode = None
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the thread lock and the file lock."""
+        fcntl = self._fcntl
+        with self._lock:
+            if self._lock_file is None:
+                self._lock_file = open(self.lock_path, 'ab')
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _open(self) -> List[HistoryEntry]:
+        """Replay the whole file and reopen it (file lock held)."""
+        if not os.path.exists(self.path):
+            open(self.path, 'ab').close()
+        entries, self.records, self._adds_since_clear, valid_end = \
+            _read_records(self.path, self.max_entries)
+        if os.path.getsize(self.path) != valid_end:
+            # Writers hold the lock, so a torn tail means one of them crashed
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+        self._reopen()
+        self._read_offset = valid_end
+        return entries
+
+    def _reopen(self) -> None:
+        """Open the append and read handles on the current file."""
+        for handle in (self._file, self._reader):
+            if handle is not None:
+                handle.close()
+        self._file = open(self.path, 'ab')
+        self._reader = open(self.path, 'rb')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _catch_up(self):
+        """
+        Read what other processes wrote since the last call (file lock held).
+
+        Returns:
+            Tuple of (reset, changes). If reset is True the journal was
+            compacted elsewhere and changes are the complete live entries;
+            otherwise changes are new entries, oldest first, with None for
+            a clear.
+        """
+        if self._file is None:
+            raise ValueError("Journal is not open; call load() first")
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True, self._open()
+        if stat.st_ino != self._inode:
+            return True, self._open()
+        if stat.st_size == self._read_offset:
+            return False, []
+
+        data = os.pread(self._reader.fileno(), stat.st_size - self._read_offset,
+                        self._read_offset)
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            # Writers hold the lock, so a partial record means one crashed
+            os.truncate(self.path, self._read_offset + end)
+        if not end:
+            return False, []
+        # Decode all new records in one call
+        records = json.loads(b'[' + data[:end - 1].replace(b'\n', b',') + b']')
+        changes: List[Optional[HistoryEntry]] = []
+        for record in records:
+            if record.get('clear'):
+                changes.append(None)
+                self._adds_since_clear = 0
+            else:
+                changes.append(HistoryEntry.from_dict(record))
+                self._adds_since_clear += 1
+        self.records += len(changes)
+        self._read_offset += end
+        return False, changes
+
+    def load(self) -> List[HistoryEntry]:
+        """
+        Replay the journal and open it for appending.
+
+        Returns:
+            The live entries, oldest first
+
+        Raises:
+            ValueError: If a record before the last one is corrupt
+        """
+        with self._locked():
+            return self._open()
+
+    def refresh(self):
+        """
+        Read records other processes appended since the last operation.
+
+        Returns:
+            Tuple of (reset, changes) as described for appends
+        """
+        with self._locked():
+            return self._catch_up()
+
+    def append(self, entry: HistoryEntry):
+        """
+        Merge other processes' records, then append one entry.
+
+        Args:
+            entry: Entry to persist
+
+        Returns:
+            Tuple of (reset, changes): what other processes wrote before this
+            entry. With reset, changes are the complete live entries.
+        """
+        return self._append_record(_encode(entry), cleared=False)
+
+    def append_clear(self):
+        """
+        Record that the history was cleared.
+
+        Returns:
+            Tuple of (reset, changes) written by other processes first
+        """
+        return self._append_record(_CLEAR_RECORD, cleared=True)
+
+    def _append_record(self, data: bytes, cleared: bool):
+        with self._locked():
+            merged = self._catch_up()
+            self._file.write(data)
+            self._file.flush()
+            self._read_offset += len(data)
+            self.records += 1
+            self._adds_since_clear = 0 if cleared else self._adds_since_clear + 1
+            self._fsync_written()
+            if (self.records >= self.min_compact_records
+                    and self.dead > self.compact_ratio * self.records):
+                self._compact_locked()
+        return merged
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal with only its live records.
+
+        If other processes appended records this one has not read yet, the
+        next refresh or append reports a reset with the complete entries.
+        """
+        with self._locked():
+            unread = os.path.getsize(self.path) > self._read_offset
+            self._compact_locked()
+            if unread:
+                self._inode = None
+
+    def _compact_locked(self) -> None:
+        temp_path = self.path + '.compact'
+        entries, _, _, _ = _read_records(self.path, self.max_entries)
+        try:
+            with open(temp_path, 'wb') as out:
+                for entry in entries:
+                    out.write(_encode(entry))
+                out.flush()
+                os.fsync(out.fileno())
+                size = out.tell()
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        self._reopen()
+        self._read_offset = size
+        self.records = len(entries)
+        self._adds_since_clear = len(entries)
+
+    def close(self) -> None:
+        """Sync and close the journal, its read handle and its lock file."""
+        super().close()
+        with self._lock:
+            for name in ('_reader', '_lock_file'):
+                handle = getattr(self, name)
+                if handle is not None:
+                    handle.close()
+                    setattr(self, name, None)
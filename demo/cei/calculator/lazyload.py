@@ -0,0 +1,357 @@
+"""
+Streaming, lazy loading of large history files.
+
+JSON history files are decoded incrementally, one record at a time, from
+fixed-size chunks, and only the last max_entries records are kept. JSONL
+journals are read backwards from the end until enough records are found.
+Kept records stay as the plain dicts the decoder produced; a HistoryEntry
+(and its parsed datetime) is only built the first time an entry is read.
+Both readers check that each kept record has the fields of an entry, so a
+malformed record fails the load instead of a later read.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from collections import deque
+import json
+import os
+import re
+import threading
+from calculator.history import HistoryEntry
+from calculator.ringbuffer import RingBuffer
+
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\n\r'
+
+# Journal lines starting with this may be clear records, which end a backward scan
+_CLEAR_PREFIX = b'{"clear"'
+
+# Fields HistoryEntry.from_dict reads from every record
+_RECORD_KEYS = ('expression', 'result', 'timestamp')
+
+# Whitespace, then the separator after an array element, then whitespace
+_SEPARATOR = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+
+
+class _ChunkedText:
+    """Text read from a file in chunks, with the consumed prefix discarded."""
+
+    def __init__(self, f, chunk_size: int):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk; return False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += chunk
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character ('' at end of file)."""
+        while True:
+            text = self.text
+            pos = self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        """Consume one expected structural character."""
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.text, self.pos)
+        self.pos += 1
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        """Decode the next complete JSON value, reading more text as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                # The value may just be cut off at the end of the chunk
+                if self.fill():
+                    continue
+                raise
+            if end == len(self.text) and not self.eof and not isinstance(value, (dict, list, str)):
+                # A number at the end of the chunk may continue in the next one
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+    def array_items(self, decoder: json.JSONDecoder) -> Iterator[Any]:
+        """Decode the elements of the JSON array at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        raw_decode = decoder.raw_decode
+        separator = _SEPARATOR.match
+        while True:
+            text = self.text
+            try:
+                value, end = raw_decode(text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            match = separator(text, end)
+            if match is None or match.end() == len(text):
+                # The separator (or the value) may continue in the next chunk
+                if not isinstance(value, (dict, list, str)) and self.fill():
+                    continue
+                self.pos = end
+                yield value
+                if self.peek() == ',':
+                    self.pos += 1
+                    self.peek()
+                    continue
+                self.expect(']')
+                return
+            self.pos = match.end()
+            yield value
+            if match.group(1) == ']':
+                return
+
+
+def read_json_history(filepath: str, max_entries: int,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[int, List[Dict]]:
+    """
+    Stream a save_to_file JSON document, keeping only the newest records.
+
+    Args:
+        filepath: Path of the JSON file
+        max_entries: Records to keep if the file does not set max_entries
+            before its history list
+        chunk_size: Characters read at a time
+
+    Returns:
+        Tuple of (max_entries from the file or the default, kept record dicts
+        oldest first)
+
+    Raises:
+        FileNotFoundError: If file doesn't exist
+        json.JSONDecodeError: If file is not valid JSON
+        ValueError: If a kept record is not a history entry
+    """
+    decoder = json.JSONDecoder()
+    saved_max: Optional[int] = None
+    records: Union[deque, List[Dict]] = []
+
+    with open(filepath, 'r') as f:
+        reader = _ChunkedText(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return max_entries, []
+        while True:
+            key = reader.decode(decoder)
+            reader.expect(':')
+            if key == 'history':
+                # Keep a bounded window once the limit is known
+                records = deque(reader.array_items(decoder), maxlen=saved_max) \
+                    if saved_max is not None else list(reader.array_items(decoder))
+            else:
+                value = reader.decode(decoder)
+                if key == 'max_entries':
+                    saved_max = value
+            if reader.peek() == ',':
+                reader.pos += 1
+                continue
+            reader.expect('}')
+            break
+
+    limit = saved_max if saved_max is not None else max_entries
+    kept = list(records)
+    kept = kept[max(0, len(kept) - limit):] if limit else []
+    _check_records(filepath, kept)
+    return limit, kept
+
+
+def read_jsonl_tail(filepath: str, max_entries: int,
+                    block_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict]:
+    """
+    Read the newest records of a JSONL history journal from its end.
+
+    Reading stops once max_entries records or a clear marker are found, so
+    the cost depends on what is kept rather than on the file size. A torn
+    last record is ignored.
+
+    Args:
+        filepath: Path of the journal
+        max_entries: Number of records to keep
+        block_size: Bytes read per step backwards
+
+    Returns:
+        Kept record dicts, oldest first
+
+    Raises:
+        FileNotFoundError: If file doesn't exist
+        ValueError: If a kept record is corrupt
+    """
+    if max_entries <= 0:
+        return []
+
+    # Collect the raw lines newest first, then decode them in one call
+    lines: List[bytes] = []
+    with open(filepath, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        # Bytes of a line whose start has not been read yet
+        partial = b''
+        last = True
+        done = False
+        while position > 0 and not done:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            block = (f.read(step) + partial).split(b'\n')
+            partial = block[0] if position > 0 else b''
+            for line in reversed(block[1:] if position > 0 else block):
+                if last:
+                    last = False
+                    if not _is_record(line):
+                        continue  # Trailing newline or torn last record
+                elif not line:
+                    continue
+                if line.startswith(_CLEAR_PREFIX) and json.loads(line).get('clear'):
+                    done = True
+                    break
+                lines.append(line)
+                if len(lines) == max_entries:
+                    done = True
+                    break
+
+    lines.reverse()
+    try:
+        records = json.loads(b'[' + b','.join(lines) + b']')
+    except ValueError:
+        for number, line in enumerate(lines, 1):
+            if not _is_record(line):
+                raise ValueError(
+                    f"{filepath}: corrupt journal record {number} of the last {len(lines)}"
+                ) from None
+        raise
+    _check_records(filepath, records)
+    return records
+
+
+def _check_records(filepath: str, records: List[Any]) -> None:
+    """Check that kept records have every field an entry is built from."""
+    for number, record in enumerate(records, 1):
+        if not isinstance(record, dict) or not all(key in record for key in _RECORD_KEYS):
+            raise ValueError(
+                f"{filepath}: history record {number} of the last {len(records)} "
+                f"needs {', '.join(_RECORD_KEYS)}"
+            )
+
+
+def _is_record(line: bytes) -> bool:
+    """Check that a line holds one complete JSON object."""
+    try:
+        return isinstance(json.loads(line), dict)
+    except ValueError:
+        return False
+
+
+class LazyRingBuffer(RingBuffer):
+    """
+    RingBuffer that holds raw record dicts until they are read.
+
+    Each dict is replaced by a HistoryEntry the first time it is accessed;
+    entries appended as HistoryEntry objects are returned unchanged. Reads
+    happen without the history lock, so the write-back and the mutators
+    share a lock of their own: an entry is only stored if its slot still
+    holds the dict it was built from.
+    """
+
+    __slots__ = ('_write_lock',)
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self._write_lock = threading.Lock()
+
+    def _load(self, slot: int) -> HistoryEntry:
+        item = self._items[slot]
+        if type(item) is dict:
+            entry = HistoryEntry.from_dict(item)
+            with self._write_lock:
+                items = self._items
+                if slot < len(items) and items[slot] is item:
+                    items[slot] = entry
+            return entry
+        return item
+
+    def pending(self) -> int:
+        """Number of entries not yet materialized."""
+        return sum(1 for item in self._items if type(item) is dict)
+
+    def append(self, item: Any) -> Optional[HistoryEntry]:
+        with self._write_lock:
+            evicted = super().append(item)
+        if type(evicted) is dict:
+            evicted = HistoryEntry.from_dict(evicted)
+        return evicted
+
+    def clear(self) -> None:
+        with self._write_lock:
+            super().clear()
+
+    def resize(self, capacity: int) -> None:
+        with self._write_lock:
+            super().resize(capacity)
+
+    def copy(self) -> 'LazyRingBuffer':
+        with self._write_lock:
+            clone = super().copy()
+        clone._write_lock = threading.Lock()
+        return clone
+
+    def to_list(self) -> List[HistoryEntry]:
+        """Materialize the entries, oldest first, into a new list."""
+        return list(self)
+
+    def get_seq(self, seq: int) -> HistoryEntry:
+        offset = seq - self._first_seq
+        if not 0 <= offset < len(self._items):
+            raise IndexError(f"Sequence number {seq} is not in the buffer")
+        return self._load((self._start + offset) % self._capacity)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        size = len(self._items)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RingBuffer index out of range")
+        return self._load((self._start + index) % self._capacity)
+
+    def __iter__(self):
+        load = self._load
+        start = self._start
+        for slot in range(start, len(self._items)):
+            yield load(slot)
+        for slot in range(start):
+            yield load(slot)
+
+    def __reversed__(self):
+        load = self._load
+        start = self._start
+        for slot in range(start - 1, -1, -1):
+            yield load(slot)
+        for slot in range(len(self._items) - 1, start - 1, -1):
+            yield load(slot)
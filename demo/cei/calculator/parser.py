@@ -2,29 +2,53 @@
 Expression parser for calculator without using eval().
 Implements tokenization, infix to postfix conversion, and evaluation.
 """
-from typing import List, Union, Optional, Tuple
-from enum import Enum
-import re
+from typing import List, Optional, Tuple, Dict, Union, Iterable
+import time
 from calculator.core import add, subtract, multiply, divide
+from calculator.cache import LRUCache
+from calculator.compiler import CompiledExpression, compile_program
+from calculator.profiling import StageProfiler, global_profiler
+from calculator.program import Program, lookup_variable
+from calculator.tokens import (
+    Token, TokenType, OPERATOR_TOKENS, LEFT_PAREN_TOKEN, RIGHT_PAREN_TOKEN
+)
 
 
-class TokenType(Enum):
-    """Types of tokens in expressions."""
-    NUMBER = "NUMBER"
-    OPERATOR = "OPERATOR"
-    LEFT_PAREN = "LEFT_PAREN"
-    RIGHT_PAREN = "RIGHT_PAREN"
+# Character classes for the tokenizer lookup table
+_INVALID = 0
+_SPACE = 1
+_DIGIT = 2
+_OPERATOR = 3  # Operators and parentheses: always a single-character token
+_ALPHA = 4  # Letters and underscore: start of a variable name
 
+_DOT_CHAR = ord('.')
+
+_CHAR_CLASSES = bytearray(256)
+_CHAR_CLASSES[ord(' ')] = _SPACE
+for _char in b'0123456789':
+    _CHAR_CLASSES[_char] = _DIGIT
+for _char in b'+-*/()':
+    _CHAR_CLASSES[_char] = _OPERATOR
+for _char in b'_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ':
+    _CHAR_CLASSES[_char] = _ALPHA
+_CHAR_CLASSES = bytes(_CHAR_CLASSES)
+
+_SINGLE_CHAR_TOKENS = {ord(op): token for op, token in OPERATOR_TOKENS.items()}
+_SINGLE_CHAR_TOKENS[ord('(')] = LEFT_PAREN_TOKEN
+_SINGLE_CHAR_TOKENS[ord(')')] = RIGHT_PAREN_TOKEN
+
+# Characters that merge into one token when not separated by a space
+_WORD_CHARS = frozenset('0123456789._abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
 
-class Token:
-    """Represents a token in the expression."""
-    
-    def __init__(self, type_: TokenType, value: Union[str, float]):
-        self.type = type_
-        self.value = value
-    
-    def __repr__(self):
-        return f"Token({self.type}, {self.value})"
+
+def _memoryview_float(view: memoryview) -> float:
+    """Convert a memoryview slice of ASCII digits to float."""
+    return float(view.tobytes())
+
+
+def _ascii_name(data: Union[bytes, memoryview]) -> str:
+    """Convert a slice of ASCII name characters to str."""
+    return bytes(data).decode('ascii')
 
 
 class ExpressionParser:
@@ -32,22 +56,102 @@ class ExpressionParser:
     Parses and evaluates mathematical expressions without using eval().
     Supports +, -, *, / operators and parentheses.
     Follows PEMDAS order of operations.
+    
+    Compiled programs are cached per expression so repeated expressions
+    skip tokenizing and the shunting-yard pass.
     """
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 256, use_cache: bool = True):
+        """
+        Initialize the parser.
+        
+        Args:
+            cache_size: Maximum number of compiled expressions to keep
+            use_cache: Set to False to disable the expression cache
+        """
         self.operators = {
             '+': (1, add),
             '-': (1, subtract),
             '*': (2, multiply),
             '/': (2, divide)
         }
+        self._cache: Optional[LRUCache] = LRUCache(cache_size) if use_cache else None
+        # Per-stage timings; None unless profiling is enabled
+        self._profiler: Optional[StageProfiler] = global_profiler()
+    
+    @property
+    def cache_hits(self) -> int:
+        """Number of parses served from the expression cache."""
+        return self._cache.hits if self._cache is not None else 0
+    
+    @property
+    def cache_misses(self) -> int:
+        """Number of parses that had to compile the expression."""
+        return self._cache.misses if self._cache is not None else 0
+    
+    @property
+    def cache_evictions(self) -> int:
+        """Number of compiled expressions dropped to respect the cache size."""
+        return self._cache.evictions if self._cache is not None else 0
+    
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Get expression cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses, evictions, size and maxsize
+        """
+        if self._cache is None:
+            return {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 0}
+        return self._cache.info()
+    
+    def clear_cache(self) -> None:
+        """Discard all cached expressions and reset the counters."""
+        if self._cache is not None:
+            self._cache.clear()
     
-    def tokenize(self, expression: str) -> List[Token]:
+    def enable_profiling(self, profiler: Optional[StageProfiler] = None) -> StageProfiler:
+        """
+        Start recording per-stage timings for parse().
+        
+        Args:
+            profiler: Profiler to record into (a new one by default)
+            
+        Returns:
+            The active StageProfiler
+        """
+        if profiler is None:
+            profiler = self._profiler or StageProfiler()
+        self._profiler = profiler
+        return profiler
+    
+    def disable_profiling(self) -> None:
+        """Stop recording timings."""
+        self._profiler = None
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-stage timing statistics.
+        
+        Returns:
+            Mapping of stage name ('tokenize', 'infix_to_postfix',
+            'evaluate_postfix', 'parse') to count, total, mean, p50, p95 and
+            p99 in seconds; empty if profiling is disabled
+        """
+        if self._profiler is None:
+            return {}
+        return self._profiler.stats()
+    
+    def tokenize(self, expression: Union[str, bytes, memoryview]) -> List[Token]:
         """
         Convert expression string into list of tokens.
         
+        Scans the input once using a character-class table. Spaces separate
+        tokens but are otherwise ignored. Names made of letters, digits and
+        underscores (not starting with a digit) become IDENTIFIER tokens.
+        
         Args:
-            expression: Mathematical expression string
+            expression: Mathematical expression as text or ASCII bytes
             
         Returns:
             List of Token objects
@@ -55,31 +159,66 @@ class ExpressionParser:
         Raises:
             ValueError: If expression contains invalid characters
         """
+        if isinstance(expression, str):
+            # One byte per character, so positions match; anything non-ASCII
+            # becomes '?' and is rejected (the error names the real character)
+            data = expression.encode('ascii', 'replace')
+            to_float = float
+            text_input = True
+        elif isinstance(expression, memoryview):
+            data = expression.cast('B') if expression.format != 'B' else expression
+            to_float = _memoryview_float
+            text_input = False
+        else:
+            data = expression
+            to_float = float
+            text_input = False
+        
         tokens = []
-        expression = expression.replace(' ', '')  # Remove whitespace
-        
-        # Pattern to match numbers (including decimals) and operators
-        pattern = r'(\d+\.?\d*|[+\-*/()])'
-        matches = re.findall(pattern, expression)
-        
-        # Verify we captured the entire expression
-        if ''.join(matches) != expression:
-            raise ValueError("Invalid characters in expression")
-        
-        for match in matches:
-            if match in self.operators:
-                tokens.append(Token(TokenType.OPERATOR, match))
-            elif match == '(':
-                tokens.append(Token(TokenType.LEFT_PAREN, match))
-            elif match == ')':
-                tokens.append(Token(TokenType.RIGHT_PAREN, match))
-            else:
-                # It's a number
-                try:
-                    value = float(match)
-                    tokens.append(Token(TokenType.NUMBER, value))
-                except ValueError:
-                    raise ValueError(f"Invalid number: {match}")
+        append = tokens.append
+        classes = _CHAR_CLASSES
+        n = len(data)
+        i = 0
+        
+        while i < n:
+            char = data[i]
+            kind = classes[char]
+            
+            if kind == _DIGIT:
+                start = i
+                i += 1
+                while i < n and classes[data[i]] == _DIGIT:
+                    i += 1
+                if i < n and data[i] == _DOT_CHAR:
+                    i += 1
+                    while i < n and classes[data[i]] == _DIGIT:
+                        i += 1
+                if i < n and classes[data[i]] == _ALPHA:
+                    # No implicit multiplication: "4x" is a malformed number
+                    raise ValueError(
+                        f"Invalid characters in expression at position {i}: "
+                        f"{expression[i] if text_input else chr(data[i])!r}"
+                    )
+                append(Token(TokenType.NUMBER, to_float(data[start:i])))
+                continue
+            
+            if kind == _ALPHA:
+                start = i
+                i += 1
+                while i < n and (classes[data[i]] == _ALPHA or classes[data[i]] == _DIGIT):
+                    i += 1
+                name = expression[start:i] if text_input else _ascii_name(data[start:i])
+                append(Token(TokenType.IDENTIFIER, name))
+                continue
+            
+            if kind == _OPERATOR:
+                append(_SINGLE_CHAR_TOKENS[char])
+            elif kind != _SPACE:
+                raise ValueError(
+                    f"Invalid characters in expression at position {i}: "
+                    f"{expression[i] if text_input else chr(char)!r}"
+                )
+            i += 1
         
         return tokens
     
@@ -100,7 +239,7 @@ class ExpressionParser:
         operator_stack = []
         
         for token in tokens:
-            if token.type == TokenType.NUMBER:
+            if token.type == TokenType.NUMBER or token.type == TokenType.IDENTIFIER:
                 output.append(token)
             
             elif token.type == TokenType.OPERATOR:
@@ -133,12 +272,14 @@ class ExpressionParser:
         
         return output
     
-    def evaluate_postfix(self, tokens: List[Token]) -> float:
+    def evaluate_postfix(self, tokens: List[Token],
+                         variables: Optional[Dict[str, float]] = None) -> float:
         """
         Evaluate expression in postfix notation.
         
         Args:
             tokens: List of tokens in postfix notation
+            variables: Values for names used in the expression
             
         Returns:
             Result of the expression
@@ -153,6 +294,9 @@ class ExpressionParser:
             if token.type == TokenType.NUMBER:
                 stack.append(token.value)
             
+            elif token.type == TokenType.IDENTIFIER:
+                stack.append(lookup_variable(variables, token.value))
+            
             elif token.type == TokenType.OPERATOR:
                 if len(stack) < 2:
                     raise ValueError("Invalid expression: not enough operands")
@@ -179,12 +323,13 @@ class ExpressionParser:
         
         return stack[0]
     
-    def parse(self, expression: str) -> float:
+    def parse(self, expression: str, variables: Optional[Dict[str, float]] = None) -> float:
         """
         Parse and evaluate a mathematical expression.
         
         Args:
             expression: Mathematical expression string
+            variables: Values for names used in the expression
             
         Returns:
             Result of the expression
@@ -193,9 +338,250 @@ class ExpressionParser:
             ValueError: If expression is invalid
             ZeroDivisionError: If division by zero occurs
         """
+        if self._profiler is not None:
+            return self._parse_profiled(expression, variables)
+        
         if not expression or expression.isspace():
             raise ValueError("Empty expression")
         
+        program = self.get_program(expression)
+        
+        # Evaluate the compiled program
+        return self.evaluate_program(program, variables)
+    
+    def _parse_profiled(self, expression: str, variables: Optional[Dict[str, float]]) -> float:
+        """parse() with each stage timed; stages skipped by a cache hit are not recorded."""
+        record = self._profiler.record
+        clock = time.perf_counter
+        start = clock()
+        try:
+            if not expression or expression.isspace():
+                raise ValueError("Empty expression")
+            
+            key = self._cache_key(expression) if self._cache is not None else None
+            program = self._cache.get(key) if key is not None else None
+            if program is None:
+                stage_start = clock()
+                try:
+                    tokens = self.tokenize(expression)
+                finally:
+                    record('tokenize', clock() - stage_start)
+                if not tokens:
+                    raise ValueError("Empty expression")
+                
+                stage_start = clock()
+                try:
+                    program = Program.from_postfix(self.infix_to_postfix(tokens))
+                finally:
+                    record('infix_to_postfix', clock() - stage_start)
+                if key is not None:
+                    self._cache.put(key, program)
+            
+            stage_start = clock()
+            try:
+                return self.evaluate_program(program, variables)
+            finally:
+                record('evaluate_postfix', clock() - stage_start)
+        finally:
+            record('parse', clock() - start)
+    
+    def evaluate_program(self, program: Program,
+                         variables: Optional[Dict[str, float]] = None) -> float:
+        """
+        Evaluate a compiled program.
+        
+        Args:
+            program: Program built from a postfix token list
+            variables: Values for names used in the expression
+            
+        Returns:
+            Result of the expression
+            
+        Raises:
+            ValueError: If a variable has no value
+            ZeroDivisionError: If division by zero occurs
+        """
+        return program.evaluate(variables)
+    
+    def parse_many(self, expressions: Iterable[str], jobs: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> list:
+        """
+        Evaluate many independent expressions, optionally in parallel.
+        
+        Work is split across a process pool in adaptively sized chunks.
+        Invalid expressions and division by zero do not abort the batch;
+        they produce BatchError records in their position.
+        
+        Args:
+            expressions: Iterable of expression strings
+            jobs: Number of worker processes (defaults to the CPU count;
+                1 evaluates in this process)
+            chunk_size: Fixed number of expressions per chunk (adaptive if None)
+            
+        Returns:
+            List with a float or BatchError for each expression, in input order
+        """
+        from calculator.batch import iter_parse_many
+        
+        return list(iter_parse_many(self, expressions, jobs=jobs, chunk_size=chunk_size))
+    
+    def evaluate_vectorized(self, expression: str, zero_division: str = 'nan', **arrays):
+        """
+        Evaluate an expression over whole NumPy arrays.
+        
+        Each operator runs once over the (broadcast) inputs instead of once
+        per element. Requires NumPy.
+        
+        Args:
+            expression: Mathematical expression string
+            zero_division: 'nan' to yield NaN, 'mask' to return a masked array,
+                or 'raise' to raise ZeroDivisionError where a divisor is zero
+            **arrays: Values for names used in the expression
+            
+        Returns:
+            numpy.ndarray (or numpy.ma.MaskedArray with zero_division='mask')
+            
+        Raises:
+            ValueError: If expression is invalid or a variable has no value
+            ZeroDivisionError: If zero_division='raise' and a divisor is zero
+            ImportError: If NumPy is not installed
+        """
+        from calculator.vectorized import evaluate_program_vectorized
+        
+        if not expression or expression.isspace():
+            raise ValueError("Empty expression")
+        
+        return evaluate_program_vectorized(self.get_program(expression), arrays, zero_division)
+    
+    def evaluate_blocked(self, expression: str, out=None, chunk_size: Optional[int] = None,
+                         zero_division: str = 'nan', **arrays):
+        """
+        Evaluate an expression over large arrays in cache-sized blocks.
+        
+        Intermediates live in a small pool of chunk-sized scratch buffers, so
+        extra memory grows with chunk_size and expression depth rather than
+        with the input length. Array inputs must share one shape. Requires NumPy.
+        
+        Args:
+            expression: Mathematical expression string
+            out: Optional C-contiguous float64 array to write results into
+            chunk_size: Elements per block (defaults to an L2-sized block)
+            zero_division: 'nan', 'mask' or 'raise' (see evaluate_vectorized)
+            **arrays: Values for names used in the expression
+            
+        Returns:
+            The output array (masked array with zero_division='mask')
+            
+        Raises:
+            ValueError: If expression is invalid, inputs differ in shape or
+                out does not match
+            ZeroDivisionError: If zero_division='raise' and a divisor is zero
+            ImportError: If NumPy is not installed
+        """
+        from calculator.vectorized import evaluate_program_blocked, DEFAULT_CHUNK_SIZE
+        
+        if not expression or expression.isspace():
+            raise ValueError("Empty expression")
+        
+        return evaluate_program_blocked(
+            self.get_program(expression), arrays, out=out,
+            chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, zero_division=zero_division
+        )
+    
+    def evaluate_files(self, expression: str, output: str, chunk_rows: Optional[int] = None,
+                       zero_division: str = 'nan', **inputs):
+        """
+        Evaluate an expression over column files larger than memory.
+        
+        Inputs and output are `.npy` files or raw little-endian float64 files;
+        they are memory-mapped one chunk at a time and never loaded whole.
+        Requires NumPy.
+        
+        Args:
+            expression: Mathematical expression string
+            output: Path of the output column file to create
+            chunk_rows: Rows mapped per chunk (defaults to 1M rows)
+            zero_division: 'nan' or 'raise'
+            **inputs: Column file path or scalar value for each variable
+            
+        Returns:
+            EvaluationStats with rows, seconds, bytes read and rows/second
+            
+        Raises:
+            ValueError: If expression is invalid or columns differ in length
+            ZeroDivisionError: If zero_division='raise' and a divisor is zero
+            ImportError: If NumPy is not installed
+        """
+        from calculator.columns import evaluate_program_columns, DEFAULT_CHUNK_ROWS
+        
+        if not expression or expression.isspace():
+            raise ValueError("Empty expression")
+        
+        return evaluate_program_columns(
+            self.get_program(expression), inputs, output,
+            chunk_rows=chunk_rows or DEFAULT_CHUNK_ROWS, zero_division=zero_division
+        )
+    
+    def compile(self, expression: str) -> CompiledExpression:
+        """
+        Compile an expression into a reusable callable.
+        
+        Args:
+            expression: Mathematical expression string
+            
+        Returns:
+            CompiledExpression that evaluates the expression when called
+            
+        Raises:
+            ValueError: If expression is invalid
+        """
+        if not expression or expression.isspace():
+            raise ValueError("Empty expression")
+        
+        return compile_program(expression, self.get_program(expression))
+    
+    def get_program(self, expression: str) -> Program:
+        """
+        Get the compiled program for an expression, using the cache if enabled.
+        
+        Args:
+            expression: Mathematical expression string
+            
+        Returns:
+            Program in compact opcode form
+            
+        Raises:
+            ValueError: If expression is invalid
+        """
+        if self._cache is None:
+            return self._build_program(expression)
+        
+        key = self._cache_key(expression)
+        program = self._cache.get(key)
+        if program is None:
+            program = self._build_program(expression)
+            self._cache.put(key, program)
+        return program
+    
+    @staticmethod
+    def _cache_key(expression: str) -> str:
+        """Normalize whitespace so equivalent spellings share a cache entry."""
+        if ' ' not in expression:
+            return expression
+        
+        # Drop spaces except where they separate two words ("3 4" is not "34")
+        parts = [part for part in expression.split(' ') if part]
+        if not parts:
+            return ''
+        pieces = [parts[0]]
+        for previous, part in zip(parts, parts[1:]):
+            if previous[-1] in _WORD_CHARS and part[0] in _WORD_CHARS:
+                pieces.append(' ')
+            pieces.append(part)
+        return ''.join(pieces)
+    
+    def _build_program(self, expression: str) -> Program:
+        """Tokenize an expression, convert it to postfix and encode it."""
         # Tokenize the expression
         tokens = self.tokenize(expression)
         
@@ -203,10 +589,7 @@ class ExpressionParser:
             raise ValueError("Empty expression")
         
         # Convert to postfix notation
-        postfix = self.infix_to_postfix(tokens)
-        
-        # Evaluate the postfix expression
-        return self.evaluate_postfix(postfix)
+        return Program.from_postfix(self.infix_to_postfix(tokens))
     
     def validate_expression(self, expression: str) -> Tuple[bool, Optional[str]]:
         """
@@ -0,0 +1,164 @@
+"""
+Live result preview while an expression is being typed.
+
+The GUI debounces keystrokes with ``after`` and then asks LivePreview for the
+current text. Only the latest text is ever wanted: while an evaluation is in
+flight, newer text replaces the pending request instead of queuing behind
+it, a stale result is dropped when it arrives, and a stale evaluation that
+is still running after SUPERSEDE_AFTER seconds is abandoned. Outcomes are
+kept in an LRU cache and the worker keeps its compiled-expression cache
+warm, so text seen before (backspacing, retyping a prefix) is shown without
+another evaluation. New text is evaluated incrementally as an edit of the
+text before it, so a keystroke in a long expression only re-parses the
+operands around it.
+"""
+from typing import Optional
+from calculator.cache import LRUCache
+from calculator.evaluator import BackgroundEvaluator, Evaluation
+
+
+# Seconds a preview evaluation may run; "=" still gets the full time budget
+PREVIEW_TIME_BUDGET = 1.0
+
+# Seconds a stale evaluation may keep the worker before it is abandoned
+SUPERSEDE_AFTER = 0.05
+
+
+class LivePreview:
+    """Latest-wins background evaluation of the expression being typed."""
+
+    def __init__(self, time_budget: Optional[float] = PREVIEW_TIME_BUDGET,
+                 supersede_after: float = SUPERSEDE_AFTER, cache_size: int = 256,
+                 evaluator: Optional[BackgroundEvaluator] = None):
+        """
+        Initialize the preview and start its worker process.
+
+        Args:
+            time_budget: Seconds a preview evaluation may run
+            supersede_after: Seconds a stale evaluation may keep running
+                before it is abandoned for newer text
+            cache_size: Number of outcomes (and compiled expressions in the
+                worker) to keep
+            evaluator: Evaluator to use instead of starting a new one
+        """
+        self.evaluator = evaluator or BackgroundEvaluator(time_budget=time_budget,
+                                                          cache_size=cache_size,
+                                                          incremental=True)
+        self.supersede_after = supersede_after
+        self._results = LRUCache(cache_size)
+        # Text the preview should show next, or None if nothing is wanted
+        self._latest: Optional[str] = None
+        # Text being evaluated by the worker
+        self._in_flight: Optional[str] = None
+        # Evaluations sent to the worker
+        self.evaluations = 0
+        # Evaluations whose result was dropped or abandoned for newer text
+        self.superseded = 0
+
+    @property
+    def busy(self) -> bool:
+        """True while a requested preview has not been delivered."""
+        return self._latest is not None
+
+    @property
+    def cache_hits(self) -> int:
+        """Number of previews served from the outcome cache."""
+        return self._results.hits
+
+    def request(self, expression: str) -> Optional[Evaluation]:
+        """
+        Ask for a preview of the given text, superseding earlier requests.
+
+        Args:
+            expression: Current text of the expression
+
+        Returns:
+            The outcome if it is already cached, otherwise None (poll()
+            returns it once evaluated)
+        """
+        cached = self._results.get(expression)
+        if cached is not None:
+            self._latest = None
+            return cached
+        self._latest = expression
+        self._dispatch()
+        return None
+
+    def poll(self) -> Optional[Evaluation]:
+        """
+        Check for the requested preview without blocking.
+
+        Returns:
+            Outcome for the most recently requested text, or None
+        """
+        if self._in_flight is None:
+            return None
+        outcome = self._collect()
+        if outcome is None:
+            self._dispatch()
+            return None
+        if outcome.expression == self._latest:
+            self._latest = None
+            return outcome
+        self.superseded += 1
+        self._dispatch()
+        return None
+
+    def cached(self, expression: str) -> Optional[Evaluation]:
+        """
+        Get the cached outcome for some text without requesting a preview.
+
+        Args:
+            expression: Expression text
+
+        Returns:
+            Evaluation, or None if the text has not been evaluated
+        """
+        return self._results.get(expression)
+
+    def cancel(self) -> None:
+        """
+        Stop wanting a preview.
+
+        An outcome that has already arrived is cached (so "=" can reuse it);
+        an evaluation still running is left to finish and collected later.
+        """
+        self._latest = None
+        if self._in_flight is not None:
+            self._collect()
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        self._latest = None
+        self._in_flight = None
+        self.evaluator.close()
+
+    def _collect(self) -> Optional[Evaluation]:
+        """Take the in-flight outcome from the worker if it has arrived and cache it."""
+        outcome = self.evaluator.poll()
+        if outcome is None:
+            return None
+        self._in_flight = None
+        if not isinstance(outcome.error, (TimeoutError, RuntimeError)):
+            # Timeouts and worker crashes may not happen next time
+            self._results.put(outcome.expression, outcome)
+        return outcome
+
+    def _dispatch(self) -> None:
+        """Send the latest text to the worker if it is free (or busy with stale text)."""
+        latest = self._latest
+        if latest is None or latest == self._in_flight:
+            return
+        if self._in_flight is not None:
+            running = self.evaluator.running_time
+            if running is not None and running < self.supersede_after:
+                # Cheap evaluations finish soon; keep the worker and its cache
+                return
+            # It may have finished with nobody polling (e.g. after cancel());
+            # only an evaluation still running is abandoned
+            if self._collect() is None:
+                self.superseded += 1
+        # submit() abandons a stale evaluation still running
+        self.evaluator.submit(latest)
+        self._in_flight = latest
+        self.evaluations += 1
@@ -0,0 +1,189 @@
+"""
+Compact representation of postfix programs.
+
+A program is an opcode byte string plus an array('d') constant pool. Constants
+are pushed in the order they appear, so OP_CONST needs no operand and the
+evaluator only walks two flat buffers instead of Token objects. Variable
+loads work the same way: OP_LOAD takes the next index from name_refs.
+"""
+from typing import Dict, List, Mapping, Optional
+from array import array
+from calculator.tokens import Token, TokenType, OPERATOR_TOKENS
+
+
+# Opcodes
+OP_CONST = 0
+OP_ADD = 1
+OP_SUB = 2
+OP_MUL = 3
+OP_DIV = 4
+OP_LOAD = 5
+
+# Variables are referenced by a one-byte index into Program.names
+MAX_VARIABLES = 256
+
+OPCODES = {'+': OP_ADD, '-': OP_SUB, '*': OP_MUL, '/': OP_DIV}
+OPERATOR_SYMBOLS = {code: symbol for symbol, code in OPCODES.items()}
+
+
+def lookup_variable(variables: Optional[Mapping[str, float]], name: str) -> float:
+    """
+    Look up the value of a variable.
+
+    Args:
+        variables: Mapping of names to values (may be None)
+        name: Variable name
+
+    Returns:
+        The variable's value
+
+    Raises:
+        ValueError: If the variable has no value
+    """
+    try:
+        return variables[name]
+    except (KeyError, TypeError):
+        raise ValueError(f"Undefined variable: {name}") from None
+
+
+class Program:
+    """
+    Postfix program stored as opcodes and a constant pool.
+    Programs are validated when built, so evaluation cannot underflow the stack.
+    """
+
+    __slots__ = ('code', 'constants', 'names', 'name_refs', 'max_depth')
+
+    def __init__(self, code: bytes, constants: array, max_depth: int,
+                 names: tuple = (), name_refs: bytes = b''):
+        """
+        Initialize a program.
+
+        Args:
+            code: Opcode byte string
+            constants: Constant pool consumed by OP_CONST in order
+            max_depth: Maximum evaluation stack depth
+            names: Distinct variable names in order of first use
+            name_refs: Indexes into names consumed by OP_LOAD in order
+        """
+        self.code = code
+        self.constants = constants
+        self.names = names
+        self.name_refs = name_refs
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_postfix(cls, tokens: List[Token]) -> 'Program':
+        """
+        Encode a postfix token list.
+
+        Args:
+            tokens: List of tokens in postfix notation
+
+        Returns:
+            Encoded Program
+
+        Raises:
+            ValueError: If the tokens do not form a valid expression
+        """
+        code = bytearray()
+        constants = array('d')
+        names: Dict[str, int] = {}
+        name_refs = bytearray()
+        depth = 0
+        max_depth = 0
+
+        for token in tokens:
+            if token.type == TokenType.NUMBER or token.type == TokenType.IDENTIFIER:
+                if token.type == TokenType.NUMBER:
+                    code.append(OP_CONST)
+                    constants.append(token.value)
+                else:
+                    index = names.setdefault(token.value, len(names))
+                    if index >= MAX_VARIABLES:
+                        raise ValueError(f"Too many variables (limit {MAX_VARIABLES})")
+                    code.append(OP_LOAD)
+                    name_refs.append(index)
+                depth += 1
+                if depth > max_depth:
+                    max_depth = depth
+
+            elif token.type == TokenType.OPERATOR:
+                if depth < 2:
+                    raise ValueError("Invalid expression: not enough operands")
+                code.append(OPCODES[token.value])
+                depth -= 1
+
+        if depth != 1:
+            raise ValueError("Invalid expression: too many operands")
+
+        return cls(bytes(code), constants, max_depth, tuple(names), bytes(name_refs))
+
+    def to_postfix(self) -> List[Token]:
+        """
+        Decode back into postfix tokens.
+
+        Returns:
+            List of tokens in postfix notation
+        """
+        tokens = []
+        constants = iter(self.constants)
+        name_refs = iter(self.name_refs)
+        for op in self.code:
+            if op == OP_CONST:
+                tokens.append(Token(TokenType.NUMBER, next(constants)))
+            elif op == OP_LOAD:
+                tokens.append(Token(TokenType.IDENTIFIER, self.names[next(name_refs)]))
+            else:
+                tokens.append(OPERATOR_TOKENS[OPERATOR_SYMBOLS[op]])
+        return tokens
+
+    def evaluate(self, variables: Optional[Mapping[str, float]] = None) -> float:
+        """
+        Evaluate the program.
+
+        Args:
+            variables: Values for the program's variable names
+
+        Returns:
+            Result of the expression
+
+        Raises:
+            ValueError: If a variable has no value
+            ZeroDivisionError: If division by zero occurs
+        """
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        next_constant = iter(self.constants).__next__
+        if self.names:
+            values = [lookup_variable(variables, name) for name in self.names]
+            next_value = map(values.__getitem__, self.name_refs).__next__
+
+        for op in self.code:
+            if op == OP_CONST:
+                push(next_constant())
+            elif op == OP_LOAD:
+                push(next_value())
+            else:
+                b = pop()
+                a = pop()
+                if op == OP_ADD:
+                    push(a + b)
+                elif op == OP_SUB:
+                    push(a - b)
+                elif op == OP_MUL:
+                    push(a * b)
+                else:
+                    if b == 0:
+                        raise ZeroDivisionError("Division by zero")
+                    push(a / b)
+
+        return stack[0]
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+    def __repr__(self):
+        return (f"Program(code={self.code!r}, constants={self.constants.tolist()}, "
+                f"names={self.names})")
@@ -0,0 +1,245 @@
+"""
+Fixed-capacity ring buffer with read-only views.
+
+Appending to a full buffer overwrites the oldest item in place, so append and
+eviction are O(1) and no list is ever copied. Every appended item gets a
+sequence number that keeps increasing across evictions and clears; views
+address items by sequence number, so they stay valid (and keep showing the
+same items) until those items are evicted.
+"""
+from typing import Any, Iterator, List, Optional, Sequence
+
+
+class RingBuffer:
+    """Keeps the most recent `capacity` items appended to it."""
+
+    __slots__ = ('_items', '_capacity', '_start', '_first_seq')
+
+    def __init__(self, capacity: int):
+        """
+        Initialize an empty buffer.
+
+        Args:
+            capacity: Maximum number of items kept
+
+        Raises:
+            ValueError: If capacity is negative
+        """
+        if capacity < 0:
+            raise ValueError("Capacity must be non-negative")
+        self._capacity = capacity
+        # Storage grows up to capacity, then wraps; _start is the oldest slot
+        self._items: List[Any] = []
+        self._start = 0
+        # Sequence number of the oldest item
+        self._first_seq = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of items kept."""
+        return self._capacity
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest item still in the buffer."""
+        return self._first_seq
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next appended item will get."""
+        return self._first_seq + len(self._items)
+
+    def append(self, item: Any) -> Optional[Any]:
+        """
+        Append an item, evicting the oldest one if the buffer is full.
+
+        Args:
+            item: Item to append
+
+        Returns:
+            The evicted item, or None if nothing was evicted
+        """
+        items = self._items
+        if len(items) < self._capacity:
+            items.append(item)
+            return None
+        if self._capacity == 0:
+            return item
+
+        start = self._start
+        evicted = items[start]
+        items[start] = item
+        self._start = start + 1 if start + 1 < self._capacity else 0
+        self._first_seq += 1
+        return evicted
+
+    def clear(self) -> None:
+        """Remove all items (sequence numbers continue from where they were)."""
+        self._first_seq += len(self._items)
+        self._items = []
+        self._start = 0
+
+    def resize(self, capacity: int) -> None:
+        """
+        Change the capacity, keeping the most recent items that still fit.
+
+        Args:
+            capacity: New maximum number of items
+
+        Raises:
+            ValueError: If capacity is negative
+        """
+        if capacity < 0:
+            raise ValueError("Capacity must be non-negative")
+        items = self._items
+        kept = items[self._start:] + items[:self._start]
+        dropped = max(0, len(kept) - capacity)
+        self._items = kept[dropped:]
+        self._start = 0
+        self._first_seq += dropped
+        self._capacity = capacity
+
+    def extend(self, items) -> None:
+        """Append each item in order."""
+        for item in items:
+            self.append(item)
+
+    def copy(self) -> 'RingBuffer':
+        """
+        Copy the buffer's storage (not the items) into a new buffer.
+
+        The copy keeps the capacity and sequence numbers and is unaffected
+        by later changes to this buffer.
+        """
+        clone = type(self).__new__(type(self))
+        items = self._items
+        clone._items = items[self._start:] + items[:self._start]
+        clone._capacity = self._capacity
+        clone._start = 0
+        clone._first_seq = self._first_seq
+        return clone
+
+    def to_list(self) -> List[Any]:
+        """Copy the items, oldest first, into a new list."""
+        items = self._items
+        return items[self._start:] + items[:self._start]
+
+    def get_seq(self, seq: int) -> Any:
+        """
+        Get an item by sequence number.
+
+        Raises:
+            IndexError: If the item was evicted or has not been appended yet
+        """
+        offset = seq - self._first_seq
+        if not 0 <= offset < len(self._items):
+            raise IndexError(f"Sequence number {seq} is not in the buffer")
+        return self._items[(self._start + offset) % self._capacity]
+
+    def view(self, start: Optional[int] = None, stop: Optional[int] = None) -> 'RingView':
+        """
+        Get a read-only view of a range of items without copying.
+
+        Args:
+            start: First position (negative counts from the newest item)
+            stop: One past the last position
+
+        Returns:
+            RingView over the selected items
+        """
+        first, last, _ = slice(start, stop).indices(len(self._items))
+        return RingView(self, self._first_seq + first, max(0, last - first))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        size = len(self._items)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RingBuffer index out of range")
+        return self._items[(self._start + index) % self._capacity]
+
+    def __iter__(self) -> Iterator[Any]:
+        items = self._items
+        start = self._start
+        for i in range(start, len(items)):
+            yield items[i]
+        for i in range(start):
+            yield items[i]
+
+    def __reversed__(self) -> Iterator[Any]:
+        items = self._items
+        start = self._start
+        for i in range(start - 1, -1, -1):
+            yield items[i]
+        for i in range(len(items) - 1, start - 1, -1):
+            yield items[i]
+
+    def __repr__(self):
+        return f"RingBuffer(capacity={self._capacity}, size={len(self._items)})"
+
+
+class RingView(Sequence):
+    """
+    Read-only window onto a RingBuffer.
+
+    The view refers to items by sequence number, so appends do not shift it.
+    Reading an item that has since been evicted raises RuntimeError; copy the
+    view with list() if it must outlive later appends.
+    """
+
+    __slots__ = ('_buffer', '_first', '_length')
+
+    def __init__(self, buffer: RingBuffer, first: int, length: int):
+        """
+        Initialize a view.
+
+        Args:
+            buffer: Buffer to read from
+            first: Sequence number of the first item
+            length: Number of items
+        """
+        self._buffer = buffer
+        self._first = first
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _get(self, offset: int) -> Any:
+        try:
+            return self._buffer.get_seq(self._first + offset)
+        except IndexError:
+            raise RuntimeError("History view is stale: its entries were evicted") from None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                return RingView(self._buffer, self._first + start, max(0, stop - start))
+            return [self._get(i) for i in range(start, stop, step)]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("RingView index out of range")
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for offset in range(self._length):
+            yield self._get(offset)
+
+    def __reversed__(self) -> Iterator[Any]:
+        for offset in range(self._length - 1, -1, -1):
+            yield self._get(offset)
+
+    def __eq__(self, other):
+        if isinstance(other, (RingView, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"RingView({list(self)!r})"
@@ -0,0 +1,166 @@
+"""
+Sorted secondary index of history results.
+
+Results are kept in sorted blocks of at most 2 * BLOCK_SIZE values, with the
+largest value of each block in a separate list. Finding a value is two binary
+searches, and inserting or deleting moves at most one block's worth of
+items, so updates stay cheap at millions of entries. Equal results are kept
+in insertion (sequence number) order, so the oldest entry with a given result
+is always the first of its run.
+"""
+from typing import Iterable, Iterator, List, Optional, Tuple
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+BLOCK_SIZE = 512
+
+
+class SortedResultIndex:
+    """Sorted (result, sequence number) pairs supporting range scans."""
+
+    def __init__(self):
+        self._values: List[array] = []
+        self._seqs: List[array] = []
+        # Largest value in each block
+        self._maxes: List[float] = []
+        self._size = 0
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[Tuple[float, int]]) -> 'SortedResultIndex':
+        """
+        Build an index in one pass.
+
+        Args:
+            pairs: (value, seq) pairs sorted by value, then seq
+
+        Returns:
+            A new index
+        """
+        index = cls()
+        pairs = list(pairs)
+        for start in range(0, len(pairs), BLOCK_SIZE):
+            block = pairs[start:start + BLOCK_SIZE]
+            index._values.append(array('d', [value for value, _ in block]))
+            index._seqs.append(array('q', [seq for _, seq in block]))
+            index._maxes.append(block[-1][0])
+        index._size = len(pairs)
+        return index
+
+    def add(self, value: float, seq: int) -> None:
+        """
+        Insert a result.
+
+        Args:
+            value: Result value (not NaN)
+            seq: Sequence number, larger than that of any indexed entry
+                with the same value
+        """
+        self._size += 1
+        if not self._values:
+            self._values.append(array('d', [value]))
+            self._seqs.append(array('q', [seq]))
+            self._maxes.append(value)
+            return
+
+        block = bisect_right(self._maxes, value)
+        if block == len(self._maxes):
+            block -= 1
+        values = self._values[block]
+        seqs = self._seqs[block]
+        position = bisect_right(values, value)
+        values.insert(position, value)
+        seqs.insert(position, seq)
+        self._maxes[block] = values[-1]
+
+        if len(values) > 2 * BLOCK_SIZE:
+            self._values[block:block + 1] = [values[:BLOCK_SIZE], values[BLOCK_SIZE:]]
+            self._seqs[block:block + 1] = [seqs[:BLOCK_SIZE], seqs[BLOCK_SIZE:]]
+            self._maxes[block:block + 1] = [values[BLOCK_SIZE - 1], values[-1]]
+
+    def remove_oldest(self, value: float, seq: int) -> bool:
+        """
+        Remove the oldest entry with a given result.
+
+        Args:
+            value: Result value of the evicted entry
+            seq: Its sequence number
+
+        Returns:
+            True if the entry was found and removed
+        """
+        block = bisect_left(self._maxes, value)
+        if block == len(self._maxes):
+            return False
+        values = self._values[block]
+        seqs = self._seqs[block]
+        position = bisect_left(values, value)
+        if position == len(values) or values[position] != value or seqs[position] != seq:
+            return False
+
+        del values[position]
+        del seqs[position]
+        self._size -= 1
+        if values:
+            self._maxes[block] = values[-1]
+        else:
+            del self._values[block], self._seqs[block], self._maxes[block]
+        return True
+
+    def _locate(self, value: float, right: bool) -> Tuple[int, int]:
+        """Find the (block, position) where value would be inserted."""
+        maxes = self._maxes
+        block = bisect_right(maxes, value) if right else bisect_left(maxes, value)
+        if block == len(maxes):
+            return block, 0
+        values = self._values[block]
+        return block, bisect_right(values, value) if right else bisect_left(values, value)
+
+    def count(self, minimum: Optional[float] = None, maximum: Optional[float] = None) -> int:
+        """
+        Count results in a range without visiting them.
+
+        Args:
+            minimum: Smallest result to include (None for no lower bound)
+            maximum: Largest result to include (None for no upper bound)
+
+        Returns:
+            Number of indexed results in the range
+        """
+        first = (0, 0) if minimum is None else self._locate(minimum, right=False)
+        last = (len(self._maxes), 0) if maximum is None else self._locate(maximum, right=True)
+        if last <= first:
+            return 0
+        (first_block, first_pos), (last_block, last_pos) = first, last
+        between = sum(map(len, self._values[first_block:last_block]))
+        return between - first_pos + last_pos
+
+    def irange(self, minimum: Optional[float] = None,
+               maximum: Optional[float] = None) -> Iterator[int]:
+        """
+        Iterate over sequence numbers of results in a range.
+
+        Args:
+            minimum: Smallest result to include (None for no lower bound)
+            maximum: Largest result to include (None for no upper bound)
+
+        Yields:
+            Sequence numbers in result order
+        """
+        if minimum is None:
+            block, position = 0, 0
+        else:
+            block = bisect_left(self._maxes, minimum)
+            if block == len(self._maxes):
+                return
+            position = bisect_left(self._values[block], minimum)
+
+        for values, seqs in zip(self._values[block:], self._seqs[block:]):
+            end = len(values) if maximum is None else bisect_right(values, maximum, position)
+            yield from seqs[position:end]
+            if end < len(values):
+                return
+            position = 0
+
+    def __len__(self) -> int:
+        return self._size
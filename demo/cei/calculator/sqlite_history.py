@@ -0,0 +1,484 @@
+"""
+SQLite-backed calculation history.
+
+SqliteHistoryManager has the same API as HistoryManager but keeps entries in
+a SQLite database, so history survives restarts, can be shared between
+processes and scales to tens of millions of rows. The database runs in WAL
+mode so readers never block the writer. New entries are buffered and
+written in one transaction per batch; a partial batch is written after
+flush_interval seconds and at exit, so an idle process neither hides nor
+loses entries. Timestamps and results are indexed for query(), and search
+is served by an FTS5 trigram index.
+
+Rows are numbered by id without gaps: ids are assigned in order and only the
+oldest rows (or all of them) are ever deleted. An entry's position is
+therefore its id minus the smallest id, so indexing and paging seek by id
+instead of skipping rows with OFFSET.
+"""
+from contextlib import contextmanager
+from typing import List, Optional, Sequence
+from datetime import datetime
+import atexit
+import json
+import math
+import os
+import sqlite3
+import threading
+from calculator.history import HistoryEntry
+
+
+DEFAULT_BATCH_SIZE = 100
+
+# Seconds a buffered entry may wait for the rest of its batch
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Trigram FTS needs at least this many characters to use the index
+MIN_FTS_QUERY = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    expression TEXT NOT NULL,
+    result REAL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history(timestamp);
+CREATE INDEX IF NOT EXISTS history_result ON history(result);
+"""
+
+# Search text for results is written from Python so it matches str(result)
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts
+    USING fts5(expression, result_text, tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    DELETE FROM history_fts WHERE rowid = old.id;
+END;
+"""
+
+_COLUMNS = "expression, result, timestamp"
+
+
+def _row_to_entry(row) -> HistoryEntry:
+    expression, result, timestamp = row
+    # SQLite stores NaN as NULL
+    return HistoryEntry(expression, math.nan if result is None else result,
+                        datetime.fromisoformat(timestamp))
+
+
+def _timestamp_text(timestamp: datetime) -> str:
+    """Format a timestamp as stored, so text order matches time order."""
+    return timestamp.isoformat(timespec='microseconds')
+
+
+def _fts_phrase(query: str) -> str:
+    """Quote a query as an FTS5 phrase so operators in it are literal."""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _like_pattern(query: str) -> str:
+    """Escape a query for a LIKE substring match."""
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class SqliteHistoryManager:
+    """
+    Manages calculation history in a SQLite database.
+
+    Reads always see entries that are still waiting in the insert batch.
+    """
+
+    def __init__(self, database: str = ':memory:', max_entries: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL):
+        """
+        Open (or create) a history database.
+
+        Args:
+            database: Database file path, or ':memory:'
+            max_entries: Maximum number of entries to keep (None for no limit)
+            batch_size: Entries buffered before they are written in one
+                transaction
+            flush_interval: Seconds after which a partial batch is written
+                on a timer thread (None to wait for a full batch, flush()
+                or close())
+
+        Raises:
+            ValueError: If flush_interval is negative
+        """
+        if flush_interval is not None and flush_interval < 0:
+            raise ValueError("Flush interval must be non-negative")
+        self.database = os.fspath(database)
+        self.max_entries = max_entries
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        # Last exception raised by a timed flush, if any
+        self.error: Optional[BaseException] = None
+        self._pending: List[HistoryEntry] = []
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+
+        # Transactions are managed explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.database, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 or the trigram tokenizer (< 3.34)
+            self.has_fts = False
+        # Write whatever is still buffered if the process exits without close()
+        atexit.register(self.close)
+
+    def add_entry(self, expression: str, result: float) -> None:
+        """
+        Add a new calculation to history.
+
+        Args:
+            expression: The mathematical expression
+            result: The calculated result
+        """
+        with self._lock:
+            self._pending.append(HistoryEntry(expression, result))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None and self.flush_interval is not None:
+                self._start_timer()
+
+    def flush(self) -> None:
+        """Write buffered entries in one transaction."""
+        with self._lock:
+            self._cancel_timer()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            try:
+                with self._transaction():
+                    self._insert(pending)
+            except BaseException:
+                # Keep the batch so a later flush can retry it
+                self._pending[:0] = pending
+                raise
+
+    def _start_timer(self) -> None:
+        self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except Exception as exc:
+                # Keep the entries pending and try again after another interval
+                self.error = exc
+                if self._pending:
+                    self._start_timer()
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _insert(self, entries: Sequence[HistoryEntry]) -> None:
+        """Insert entries inside the current transaction."""
+        conn = self._conn
+        # Ids are assigned here so the FTS rows can share them
+        first_id = conn.execute("SELECT coalesce(max(id), 0) + 1 FROM history").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO history (id, expression, result, timestamp) VALUES (?, ?, ?, ?)",
+            [(first_id + i, e.expression, e.result, _timestamp_text(e.timestamp))
+             for i, e in enumerate(entries)]
+        )
+        if self.has_fts:
+            conn.executemany(
+                "INSERT INTO history_fts (rowid, expression, result_text) VALUES (?, ?, ?)",
+                [(first_id + i, e.expression, str(e.result)) for i, e in enumerate(entries)]
+            )
+        if self.max_entries is not None:
+            self._trim()
+
+    def _trim(self) -> None:
+        """Delete all but the newest max_entries rows."""
+        self._conn.execute(
+            "DELETE FROM history WHERE id <= (SELECT max(id) FROM history) - ?",
+            (max(0, self.max_entries),)
+        )
+
+    def _id_range(self):
+        """Return (smallest id, largest id), or (None, None) if empty."""
+        # Separate subqueries, so each is one seek on the rowid b-tree
+        return self._conn.execute(
+            "SELECT (SELECT min(id) FROM history), (SELECT max(id) FROM history)"
+        ).fetchone()
+
+    def get_history(self, limit: Optional[int] = None, offset: int = 0) -> List[HistoryEntry]:
+        """
+        Retrieve a page of calculation history.
+
+        Args:
+            limit: Maximum number of entries to return (None for all)
+            offset: Number of most recent entries to skip, for paging
+                backwards through history
+
+        Returns:
+            List of history entries, most recent last
+        """
+        if limit is not None and limit <= 0:
+            return []
+        with self._lock:
+            self.flush()
+            _, last_id = self._id_range()
+            if last_id is None:
+                return []
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history WHERE id <= ? ORDER BY id DESC LIMIT ?",
+                (last_id - max(0, offset), -1 if limit is None else limit)
+            ).fetchall()
+        rows.reverse()
+        return [_row_to_entry(row) for row in rows]
+
+    def query(self, result_min: Optional[float] = None, result_max: Optional[float] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: Optional[int] = None) -> List[HistoryEntry]:
+        """
+        Find entries by result range and/or time range.
+
+        Served by the result and timestamp indexes; SQLite picks the more
+        selective one when both ranges are given.
+
+        Args:
+            result_min: Smallest result to include
+            result_max: Largest result to include
+            since: Earliest timestamp to include
+            until: Timestamps before this are included (exclusive)
+            limit: Return at most this many of the most recent matches
+
+        Returns:
+            Matching entries, most recent last
+        """
+        if limit is not None and limit <= 0:
+            return []
+        conditions = []
+        params: list = []
+        if result_min is not None:
+            conditions.append("result >= ?")
+            params.append(result_min)
+        if result_max is not None:
+            conditions.append("result <= ?")
+            params.append(result_max)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_timestamp_text(since))
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(_timestamp_text(until))
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        params.append(-1 if limit is None else limit)
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history {where}ORDER BY id DESC LIMIT ?", params
+            ).fetchall()
+        rows.reverse()
+        return [_row_to_entry(row) for row in rows]
+
+    def get_recent(self, count: int = 10) -> List[HistoryEntry]:
+        """
+        Get the most recent calculations.
+
+        Args:
+            count: Number of recent entries to return
+
+        Returns:
+            List of recent history entries
+        """
+        return self.get_history(limit=count)
+
+    def clear_history(self) -> None:
+        """Clear all history entries."""
+        with self._lock:
+            self._pending.clear()
+            self._cancel_timer()
+            with self._transaction():
+                self._delete_all()
+
+    def _delete_all(self) -> None:
+        """Delete every row inside the current transaction."""
+        self._conn.execute("DELETE FROM history")
+        if self.has_fts:
+            self._conn.execute("DELETE FROM history_fts")
+
+    def is_empty(self) -> bool:
+        """Check if history is empty."""
+        return self.size() == 0
+
+    def size(self) -> int:
+        """Get the number of entries in history."""
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT count(*) FROM history").fetchone()[0]
+
+    def search(self, query: str) -> List[HistoryEntry]:
+        """
+        Search history for entries containing the query.
+
+        Queries of three or more characters use the FTS5 trigram index;
+        shorter ones fall back to a LIKE scan of the search table.
+
+        Args:
+            query: Search string (case-insensitive)
+
+        Returns:
+            List of matching history entries
+        """
+        with self._lock:
+            self.flush()
+            if not self.has_fts:
+                return self._search_scan(query)
+            if len(query) >= MIN_FTS_QUERY:
+                ids = "SELECT rowid FROM history_fts WHERE history_fts MATCH ?"
+                params = (_fts_phrase(query),)
+            else:
+                ids = ("SELECT rowid FROM history_fts WHERE expression LIKE ?1 ESCAPE '\\' "
+                       "OR result_text LIKE ?1 ESCAPE '\\'")
+                params = (_like_pattern(query),)
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history WHERE id IN ({ids}) ORDER BY id", params
+            ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def _search_scan(self, query: str) -> List[HistoryEntry]:
+        """Search without FTS5, matching HistoryManager.search."""
+        query = query.lower()
+        rows = self._conn.execute(f"SELECT {_COLUMNS} FROM history ORDER BY id")
+        entries = (_row_to_entry(row) for row in rows)
+        return [
+            entry for entry in entries
+            if query in entry.expression.lower() or query in str(entry.result).lower()
+        ]
+
+    def get_by_index(self, index: int) -> Optional[HistoryEntry]:
+        """
+        Get history entry by index.
+
+        Args:
+            index: Index in history (negative indices supported)
+
+        Returns:
+            HistoryEntry or None if index out of range
+        """
+        with self._lock:
+            self.flush()
+            first_id, last_id = self._id_range()
+            if first_id is None:
+                return None
+            row_id = first_id + index if index >= 0 else last_id + index + 1
+            if not first_id <= row_id <= last_id:
+                return None
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history WHERE id = ?", (row_id,)
+            ).fetchone()
+        return _row_to_entry(row)
+
+    def save_to_file(self, filepath: str) -> None:
+        """
+        Export history to a JSON file in the HistoryManager format.
+
+        Args:
+            filepath: Path to save file
+        """
+        data = {
+            'max_entries': self.max_entries,
+            'history': [entry.to_dict() for entry in self.get_history()]
+        }
+
+        with open(filepath, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def load_from_file(self, filepath: str) -> None:
+        """
+        Replace history with the contents of a JSON file.
+
+        The old history is deleted and the file's entries inserted in one
+        transaction, so a failure leaves the history unchanged.
+
+        Args:
+            filepath: Path to load file
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            json.JSONDecodeError: If file is not valid JSON
+        """
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+
+        entries = [HistoryEntry.from_dict(entry_data) for entry_data in data.get('history', [])]
+        with self._lock:
+            previous_max = self.max_entries
+            self.max_entries = data.get('max_entries', self.max_entries)
+            try:
+                with self._transaction():
+                    self._delete_all()
+                    if entries:
+                        self._insert(entries)
+            except BaseException:
+                self.max_entries = previous_max
+                raise
+            self._pending.clear()
+            self._cancel_timer()
+
+    def format_history_display(self, limit: Optional[int] = None) -> str:
+        """
+        Format history for text display.
+
+        Args:
+            limit: Maximum number of entries to display
+
+        Returns:
+            Formatted string of history entries
+        """
+        entries = self.get_history(limit)
+        if not entries:
+            return "No calculation history"
+
+        lines = ["Calculation History:", "-" * 40]
+        for i, entry in enumerate(entries, 1):
+            time_str = entry.timestamp.strftime("%H:%M:%S")
+            lines.append(f"{i}. [{time_str}] {entry.format_display()}")
+
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        """Write buffered entries and close the database."""
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._closed = True
+            self._conn.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,186 @@
+"""
+Streaming evaluation for shell pipelines.
+
+Lines are read lazily and pushed through a generator pipeline, and output
+is written in large blocks instead of one write per result, so memory use
+is constant regardless of input size.
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import csv
+import json
+import math
+import sys
+from calculator.batch import BatchError, BatchResult, iter_evaluated
+
+
+OUTPUT_FORMATS = ('plain', 'ndjson', 'csv')
+
+# Output is flushed once this many characters are buffered
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+
+def read_expressions(source: TextIO) -> Iterator[str]:
+    """
+    Lazily read one expression per line.
+
+    Blank and whitespace-only lines are skipped rather than evaluated.
+
+    Args:
+        source: Text stream to read from
+
+    Yields:
+        Each non-blank line without its line ending
+    """
+    for line in source:
+        if line.strip():
+            yield line.rstrip('\r\n')
+
+
+def evaluate_lines(parser, expressions: Iterable[str]) -> Iterator[Tuple[str, BatchResult]]:
+    """
+    Evaluate expressions one at a time as they arrive.
+
+    Args:
+        parser: ExpressionParser to use
+        expressions: Iterable of expression strings
+
+    Yields:
+        (expression, result) pairs; result is a float or BatchError
+    """
+    parse = parser.parse
+    for index, expression in enumerate(expressions):
+        try:
+            yield expression, parse(expression)
+        except (ValueError, ZeroDivisionError) as e:
+            yield expression, BatchError(index, expression, type(e).__name__, str(e))
+
+
+def _json_number(value: float):
+    """JSON has no literal for infinity or NaN, so write those as strings."""
+    return value if math.isfinite(value) else str(value)
+
+
+def _format_plain(expression: str, result: BatchResult) -> str:
+    if isinstance(result, BatchError):
+        return f"Error: {result.message}\n"
+    return f"{result:.10g}\n"
+
+
+def _format_ndjson(expression: str, result: BatchResult) -> str:
+    if isinstance(result, BatchError):
+        record = {'expression': expression, 'error': result.message,
+                  'error_type': result.error_type}
+    else:
+        record = {'expression': expression, 'result': _json_number(result)}
+    return json.dumps(record) + "\n"
+
+
+FORMATTERS: Dict[str, Callable[[str, BatchResult], str]] = {
+    'plain': _format_plain,
+    'ndjson': _format_ndjson,
+}
+
+
+class _BlockWriter:
+    """Collects text and writes it to the output in large blocks."""
+
+    def __init__(self, output: TextIO, block_size: int):
+        self.output = output
+        self.block_size = block_size
+        self.pieces: List[str] = []
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        self.pieces.append(text)
+        self.size += len(text)
+        if self.size >= self.block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pieces:
+            self.output.write(''.join(self.pieces))
+            self.pieces.clear()
+            self.size = 0
+        self.output.flush()
+
+
+def write_results(results: Iterable[Tuple[str, BatchResult]], output: TextIO,
+                  fmt: str = 'plain', block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    """
+    Format results and write them in blocks.
+
+    'plain' prints results rounded to 10 significant digits for reading.
+    'ndjson' and 'csv' are for other programs: they keep full float
+    precision (the shortest text that reads back as the same float) and
+    give each error's type as well as its message.
+
+    Args:
+        results: (expression, result) pairs
+        output: Text stream to write to
+        fmt: 'plain', 'ndjson' or 'csv'
+        block_size: Characters buffered before each write
+
+    Returns:
+        Number of results that were errors
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid format: {fmt}. Valid formats: {', '.join(OUTPUT_FORMATS)}")
+
+    writer = _BlockWriter(output, block_size)
+    errors = 0
+
+    if fmt == 'csv':
+        rows = csv.writer(writer, lineterminator='\n')
+        rows.writerow(['expression', 'result', 'error', 'error_type'])
+        for expression, result in results:
+            if isinstance(result, BatchError):
+                errors += 1
+                rows.writerow([expression, '', result.message, result.error_type])
+            else:
+                # Full precision, like ndjson; only plain output is for reading
+                rows.writerow([expression, repr(result), '', ''])
+    else:
+        format_line = FORMATTERS[fmt]
+        write = writer.write
+        for expression, result in results:
+            if isinstance(result, BatchError):
+                errors += 1
+            write(format_line(expression, result))
+
+    writer.flush()
+    return errors
+
+
+def run_stream(source: Optional[TextIO] = None, output: Optional[TextIO] = None,
+               fmt: str = 'plain', jobs: Optional[int] = None,
+               block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    """
+    Evaluate expressions from a stream and write results to another.
+
+    Args:
+        source: Input text stream (defaults to stdin)
+        output: Output text stream (defaults to stdout)
+        fmt: 'plain', 'ndjson' or 'csv'
+        jobs: Worker processes; None or 1 evaluates each line as it arrives,
+            more evaluates in chunks across a process pool
+        block_size: Characters buffered before each write
+
+    Returns:
+        Number of expressions that failed
+    """
+    from calculator.parser import ExpressionParser
+
+    source = source or sys.stdin
+    output = output or sys.stdout
+    parser = ExpressionParser()
+    expressions = read_expressions(source)
+
+    if jobs and jobs > 1:
+        results = iter_evaluated(parser, expressions, jobs=jobs)
+    else:
+        results = evaluate_lines(parser, expressions)
+
+    return write_results(results, output, fmt, block_size)
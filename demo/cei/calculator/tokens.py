@@ -0,0 +1,34 @@
+"""
+Token definitions shared by the expression parser and compiler.
+"""
+from typing import Union
+from enum import Enum
+
+
+class TokenType(Enum):
+    """Types of tokens in expressions."""
+    NUMBER = "NUMBER"
+    IDENTIFIER = "IDENTIFIER"
+    OPERATOR = "OPERATOR"
+    LEFT_PAREN = "LEFT_PAREN"
+    RIGHT_PAREN = "RIGHT_PAREN"
+
+
+class Token:
+    """Represents a token in the expression."""
+    
+    __slots__ = ('type', 'value')
+    
+    def __init__(self, type_: TokenType, value: Union[str, float]):
+        self.type = type_
+        self.value = value
+    
+    def __repr__(self):
+        return f"Token({self.type}, {self.value})"
+
+
+# Operator and parenthesis tokens carry no per-occurrence data, so one
+# instance of each is shared by every token list.
+OPERATOR_TOKENS = {op: Token(TokenType.OPERATOR, op) for op in '+-*/'}
+LEFT_PAREN_TOKEN = Token(TokenType.LEFT_PAREN, '(')
+RIGHT_PAREN_TOKEN = Token(TokenType.RIGHT_PAREN, ')')
@@ -0,0 +1,147 @@
+"""
+Incrementally maintained trigram index for substring search.
+
+Each three-character substring maps to a posting list of the sequence numbers
+of the items that contain it. Sequence numbers only grow, so every posting
+list is sorted. Adding an item appends to its lists, and evicting the oldest
+item advances the head of its lists. A query is narrowed to the items that
+contain all of its trigrams; callers then verify the actual substring match.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from array import array
+from bisect import bisect_left
+import sys
+
+
+# Queries shorter than this have no trigrams and cannot use the index
+MIN_QUERY_LENGTH = 3
+
+# Evicted heads are trimmed from a posting list once they reach this size
+# and make up at least half of it
+_TRIM_THRESHOLD = 256
+
+# Stop intersecting once this few candidates remain; verifying is cheaper
+_VERIFY_THRESHOLD = 32
+
+# Binary-search candidates into a posting list this many times longer
+# instead of intersecting sets
+_BISECT_RATIO = 32
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the distinct three-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _field_trigrams(texts: Iterable[str]) -> Set[str]:
+    """Return the distinct trigrams of several fields (none spanning two)."""
+    return {text[i:i + 3] for text in texts for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Maps trigrams to sorted posting lists of sequence numbers."""
+
+    def __init__(self):
+        # trigram -> [array of sequence numbers, index of the first live one]
+        self._postings: Dict[str, list] = {}
+
+    def add(self, seq: int, texts: Iterable[str]) -> None:
+        """
+        Index an item.
+
+        Args:
+            seq: Sequence number, larger than any already indexed
+            texts: Lowercased fields to index
+        """
+        postings = self._postings
+        for trigram in _field_trigrams(texts):
+            posting = postings.get(trigram)
+            if posting is None:
+                postings[trigram] = posting = [array('q'), 0]
+            posting[0].append(seq)
+
+    def remove_oldest(self, seq: int, texts: Iterable[str]) -> None:
+        """
+        Remove the oldest indexed item.
+
+        Args:
+            seq: Sequence number of the item being evicted
+            texts: The same fields it was indexed with
+        """
+        postings = self._postings
+        for trigram in _field_trigrams(texts):
+            posting = postings.get(trigram)
+            if posting is None:
+                continue
+            items, head = posting
+            if head >= len(items) or items[head] != seq:
+                continue
+            head += 1
+            if head == len(items):
+                del postings[trigram]
+            elif head >= _TRIM_THRESHOLD and head * 2 >= len(items):
+                del items[:head]
+                posting[1] = 0
+            else:
+                posting[1] = head
+
+    def candidates(self, query: str) -> Optional[List[int]]:
+        """
+        Find items that contain every trigram of a query.
+
+        Args:
+            query: Lowercased search string
+
+        Returns:
+            Sorted sequence numbers to verify, or None if the query is too
+            short to use the index
+        """
+        if len(query) < MIN_QUERY_LENGTH:
+            return None
+
+        postings = []
+        for trigram in trigrams(query):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=lambda p: len(p[0]) - p[1])
+
+        items, head = postings[0]
+        result = items[head:]
+        for items, head in postings[1:]:
+            if len(result) <= _VERIFY_THRESHOLD:
+                break
+            end = len(items)
+            if len(result) * _BISECT_RATIO < end - head:
+                # Few candidates against a long list: binary search each one
+                kept = array('q')
+                for seq in result:
+                    position = bisect_left(items, seq, head, end)
+                    if position < end and items[position] == seq:
+                        kept.append(seq)
+                        head = position
+                result = kept
+            else:
+                result = sorted(set(result).intersection(items[head:]))
+        return list(result)
+
+    def clear(self) -> None:
+        """Remove everything from the index."""
+        self._postings = {}
+
+    def __len__(self) -> int:
+        """Number of distinct trigrams indexed."""
+        return len(self._postings)
+
+    def memory_usage(self) -> int:
+        """
+        Estimate the memory held by the index.
+
+        Returns:
+            Approximate size in bytes of the dictionary, keys and posting lists
+        """
+        total = sys.getsizeof(self._postings)
+        for trigram, posting in self._postings.items():
+            total += sys.getsizeof(trigram) + sys.getsizeof(posting) + sys.getsizeof(posting[0])
+        return total
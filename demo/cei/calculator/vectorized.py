@@ -0,0 +1,275 @@
+"""
+Vectorized evaluation of compiled programs over NumPy arrays.
+
+Each opcode is applied once to whole arrays, with NumPy broadcasting between
+inputs of different shapes. Scalar semantics match calculator.core except for
+division by zero, which follows a per-call policy instead of raising for the
+first offending element.
+
+Blocked evaluation processes the inputs in cache-sized chunks and keeps
+intermediates in a small pool of scratch buffers, so extra memory is bounded
+by chunk_size * program depth instead of one full-size temporary per node.
+"""
+from typing import Any, Mapping, Optional
+from calculator.program import (
+    Program, OP_CONST, OP_LOAD, OP_ADD, OP_SUB, OP_MUL, lookup_variable
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+
+ZERO_DIVISION_POLICIES = ('nan', 'mask', 'raise')
+
+# 32768 float64 values = 256 KiB per scratch buffer; a few of them fit in L2
+DEFAULT_CHUNK_SIZE = 32768
+
+
+def require_numpy() -> None:
+    """
+    Ensure NumPy is available.
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    if np is None:
+        raise ImportError("NumPy is required for vectorized evaluation")
+
+
+def check_policy(zero_division: str) -> None:
+    """
+    Validate a division-by-zero policy name.
+
+    Raises:
+        ValueError: If the policy is unknown
+    """
+    if zero_division not in ZERO_DIVISION_POLICIES:
+        raise ValueError(
+            f"Invalid zero_division policy: {zero_division}. "
+            f"Valid policies: {', '.join(ZERO_DIVISION_POLICIES)}"
+        )
+
+
+def evaluate_program_vectorized(program: Program, arrays: Mapping[str, Any],
+                                zero_division: str = 'nan'):
+    """
+    Evaluate a program over arrays.
+
+    Args:
+        program: Compiled program
+        arrays: Values (arrays or scalars) for the program's variable names
+        zero_division: 'nan', 'mask' or 'raise'
+
+    Returns:
+        numpy.ndarray of results, or numpy.ma.MaskedArray for 'mask'
+
+    Raises:
+        ValueError: If a variable has no value or the policy is unknown
+        ZeroDivisionError: If zero_division='raise' and a divisor is zero
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    check_policy(zero_division)
+
+    values = [np.asarray(lookup_variable(arrays, name), dtype=np.float64)
+              for name in program.names]
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    next_constant = iter(program.constants).__next__
+    next_value = map(values.__getitem__, program.name_refs).__next__
+    zero_mask = None
+
+    for op in program.code:
+        if op == OP_CONST:
+            push(np.float64(next_constant()))
+        elif op == OP_LOAD:
+            push(next_value())
+        else:
+            b = pop()
+            a = pop()
+            if op == OP_ADD:
+                push(np.add(a, b))
+            elif op == OP_SUB:
+                push(np.subtract(a, b))
+            elif op == OP_MUL:
+                push(np.multiply(a, b))
+            else:
+                zero = b == 0
+                if not zero.any():
+                    push(np.divide(a, b))
+                    continue
+                if zero_division == 'raise':
+                    raise ZeroDivisionError("Division by zero")
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    quotient = np.divide(a, b)
+                # 0/0 and x/0 are both undefined, like calculator.core.divide
+                push(np.where(zero, np.nan, quotient))
+                zero_mask = zero if zero_mask is None else zero_mask | zero
+
+    result = np.asarray(stack[0])
+    if zero_division == 'mask':
+        mask = False if zero_mask is None else np.broadcast_to(zero_mask, result.shape)
+        return np.ma.masked_array(result, mask=mask)
+    return result
+
+
+def evaluate_program_blocked(program: Program, arrays: Mapping[str, Any], out=None,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             zero_division: str = 'nan'):
+    """
+    Evaluate a program chunk by chunk into an output array.
+
+    Array inputs must all have the same shape; scalars are broadcast.
+
+    Args:
+        program: Compiled program
+        arrays: Values (arrays or scalars) for the program's variable names
+        out: Optional C-contiguous float64 array to write results into
+        chunk_size: Number of elements processed per block
+        zero_division: 'nan', 'mask' or 'raise'
+
+    Returns:
+        The output array, or a numpy.ma.MaskedArray over it for 'mask'
+
+    Raises:
+        ValueError: If inputs have different shapes, out does not match,
+            a variable has no value or the policy is unknown
+        ZeroDivisionError: If zero_division='raise' and a divisor is zero
+        ImportError: If NumPy is not installed
+    """
+    require_numpy()
+    check_policy(zero_division)
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be positive")
+
+    shape = None
+    values = []
+    for name in program.names:
+        value = np.asarray(lookup_variable(arrays, name), dtype=np.float64)
+        if value.ndim == 0:
+            values.append(float(value))
+            continue
+        if shape is None:
+            shape = value.shape
+        elif value.shape != shape:
+            raise ValueError(
+                f"Blocked evaluation needs inputs of one shape: {name} has "
+                f"{value.shape}, expected {shape}"
+            )
+        values.append(value.reshape(-1))
+    if shape is None:
+        shape = ()
+
+    if out is None:
+        out = np.empty(shape, dtype=np.float64)
+    elif out.shape != shape or out.dtype != np.float64 or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a C-contiguous float64 array of shape {shape}")
+    flat_out = out.reshape(-1)
+    mask = np.zeros(flat_out.shape, dtype=bool) if zero_division == 'mask' else None
+
+    total = flat_out.shape[0]
+    chunk_size = min(chunk_size, max(total, 1))
+    pool = [np.empty(chunk_size, dtype=np.float64) for _ in range(program.max_depth)]
+
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        chunk_mask = mask[start:stop] if mask is not None else None
+        _evaluate_chunk(program, values, start, stop, pool, flat_out[start:stop],
+                        zero_division, chunk_mask)
+
+    if mask is not None:
+        return np.ma.masked_array(out, mask=mask.reshape(shape))
+    return out
+
+
+def _evaluate_chunk(program: Program, values: list, start: int, stop: int, pool: list,
+                    out, zero_division: str, mask: Optional[Any]) -> None:
+    """Evaluate one block into out, using pool buffers for intermediates."""
+    size = stop - start
+    free = list(range(len(pool)))
+    # Stack entries are (value, slot); slot is the owned pool index or None
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    next_constant = iter(program.constants).__next__
+    next_ref = iter(program.name_refs).__next__
+
+    for op in program.code:
+        if op == OP_CONST:
+            push((next_constant(), None))
+            continue
+        if op == OP_LOAD:
+            value = values[next_ref()]
+            push((value if isinstance(value, float) else value[start:stop], None))
+            continue
+
+        b, b_slot = pop()
+        a, a_slot = pop()
+        if a_slot is None and b_slot is None and isinstance(a, float) and isinstance(b, float):
+            # Constant subexpression: stays a Python float, no buffer needed
+            push((_scalar_op(op, a, b, zero_division, mask), None))
+            continue
+
+        if a_slot is not None:
+            slot = a_slot
+            if b_slot is not None:
+                free.append(b_slot)
+        elif b_slot is not None:
+            slot = b_slot
+        else:
+            slot = free.pop()
+        dest = pool[slot][:size]
+
+        if op == OP_ADD:
+            np.add(a, b, out=dest)
+        elif op == OP_SUB:
+            np.subtract(a, b, out=dest)
+        elif op == OP_MUL:
+            np.multiply(a, b, out=dest)
+        else:
+            _divide_into(a, b, dest, zero_division, mask)
+        push((dest, slot))
+
+    result, _ = stack[0]
+    np.copyto(out, result)
+
+
+def _scalar_op(op: int, a: float, b: float, zero_division: str,
+               mask: Optional[Any]) -> float:
+    """Apply an opcode to two Python floats."""
+    if op == OP_ADD:
+        return a + b
+    if op == OP_SUB:
+        return a - b
+    if op == OP_MUL:
+        return a * b
+    if b == 0:
+        if zero_division == 'raise':
+            raise ZeroDivisionError("Division by zero")
+        if mask is not None:
+            mask[:] = True
+        return float('nan')
+    return a / b
+
+
+def _divide_into(a, b, dest, zero_division: str, mask: Optional[Any]) -> None:
+    """Divide into dest, applying the division-by-zero policy."""
+    zero = np.equal(b, 0)
+    if not zero.any():
+        np.divide(a, b, out=dest)
+        return
+    if zero_division == 'raise':
+        raise ZeroDivisionError("Division by zero")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(a, b, out=dest)
+    if zero.ndim == 0:
+        dest.fill(np.nan)
+        if mask is not None:
+            mask[:] = True
+    else:
+        dest[zero] = np.nan
+        if mask is not None:
+            mask |= zero
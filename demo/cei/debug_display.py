@@ -42,17 +42,17 @@ def test_calculator_display():
     calc = CalculatorGUI(root)
     
     # Override methods to add detailed logging
-    original_append = calc._append_to_expression
+    original_press = calc._press
     def debug_append(value):
         print(f"\n=== BEFORE APPEND ===")
-        print(f"Current expression: '{calc.current_expression}'")
+        print(f"Current expression: '{calc.controller.expression}'")
         print(f"Expression var: '{calc.expression_var.get()}'")
         print(f"Expression display state: {calc.expression_display['state']}")
         
-        original_append(value)
+        original_press(value)
         
         print(f"\n=== AFTER APPEND ===")
-        print(f"Current expression: '{calc.current_expression}'")
+        print(f"Current expression: '{calc.controller.expression}'")
         print(f"Expression var: '{calc.expression_var.get()}'")
         print(f"Display widget exists: {calc.expression_display.winfo_exists()}")
         print(f"Display widget visible: {calc.expression_display.winfo_viewable()}")
@@ -69,11 +69,11 @@ def test_calculator_display():
         except:
             print("Could not get Entry content")
     
-    calc._append_to_expression = debug_append
+    calc._press = debug_append
     
     # Test programmatically
     print("\nClicking '5' programmatically...")
-    calc._append_to_expression('5')
+    calc._press('5')
     
     root.mainloop()
 
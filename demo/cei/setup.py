@@ -9,5 +9,8 @@ setup(
             'calculator=calculator.__main__:main',
         ],
     },
+    extras_require={
+        'vectorized': ['numpy'],
+    },
     python_requires='>=3.6',
 )
\ No newline at end of file
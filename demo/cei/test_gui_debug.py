@@ -66,13 +66,13 @@ def test_calculator_gui():
         
         # Test if components exist
         print(f"Expression var initialized: {hasattr(calc, 'expression_var')}")
-        print(f"Current expression: '{calc.current_expression}'")
-        print(f"Parser initialized: {hasattr(calc, 'parser')}")
+        print(f"Current expression: '{calc.controller.expression}'")
+        print(f"Controller initialized: {hasattr(calc, 'controller')}")
         
         # Try to manually trigger a button click
         print("\nManually adding '5' to expression...")
-        calc._append_to_expression('5')
-        print(f"Expression after adding '5': '{calc.current_expression}'")
+        calc._press('5')
+        print(f"Expression after adding '5': '{calc.controller.expression}'")
         print(f"Display value: '{calc.expression_var.get()}'")
         
         root.mainloop()
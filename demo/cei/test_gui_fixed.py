@@ -4,30 +4,39 @@
 import sys
 sys.path.insert(0, '.')
 
-print("Starting GUI Calculator with fixes...")
-print("- Display boxes now use tk.Entry for better compatibility")
-print("- Button text changed to black for better visibility")
-print("- Force update added to ensure display refreshes")
-print("=" * 50)
-
 from calculator.gui import CalculatorGUI
 import tkinter as tk
 
-root = tk.Tk()
-calc = CalculatorGUI(root)
 
-# Test programmatically
-print("\nProgrammatic test:")
-print("Setting expression to '123'...")
-calc.expression_var.set("123")
-calc.expression_display.update()
-print(f"Expression display shows: '{calc.expression_var.get()}'")
+def main():
+    """Open the GUI, click a few buttons programmatically and run it."""
+    print("Starting GUI Calculator with fixes...")
+    print("- Display boxes now use tk.Entry for better compatibility")
+    print("- Button text changed to black for better visibility")
+    print("- Force update added to ensure display refreshes")
+    print("=" * 50)
+
+    root = tk.Tk()
+    calc = CalculatorGUI(root)
+
+    # Test programmatically
+    print("\nProgrammatic test:")
+    print("Setting expression to '123'...")
+    calc.expression_var.set("123")
+    calc.expression_display.update()
+    print(f"Expression display shows: '{calc.expression_var.get()}'")
+
+    print("\nClicking buttons: 4 + 5 =")
+    calc._press('4')
+    calc._press('+')
+    calc._press('5')
+    calc._press('=')
+
+    print("\nGUI Calculator is running. Try clicking buttons!")
+    root.mainloop()
 
-print("\nClicking buttons: 4 + 5 =")
-calc._append_to_expression('4')
-calc._append_to_expression('+')
-calc._append_to_expression('5')
-calc._calculate()
 
-print("\nGUI Calculator is running. Try clicking buttons!")
-root.mainloop()
\ No newline at end of file
+# The calculator evaluates in spawned worker processes, which re-import this
+# script; without the guard each worker would open its own window
+if __name__ == "__main__":
+    main()
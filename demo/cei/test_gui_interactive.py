@@ -16,28 +16,17 @@ def test_gui_with_logging():
     # Create calculator
     calc = CalculatorGUI(root)
     
-    # Override _append_to_expression to add logging
-    original_append = calc._append_to_expression
+    # Override _press to add logging
+    original_press = calc._press
     def logged_append(value):
         print(f"Button pressed: {value}")
-        print(f"Before - Expression: '{calc.current_expression}'")
-        original_append(value)
-        print(f"After - Expression: '{calc.current_expression}'")
+        print(f"Before - Expression: '{calc.controller.expression}'")
+        original_press(value)
+        print(f"After - Expression: '{calc.controller.expression}'")
         print(f"Display shows: '{calc.expression_var.get()}'")
         print("-" * 40)
     
-    calc._append_to_expression = logged_append
-    
-    # Override _calculate to add logging
-    original_calculate = calc._calculate
-    def logged_calculate():
-        print("Calculate button pressed!")
-        print(f"Expression to calculate: '{calc.current_expression}'")
-        original_calculate()
-        print(f"Result display: '{calc.result_var.get()}'")
-        print("=" * 40)
-    
-    calc._calculate = logged_calculate
+    calc._press = logged_append
     
     print("GUI Calculator Test Started")
     print("Click buttons and watch the console for debug output")
@@ -46,16 +35,16 @@ def test_gui_with_logging():
     # Test programmatically
     print("\nProgrammatic test - simulating button clicks:")
     print("Clicking: 2")
-    calc._append_to_expression('2')
+    calc._press('2')
     
     print("Clicking: +")
-    calc._append_to_expression('+')
+    calc._press('+')
     
     print("Clicking: 3")
-    calc._append_to_expression('3')
+    calc._press('3')
     
     print("Clicking: =")
-    calc._calculate()
+    calc._press("=")
     
     root.mainloop()
 
@@ -0,0 +1,167 @@
+"""
+Tests for debounced background history saving.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import pytest
+from calculator.autosave import AutoSaver
+from calculator.history import HistoryManager
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestAutoSaver:
+    """Test cases for AutoSaver."""
+
+    def setup_method(self):
+        """Set up a history manager and a temporary file path."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.json')
+        self.manager = HistoryManager(max_entries=50)
+
+    def teardown_method(self):
+        """Stop autosaving."""
+        self.manager.disable_autosave()
+
+    def _saved_expressions(self):
+        with open(self.path) as f:
+            return [entry['expression'] for entry in json.load(f)['history']]
+
+    def test_burst_coalesced_into_one_save(self):
+        """Test that changes within the debounce interval cause one write."""
+        saver = self.manager.enable_autosave(self.path, interval=0.2)
+
+        for i in range(100):
+            self.manager.add_entry(f"{i}+0", i)
+
+        assert _wait_for(lambda: saver.saves == 1)
+        time.sleep(0.3)
+        assert saver.saves == 1
+        assert not saver.pending
+        assert self._saved_expressions() == [f"{i}+0" for i in range(50, 100)]
+
+    def test_later_changes_saved_again(self):
+        """Test that a change after a save schedules another save."""
+        saver = self.manager.enable_autosave(self.path, interval=0.05)
+        self.manager.add_entry("1+1", 2)
+        assert _wait_for(lambda: saver.saves == 1)
+
+        self.manager.add_entry("2+2", 4)
+
+        assert _wait_for(lambda: saver.saves == 2)
+        assert self._saved_expressions() == ["1+1", "2+2"]
+
+    def test_clear_and_resize_notify(self):
+        """Test that clearing and changing capacity are saved too."""
+        saver = self.manager.enable_autosave(self.path, interval=0.05)
+        self.manager.add_entry("1+1", 2)
+        assert _wait_for(lambda: saver.saves == 1)
+
+        self.manager.clear_history()
+        self.manager.max_entries = 7
+
+        assert _wait_for(lambda: saver.saves == 2)
+        with open(self.path) as f:
+            assert json.load(f) == {'max_entries': 7, 'history': []}
+
+    def test_close_flushes_pending_changes(self):
+        """Test that disabling autosave writes changes still in the interval."""
+        saver = self.manager.enable_autosave(self.path, interval=60)
+        self.manager.add_entry("6*7", 42)
+        assert not os.path.exists(self.path)
+
+        self.manager.disable_autosave()
+
+        assert saver.saves == 1
+        assert self._saved_expressions() == ["6*7"]
+        assert not saver._thread.is_alive()
+
+    def test_flush(self):
+        """Test writing pending changes on demand."""
+        saver = self.manager.enable_autosave(self.path, interval=60)
+        self.manager.add_entry("6*7", 42)
+
+        saver.flush()
+
+        assert self._saved_expressions() == ["6*7"]
+        saver.flush()
+        assert saver.saves == 1
+
+    def test_error_recorded_and_retried(self):
+        """Test that a failed save is reported and kept pending."""
+        missing = os.path.join(self.tmpdir, 'missing', 'history.json')
+        saver = AutoSaver(self.manager, missing, interval=60)
+        self.manager._autosave = saver
+        self.manager.add_entry("1+1", 2)
+
+        saver.flush()
+
+        assert isinstance(saver.error, OSError)
+        assert saver.pending
+        os.mkdir(os.path.dirname(missing))
+        saver.close()
+        assert saver.saves == 1
+        assert os.path.exists(missing)
+
+    def test_negative_interval(self):
+        """Test that a negative interval is rejected."""
+        with pytest.raises(ValueError):
+            self.manager.enable_autosave(self.path, interval=-1)
+
+    def test_concurrent_adds(self):
+        """Test saving while another thread keeps adding entries."""
+        saver = self.manager.enable_autosave(self.path, interval=0)
+
+        def add():
+            for i in range(2000):
+                self.manager.add_entry(f"{i}*1", i)
+
+        worker = threading.Thread(target=add)
+        worker.start()
+        worker.join()
+        self.manager.disable_autosave()
+
+        assert saver.error is None
+        assert self._saved_expressions() == [f"{i}*1" for i in range(1950, 2000)]
+
+
+class TestAtomicSave:
+    """Test cases for atomic writes."""
+
+    def setup_method(self):
+        """Set up a history manager."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.json')
+        self.manager = HistoryManager()
+        self.manager.add_entry("1+1", 2)
+
+    def test_no_temporary_files_left(self):
+        """Test that saving leaves only the target file."""
+        self.manager.save_to_file(self.path)
+        self.manager.save_to_file(self.path)
+
+        assert os.listdir(self.tmpdir) == ['history.json']
+
+    def test_failed_write_keeps_old_file(self):
+        """Test that a save that fails midway does not touch the old file."""
+        self.manager.save_to_file(self.path)
+        with open(self.path) as f:
+            before = f.read()
+        self.manager.add_entry("bad", object())
+
+        with pytest.raises(TypeError):
+            self.manager.save_to_file(self.path)
+
+        with open(self.path) as f:
+            assert f.read() == before
+        assert os.listdir(self.tmpdir) == ['history.json']
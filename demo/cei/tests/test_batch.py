@@ -0,0 +1,88 @@
+"""
+Tests for parallel batch evaluation.
+"""
+import io
+from calculator.parser import ExpressionParser
+from calculator.batch import BatchError, ChunkSizer, run_batch, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE
+
+
+class TestParseMany:
+    """Test cases for ExpressionParser.parse_many."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+        self.expressions = ["3+4", "10/0", "(1+2", "2*3", "", "x+1"] * 50
+    
+    def expected(self):
+        """Results computed one at a time."""
+        results = []
+        for index, expression in enumerate(self.expressions):
+            try:
+                results.append(self.parser.parse(expression))
+            except (ValueError, ZeroDivisionError) as e:
+                results.append(BatchError(index, expression, type(e).__name__, str(e)))
+        return results
+    
+    def test_inline(self):
+        """Test single-process evaluation keeps order and records errors."""
+        assert self.parser.parse_many(self.expressions, jobs=1) == self.expected()
+    
+    def test_process_pool(self):
+        """Test that pooled evaluation returns results in input order."""
+        results = self.parser.parse_many(iter(self.expressions), jobs=2, chunk_size=7)
+        assert results == self.expected()
+    
+    def test_error_records(self):
+        """Test the contents of error records."""
+        results = self.parser.parse_many(["1+1", "5/(3-3)"], jobs=1)
+        assert results[0] == 2
+        error = results[1]
+        assert isinstance(error, BatchError)
+        assert error.index == 1
+        assert error.expression == "5/(3-3)"
+        assert error.error_type == "ZeroDivisionError"
+        assert error.message == "Division by zero"
+    
+    def test_empty_input(self):
+        """Test that an empty batch returns an empty list."""
+        assert self.parser.parse_many([], jobs=2) == []
+
+
+class TestChunkSizer:
+    """Test cases for adaptive chunk sizing."""
+    
+    def test_grows_for_cheap_chunks(self):
+        """Test that fast chunks make the next chunk larger."""
+        sizer = ChunkSizer(256)
+        sizer.update(256, 0.0001)
+        assert sizer.size > 256
+    
+    def test_shrinks_for_expensive_chunks(self):
+        """Test that slow chunks make the next chunk smaller."""
+        sizer = ChunkSizer(4096)
+        sizer.update(4096, 10.0)
+        assert sizer.size < 4096
+    
+    def test_bounds(self):
+        """Test that chunk sizes stay within bounds."""
+        sizer = ChunkSizer(MIN_CHUNK_SIZE)
+        for _ in range(10):
+            sizer.update(sizer.size, 100.0)
+        assert sizer.size == MIN_CHUNK_SIZE
+        for _ in range(40):
+            sizer.update(sizer.size, 0.0)
+        assert sizer.size == MAX_CHUNK_SIZE
+
+
+class TestRunBatch:
+    """Test cases for the --batch command-line mode."""
+    
+    def test_writes_one_line_per_expression(self, tmp_path):
+        """Test batch output lines and error count."""
+        path = tmp_path / "exprs.txt"
+        path.write_text("3+4*2\n10/0\n0.1+0.2\n")
+        output = io.StringIO()
+        errors = run_batch(str(path), jobs=1, output=output)
+        assert errors == 1
+        assert output.getvalue() == "11\nError: Division by zero\n0.3\n"
@@ -0,0 +1,140 @@
+"""
+Tests for columnar history storage.
+"""
+import pytest
+from datetime import datetime, timedelta
+from calculator.columnar import ColumnarRingBuffer, CompactEntry
+from calculator.history import HistoryEntry, HistoryManager
+from tests import test_history
+
+
+class TestCompactEntry:
+    """Test cases for CompactEntry views."""
+    
+    def test_timestamp_is_lazy(self):
+        """Test that the datetime is only built when read."""
+        entry = CompactEntry("3+4", 7.0, 1_700_000_000.0)
+        
+        assert entry._timestamp is None
+        assert entry.timestamp == datetime.fromtimestamp(1_700_000_000.0)
+        assert entry.timestamp is entry.timestamp
+    
+    def test_no_instance_dict(self):
+        """Test that views use __slots__."""
+        entry = CompactEntry.now("3+4", 7)
+        
+        assert not hasattr(entry, '__dict__')
+        assert entry.result == 7.0
+        assert isinstance(entry.result, float)
+    
+    def test_history_entry_methods(self):
+        """Test display and serialization shared with HistoryEntry."""
+        entry = CompactEntry("3+4", 7.0, 1_700_000_000.0)
+        
+        assert entry.format_display() == "3+4 = 7"
+        restored = HistoryEntry.from_dict(entry.to_dict())
+        assert restored.expression == "3+4"
+        assert restored.timestamp == entry.timestamp
+    
+    def test_equality(self):
+        """Test that views of the same data compare equal."""
+        assert CompactEntry("1+1", 2.0, 5.0) == CompactEntry("1+1", 2.0, 5.0)
+        assert CompactEntry("1+1", 2.0, 5.0) != CompactEntry("1+1", 2.0, 6.0)
+
+
+class TestColumnarRingBuffer:
+    """Test cases for ColumnarRingBuffer."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.buffer = ColumnarRingBuffer(3)
+        for i in range(5):
+            self.buffer.append(CompactEntry(f"{i}+1", i + 1.0, float(i)))
+    
+    def test_eviction_returns_view(self):
+        """Test that appending to a full buffer returns the evicted entry."""
+        evicted = self.buffer.append(CompactEntry("9+1", 10.0, 9.0))
+        
+        assert evicted == CompactEntry("2+1", 3.0, 2.0)
+        assert [e.expression for e in self.buffer] == ["3+1", "4+1", "9+1"]
+        assert [e.expression for e in reversed(self.buffer)] == ["9+1", "4+1", "3+1"]
+    
+    def test_indexing_and_views(self):
+        """Test indexed access, sequence numbers and views."""
+        assert self.buffer[0].expression == "2+1"
+        assert self.buffer[-1].expression == "4+1"
+        assert self.buffer.get_seq(3).expression == "3+1"
+        assert [e.result for e in self.buffer.view(-2)] == [4.0, 5.0]
+        with pytest.raises(IndexError):
+            self.buffer[3]
+    
+    def test_accepts_history_entries(self):
+        """Test storing HistoryEntry objects as columns."""
+        timestamp = datetime(2024, 1, 1, 12, 0, 0)
+        self.buffer.append(HistoryEntry("7*6", 42, timestamp))
+        
+        entry = self.buffer[-1]
+        assert isinstance(entry, CompactEntry)
+        assert entry.result == 42.0
+        assert entry.timestamp == timestamp
+    
+    def test_expressions_are_interned(self):
+        """Test that repeated expressions share one string."""
+        buffer = ColumnarRingBuffer(10)
+        for _ in range(3):
+            buffer.append(HistoryEntry("".join(["12", "+", "30"]), 42.0))
+        
+        assert buffer[0].expression is buffer[2].expression
+    
+    def test_resize_and_clear(self):
+        """Test shrinking, growing and clearing the columns."""
+        self.buffer.resize(2)
+        assert [e.expression for e in self.buffer] == ["3+1", "4+1"]
+        
+        self.buffer.resize(4)
+        self.buffer.append(CompactEntry("5+1", 6.0, 5.0))
+        assert [e.result for e in self.buffer] == [4.0, 5.0, 6.0]
+        
+        self.buffer.clear()
+        assert len(self.buffer) == 0
+        assert self.buffer.next_seq == 6
+
+
+class TestColumnarHistoryManager(test_history.TestHistoryManager):
+    """Run the HistoryManager test cases against columnar storage."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.manager = HistoryManager(max_entries=10, storage='columnar')
+    
+    def test_invalid_storage(self):
+        """Test rejecting unknown storage layouts."""
+        with pytest.raises(ValueError, match="Invalid storage"):
+            HistoryManager(storage='rows')
+    
+    def test_entries_are_compact_views(self):
+        """Test that stored entries come back as CompactEntry views."""
+        self.manager.add_entry("3+4", 7.0)
+        
+        assert isinstance(self.manager.get_by_index(0), CompactEntry)
+        assert self.manager.get_by_index(0).timestamp <= datetime.now()
+    
+    def test_search_and_query(self):
+        """Test that indexes work with columnar storage."""
+        for i in range(30):
+            self.manager.add_entry(f"{i}*2", i * 2.0)
+        
+        assert [e.expression for e in self.manager.search("9*2")] == ["29*2"]
+        assert [e.result for e in self.manager.query(result_min=50)] == [50.0, 52.0, 54.0, 56.0, 58.0]
+        recent = self.manager.query(since=datetime.now() - timedelta(minutes=1))
+        assert len(recent) == 10
+    
+    def test_uses_less_memory(self):
+        """Test that columnar storage is smaller than entry objects."""
+        objects = HistoryManager(max_entries=1000)
+        columnar = HistoryManager(max_entries=1000, storage='columnar')
+        for i in range(1000):
+            objects.add_entry(f"{i % 10}+1", i + 1.0)
+            columnar.add_entry(f"{i % 10}+1", i + 1.0)
+        
+        assert columnar.storage_memory() * 4 < objects.storage_memory()
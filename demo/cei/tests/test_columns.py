@@ -0,0 +1,101 @@
+"""
+Tests for out-of-core evaluation over column files.
+"""
+import pytest
+from calculator.parser import ExpressionParser
+
+np = pytest.importorskip("numpy")
+
+from calculator.columns import Column
+
+
+class TestEvaluateFiles:
+    """Test cases for ExpressionParser.evaluate_files."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+    
+    def test_npy_columns(self, tmp_path):
+        """Test evaluating over .npy inputs into a .npy output."""
+        x = np.linspace(0, 10, 1001)
+        y = np.arange(1001, dtype=np.int32)
+        np.save(tmp_path / "x.npy", x)
+        np.save(tmp_path / "y.npy", y)
+        
+        stats = self.parser.evaluate_files(
+            "a*x + y", str(tmp_path / "out.npy"), chunk_rows=100,
+            x=str(tmp_path / "x.npy"), y=str(tmp_path / "y.npy"), a=2
+        )
+        
+        result = np.load(tmp_path / "out.npy")
+        np.testing.assert_array_equal(result, 2 * x + y)
+        assert stats.rows == 1001
+        assert stats.bytes_read == x.nbytes + y.nbytes
+        assert stats.bytes_written == 1001 * 8
+        assert stats.rows_per_second > 0
+    
+    def test_raw_columns(self, tmp_path):
+        """Test evaluating over raw little-endian float64 files."""
+        x = np.arange(50, dtype='<f8')
+        x.tofile(tmp_path / "x.f64")
+        
+        self.parser.evaluate_files("1/x", str(tmp_path / "out.f64"), chunk_rows=7,
+                                   x=str(tmp_path / "x.f64"))
+        
+        result = np.fromfile(tmp_path / "out.f64", dtype='<f8')
+        assert np.isnan(result[0])
+        np.testing.assert_array_equal(result[1:], 1 / x[1:])
+    
+    def test_numpy_scalar_bindings(self, tmp_path):
+        """Test that NumPy scalars are bound as scalars, not opened as files."""
+        x = np.arange(10, dtype='<f8')
+        np.save(tmp_path / "x.npy", x)
+        
+        self.parser.evaluate_files("a*x + b", str(tmp_path / "out.npy"),
+                                   x=str(tmp_path / "x.npy"), a=np.int64(3), b=np.float32(2.5))
+        
+        np.testing.assert_array_equal(np.load(tmp_path / "out.npy"), 3 * x + 2.5)
+    
+    def test_length_mismatch(self, tmp_path):
+        """Test that columns of different lengths are rejected."""
+        np.save(tmp_path / "x.npy", np.ones(3))
+        np.save(tmp_path / "y.npy", np.ones(4))
+        with pytest.raises(ValueError, match="rows"):
+            self.parser.evaluate_files("x+y", str(tmp_path / "out.npy"),
+                                       x=str(tmp_path / "x.npy"), y=str(tmp_path / "y.npy"))
+    
+    def test_requires_a_column(self, tmp_path):
+        """Test that at least one input must be a file."""
+        with pytest.raises(ValueError, match="column file"):
+            self.parser.evaluate_files("x+1", str(tmp_path / "out.npy"), x=2)
+    
+    def test_mask_policy_rejected(self, tmp_path):
+        """Test that masked output is not supported for files."""
+        np.save(tmp_path / "x.npy", np.ones(3))
+        with pytest.raises(ValueError, match="not supported"):
+            self.parser.evaluate_files("x", str(tmp_path / "out.npy"), zero_division='mask',
+                                       x=str(tmp_path / "x.npy"))
+    
+    def test_column_maps_only_requested_rows(self, tmp_path):
+        """Test that a chunk mapping covers only its rows."""
+        np.save(tmp_path / "x.npy", np.arange(100.0))
+        column = Column.open(str(tmp_path / "x.npy"))
+        chunk = column.map(40, 45)
+        assert chunk.tolist() == [40.0, 41.0, 42.0, 43.0, 44.0]
+
+    @pytest.mark.parametrize("version", [(1, 0), (2, 0), (3, 0)])
+    def test_npy_format_versions(self, tmp_path, version):
+        """Test that every .npy format version NumPy writes is read correctly."""
+        path = tmp_path / "x.npy"
+        with open(path, 'wb') as f:
+            np.lib.format.write_array(f, np.arange(5.0), version=version)
+        column = Column.open(str(path))
+        assert column.map(0, 5).tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    def test_unsupported_npy_version(self, tmp_path):
+        """Test that an unknown .npy format version is rejected clearly."""
+        path = tmp_path / "x.npy"
+        path.write_bytes(b'\x93NUMPY\x09\x00' + b'\x00' * 16)
+        with pytest.raises(ValueError, match="unsupported .npy format version 9.0"):
+            Column.open(str(path))
@@ -0,0 +1,277 @@
+"""
+Tests for thread- and process-safe history.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from calculator.history import HistoryManager
+from calculator.journal import SharedHistoryJournal
+
+
+def _write_entries(path: str, worker: int, count: int, max_entries: int,
+                   min_compact_records: int):
+    """Process-pool task: append count entries to a shared journal."""
+    manager = HistoryManager(max_entries=max_entries)
+    manager.open_journal(path, shared=True, min_compact_records=min_compact_records)
+    for i in range(count):
+        manager.add_entry(f"{worker}:{i}", i)
+    manager.close_journal()
+
+
+def _final_view(path: str, max_entries: int):
+    """Process-pool task: load the shared journal and return its expressions."""
+    manager = HistoryManager(max_entries=max_entries)
+    manager.open_journal(path, shared=True)
+    expressions = [entry.expression for entry in manager.get_history()]
+    manager.close_journal()
+    return expressions
+
+
+class TestThreadSafety:
+    """Test cases for concurrent use from several threads."""
+
+    def setup_method(self):
+        """Set up a history manager."""
+        self.manager = HistoryManager(max_entries=100_000)
+
+    def test_concurrent_adds_lose_nothing(self):
+        """Test that entries added from many threads are all kept."""
+        def add(worker):
+            for i in range(2000):
+                self.manager.add_entry(f"{worker}:{i}", i)
+
+        threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expressions = [entry.expression for entry in self.manager.get_history()]
+        assert len(expressions) == 8000
+        for worker in range(4):
+            own = [e for e in expressions if e.startswith(f"{worker}:")]
+            assert own == [f"{worker}:{i}" for i in range(2000)]
+
+    def test_snapshots_consistent_while_writing(self):
+        """Test snapshots and lookups taken while another thread appends."""
+        manager = HistoryManager(max_entries=500)
+        manager.search("123")
+        manager.query(result_min=0)
+        done = threading.Event()
+
+        def add():
+            for i in range(20_000):
+                manager.add_entry(f"{i}+0", i)
+            done.set()
+
+        writer = threading.Thread(target=add)
+        writer.start()
+        while not done.is_set():
+            _, entries = manager.snapshot()
+            results = [entry.result for entry in entries]
+            # A snapshot is always a contiguous run of appends
+            assert results == list(range(results[0], results[0] + len(results))) \
+                if results else True
+            manager.search("99")
+            manager.query(result_min=100, result_max=200)
+        writer.join()
+
+        assert [e.result for e in manager.search("19999")] == [19999]
+        assert len(manager.query(result_min=0)) == 500
+
+    def test_snapshot_does_not_materialize_lazy_storage(self):
+        """Test that snapshot() builds entries from a copy of the storage."""
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, 'history.json')
+        self.manager.add_entry("1+1", 2)
+        self.manager.save_to_file(path)
+        manager = HistoryManager()
+        manager.load_from_file(path)
+
+        _, entries = manager.snapshot()
+
+        assert entries[0].expression == "1+1"
+        assert manager._history.pending() == 1
+
+    def test_journal_order_matches_memory(self):
+        """Test that concurrent adds are journaled in the order they are kept."""
+        path = os.path.join(tempfile.mkdtemp(), 'history.jsonl')
+        self.manager.open_journal(path)
+
+        def add(worker):
+            for i in range(1000):
+                self.manager.add_entry(f"{worker}:{i}", i)
+
+        threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.manager.close_journal()
+
+        reloaded = HistoryManager(max_entries=100_000)
+        reloaded.load_from_file(path)
+        assert ([e.expression for e in reloaded.get_history()] ==
+                [e.expression for e in self.manager.get_history()])
+
+    def test_clear_journaled_before_later_adds(self):
+        """Test that an entry added while a clear is being journaled survives reload."""
+        path = os.path.join(tempfile.mkdtemp(), 'history.jsonl')
+        self.manager.open_journal(path)
+        self.manager.add_entry("1+1", 2.0)
+        journal = self.manager._journal
+        append_clear = journal.append_clear
+        clearing = threading.Event()
+
+        def slow_append_clear():
+            clearing.set()
+            time.sleep(0.1)
+            append_clear()
+
+        journal.append_clear = slow_append_clear
+        clear = threading.Thread(target=self.manager.clear_history)
+        clear.start()
+        clearing.wait()
+        self.manager.add_entry("2+2", 4.0)
+        clear.join()
+        self.manager.close_journal()
+
+        reloaded = HistoryManager(max_entries=100_000)
+        reloaded.load_from_file(path)
+        assert [e.expression for e in self.manager.get_history()] == ["2+2"]
+        assert [e.expression for e in reloaded.get_history()] == ["2+2"]
+
+    def test_lazy_materialization_does_not_overwrite_appends(self, monkeypatch):
+        """Test that an entry built while its slot is reused is not stored back."""
+        from calculator import lazyload
+        buffer = lazyload.LazyRingBuffer(1)
+        buffer.append({'expression': "1+1", 'result': 2, 'timestamp': "2024-01-01T00:00:00"})
+        replacement = lazyload.HistoryEntry("2+2", 4)
+        from_dict = lazyload.HistoryEntry.from_dict
+
+        def append_while_building(data):
+            # Another thread evicts the record while it is being decoded
+            buffer.append(replacement)
+            return from_dict(data)
+
+        monkeypatch.setattr(lazyload.HistoryEntry, 'from_dict', append_while_building)
+        assert buffer[0].expression == "1+1"
+        monkeypatch.undo()
+
+        assert buffer[0] is replacement
+
+
+class TestSharedJournal:
+    """Test cases for a journal shared by several writers."""
+
+    def setup_method(self):
+        """Set up a temporary journal path."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.jsonl')
+
+    def test_merge_on_write(self):
+        """Test that each writer merges the other's entries in file order."""
+        first = HistoryManager()
+        first.open_journal(self.path, shared=True)
+        second = HistoryManager()
+        second.open_journal(self.path, shared=True)
+
+        first.add_entry("a", 1)
+        second.add_entry("b", 2)
+        first.add_entry("c", 3)
+
+        assert [e.expression for e in first.get_history()] == ["a", "b", "c"]
+        assert [e.expression for e in second.get_history()] == ["a", "b"]
+        assert second.refresh() == 1
+        assert [e.expression for e in second.get_history()] == ["a", "b", "c"]
+        assert second.refresh() == 0
+        first.close_journal()
+        second.close_journal()
+
+    def test_clear_is_shared(self):
+        """Test that a clear from one writer reaches the others."""
+        first = HistoryManager()
+        first.open_journal(self.path, shared=True)
+        second = HistoryManager()
+        second.open_journal(self.path, shared=True)
+        first.add_entry("a", 1)
+
+        second.clear_history()
+        first.add_entry("b", 2)
+
+        assert [e.expression for e in first.get_history()] == ["b"]
+        second.refresh()
+        assert [e.expression for e in second.get_history()] == ["b"]
+        first.close_journal()
+        second.close_journal()
+
+    def test_compaction_elsewhere_triggers_reload(self):
+        """Test that a writer picks up a journal rewritten by another one."""
+        first = HistoryManager(max_entries=3)
+        first.open_journal(self.path, shared=True, min_compact_records=10)
+        second = HistoryManager(max_entries=3)
+        second.open_journal(self.path, shared=True, min_compact_records=10)
+
+        for i in range(20):
+            first.add_entry(f"{i}", i)
+        second.add_entry("x", 0)
+
+        assert [e.expression for e in second.get_history()] == ["18", "19", "x"]
+        with open(self.path) as f:
+            assert len(f.readlines()) < 20
+        first.close_journal()
+        second.close_journal()
+
+    def test_torn_record_from_crashed_writer(self):
+        """Test that a partial record left by a crashed writer is dropped."""
+        manager = HistoryManager()
+        journal = manager.open_journal(self.path, shared=True)
+        manager.add_entry("a", 1)
+        with open(self.path, 'ab') as f:
+            f.write(b'{"expression": "b", "res')
+
+        manager.add_entry("c", 3)
+
+        reloaded = HistoryManager()
+        reloaded.open_journal(self.path, shared=True)
+        assert [e.expression for e in reloaded.get_history()] == ["a", "c"]
+        assert isinstance(journal, SharedHistoryJournal)
+        manager.close_journal()
+        reloaded.close_journal()
+
+    @pytest.mark.parametrize("max_entries,min_compact_records", [(100_000, 1000), (50, 100)])
+    def test_multi_process_stress(self, max_entries, min_compact_records):
+        """Test that concurrent writer processes lose no entries."""
+        workers, count = 4, 500
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_write_entries, self.path, worker, count, max_entries,
+                            min_compact_records)
+                for worker in range(workers)
+            ]
+            for future in futures:
+                future.result()
+            views = list(pool.map(_final_view, [self.path] * 2, [max_entries] * 2))
+
+        manager = HistoryManager(max_entries=max_entries)
+        manager.open_journal(self.path, shared=True)
+        expressions = [entry.expression for entry in manager.get_history()]
+        manager.close_journal()
+
+        assert views == [expressions, expressions]
+        assert len(expressions) == min(max_entries, workers * count)
+        for worker in range(workers):
+            own = [int(e.split(':')[1]) for e in expressions if e.startswith(f"{worker}:")]
+            # Each worker's entries appear in the order it wrote them
+            assert own == sorted(own)
+        if max_entries >= workers * count:
+            assert sorted(expressions) == sorted(
+                f"{worker}:{i}" for worker in range(workers) for i in range(count)
+            )
+        with open(self.path) as f:
+            for line in f:
+                json.loads(line)
@@ -0,0 +1,185 @@
+"""
+Tests for the Tk-free calculator controller.
+"""
+import os
+import tempfile
+import time
+import pytest
+from calculator.controller import CalculatorController, PREVIEW_DELAY
+from calculator.history import HistoryManager
+
+SLOW_EXPRESSION = "+".join(["1"] * 1_000_000)
+
+
+class _FakeClock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def _settle(controller, clock, timeout: float = 10.0):
+    """Poll like a view's event loop until nothing is pending."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        delay = controller.poll_delay()
+        if delay is None:
+            return
+        clock.advance(delay)
+        controller.poll()
+        time.sleep(0.005)
+    raise AssertionError("controller did not settle")
+
+
+class TestCalculatorController:
+    """Test cases for CalculatorController."""
+
+    def setup_method(self):
+        """Start a controller driven by a fake clock."""
+        self.clock = _FakeClock()
+        self.controller = CalculatorController(time_budget=None, clock=self.clock)
+
+    def teardown_method(self):
+        """Stop the worker processes."""
+        self.controller.close()
+
+    def press(self, keys):
+        for key in keys:
+            self.controller.press(key)
+
+    def test_typing_and_backspace(self):
+        """Test that keys build the expression and BackSpace removes one character."""
+        self.press("12+3")
+        assert self.controller.expression == "12+3"
+
+        self.controller.press('BackSpace')
+
+        assert self.controller.expression == "12+"
+        assert self.controller.result == "0"
+        assert not self.controller.busy
+
+    def test_calculate_adds_history(self):
+        """Test that '=' evaluates in the background and records the calculation."""
+        self.press("6*7")
+        self.controller.press('=')
+
+        assert self.controller.busy
+        assert self.controller.result == "Computing…"
+        _settle(self.controller, self.clock)
+
+        assert self.controller.result == "42"
+        assert self.controller.expression == ""
+        entry = self.controller.history_manager.get_history()[-1]
+        assert (entry.expression, entry.result) == ("6*7", 42.0)
+
+    def test_clear_and_clear_entry(self):
+        """Test that CE shows the last result again and C resets the display."""
+        self.press("2+2=")
+        _settle(self.controller, self.clock)
+        self.press("9*")
+
+        self.controller.press('CE')
+        assert (self.controller.expression, self.controller.result) == ("", "4")
+
+        self.press("1C")
+        assert (self.controller.expression, self.controller.result) == ("", "0")
+
+    def test_error_state(self):
+        """Test that errors are shown and the next key starts over."""
+        self.press("1/0=")
+        _settle(self.controller, self.clock)
+
+        assert self.controller.result == "Error: Division by zero"
+        assert self.controller.error_state
+
+        self.controller.press('5')
+
+        assert self.controller.expression == "5"
+        assert self.controller.result == "0"
+        assert not self.controller.error_state
+
+    def test_invalid_expression(self):
+        """Test that a parse error is shown and nothing is added to history."""
+        self.press("2+=")
+        _settle(self.controller, self.clock)
+
+        assert self.controller.result.startswith("Error: ")
+        assert self.controller.error_state
+        assert self.controller.history_manager.size() == 0
+
+    def test_cancel_and_escape(self):
+        """Test that Escape cancels a running calculation and otherwise clears."""
+        self.controller.paste(SLOW_EXPRESSION)
+        self.controller.press('=')
+        assert self.controller.busy
+
+        self.controller.press('Escape')
+
+        assert not self.controller.busy
+        assert self.controller.result == "Cancelled"
+        assert not self.controller.cancel()
+        self.controller.press('Escape')
+        assert (self.controller.expression, self.controller.result) == ("", "0")
+
+    def test_preview_after_typing_pause(self):
+        """Test that the preview is evaluated once typing pauses."""
+        self.press("2*3")
+        assert self.controller.poll_delay() == pytest.approx(PREVIEW_DELAY)
+
+        self.clock.advance(PREVIEW_DELAY / 2)
+        self.controller.poll()
+        assert not self.controller.preview.busy
+
+        _settle(self.controller, self.clock)
+        assert (self.controller.result, self.controller.previewing) == ("6", True)
+
+        # '=' reuses the preview's outcome without starting the worker
+        self.controller.press('=')
+        assert not self.controller.busy
+        assert (self.controller.result, self.controller.previewing) == ("6", False)
+        assert self.controller.history_manager.size() == 1
+
+    def test_typing_restarts_preview_timer(self):
+        """Test that a burst of keys costs one preview evaluation."""
+        for key in "12+34":
+            self.controller.press(key)
+            self.clock.advance(PREVIEW_DELAY / 2)
+            self.controller.poll()
+
+        _settle(self.controller, self.clock)
+
+        assert self.controller.result == "46"
+        assert self.controller.preview.evaluations == 1
+
+    def test_paste_and_unknown_key(self):
+        """Test that pasted whitespace is dropped and unknown keys are rejected."""
+        self.controller.paste(" 1 +\n2 ")
+        assert self.controller.expression == "1+2"
+
+        with pytest.raises(ValueError, match="Unknown key"):
+            self.controller.press('x')
+        assert self.controller.expression == "1+2"
+
+    def test_history_file(self):
+        """Test that history is loaded from and autosaved to a file."""
+        path = os.path.join(tempfile.mkdtemp(), 'history.json')
+        saved = HistoryManager()
+        saved.add_entry("1+1", 2.0)
+        saved.save_to_file(path)
+
+        self.controller.open_history_file(path)
+        assert self.controller.history_manager.get_history()[-1].expression == "1+1"
+        self.controller.restore("3*3")
+        self.controller.press('=')
+        _settle(self.controller, self.clock)
+        self.controller.close()
+
+        reloaded = HistoryManager()
+        reloaded.load_from_file(path)
+        assert [e.expression for e in reloaded.get_history()] == ["1+1", "3*3"]
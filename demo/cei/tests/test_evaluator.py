@@ -0,0 +1,109 @@
+"""
+Tests for background expression evaluation.
+"""
+import time
+import pytest
+from calculator.evaluator import BackgroundEvaluator, Evaluation
+
+# Takes a few seconds to evaluate, far longer than any test waits for it
+SLOW_EXPRESSION = "+".join(["1"] * 1_000_000)
+
+
+class TestBackgroundEvaluator:
+    """Test cases for BackgroundEvaluator."""
+
+    def setup_method(self):
+        """Start an evaluator."""
+        self.evaluator = BackgroundEvaluator(time_budget=None)
+
+    def teardown_method(self):
+        """Stop the worker process."""
+        self.evaluator.close()
+
+    def test_result(self):
+        """Test that an expression is evaluated in the worker."""
+        job = self.evaluator.submit("6*7")
+
+        outcome = self.evaluator.wait(timeout=10)
+
+        assert isinstance(outcome, Evaluation)
+        assert outcome.ok
+        assert (outcome.job, outcome.expression, outcome.result) == (job, "6*7", 42.0)
+        assert not self.evaluator.busy
+        assert self.evaluator.poll() is None
+
+    def test_errors_keep_their_type(self):
+        """Test that evaluation errors come back as the original exceptions."""
+        self.evaluator.submit("1/0")
+        outcome = self.evaluator.wait(timeout=10)
+        assert isinstance(outcome.error, ZeroDivisionError)
+        assert outcome.result is None
+
+        self.evaluator.submit("1+")
+        assert isinstance(self.evaluator.wait(timeout=10).error, ValueError)
+
+    def test_poll_does_not_block(self):
+        """Test that poll() returns at once while the worker is busy."""
+        self.evaluator.submit(SLOW_EXPRESSION)
+
+        start = time.perf_counter()
+        assert self.evaluator.poll() is None
+        assert time.perf_counter() - start < 0.05
+        assert self.evaluator.busy
+        assert self.evaluator.wait(timeout=0.1) is None
+
+    def test_cancel(self):
+        """Test that cancelling abandons the evaluation and the next one works."""
+        self.evaluator.submit(SLOW_EXPRESSION)
+
+        start = time.perf_counter()
+        assert self.evaluator.cancel()
+        assert time.perf_counter() - start < 1.0
+
+        assert not self.evaluator.busy
+        assert self.evaluator.poll() is None
+        assert not self.evaluator.cancel()
+        self.evaluator.submit("2+2")
+        assert self.evaluator.wait(timeout=10).result == 4.0
+
+    def test_submit_supersedes_running_evaluation(self):
+        """Test that a new submission replaces the one in progress."""
+        self.evaluator.submit(SLOW_EXPRESSION)
+        job = self.evaluator.submit("3*3")
+
+        outcome = self.evaluator.wait(timeout=10)
+
+        assert (outcome.job, outcome.result) == (job, 9.0)
+
+    def test_time_budget(self):
+        """Test that an evaluation over budget fails with TimeoutError."""
+        evaluator = BackgroundEvaluator(time_budget=0.2)
+        try:
+            evaluator.submit(SLOW_EXPRESSION)
+            outcome = evaluator.wait()
+
+            assert isinstance(outcome.error, TimeoutError)
+            assert "0.2 s" in str(outcome.error)
+            assert outcome.elapsed < 2.0
+            evaluator.submit("1+1")
+            assert evaluator.wait(timeout=10).result == 2.0
+        finally:
+            evaluator.close()
+
+    def test_negative_time_budget(self):
+        """Test that a negative time budget is rejected."""
+        with pytest.raises(ValueError):
+            BackgroundEvaluator(time_budget=-1)
+
+    def test_worker_crash(self):
+        """Test recovery when the worker process dies."""
+        self.evaluator.submit(SLOW_EXPRESSION)
+        self.evaluator._process.kill()
+
+        outcome = self.evaluator.wait(timeout=10)
+
+        assert isinstance(outcome.error, RuntimeError)
+        self.evaluator._process.kill()
+        self.evaluator._process.join()
+        self.evaluator.submit("5-1")
+        assert self.evaluator.wait(timeout=10).result == 4.0
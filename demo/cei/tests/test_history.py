@@ -123,6 +123,58 @@ class TestHistoryManager:
         assert history[0].expression == "2+1"
         assert history[2].expression == "4+1"
     
+    def test_get_by_index_after_eviction(self):
+        """Test indexed access once the oldest entries were evicted."""
+        manager = HistoryManager(max_entries=3)
+        for i in range(7):
+            manager.add_entry(f"{i}+1", i+1)
+        
+        assert manager.get_by_index(0).expression == "4+1"
+        assert manager.get_by_index(-1).expression == "6+1"
+        assert manager.get_by_index(-3).expression == "4+1"
+        assert manager.get_by_index(3) is None
+        assert manager.get_by_index(-4) is None
+    
+    def test_get_history_is_a_copy(self):
+        """Test that returned history survives later clears and evictions."""
+        manager = HistoryManager(max_entries=2)
+        manager.add_entry("3+4", 7.0)
+        history = manager.get_history()
+        recent = manager.get_recent(1)
+        
+        history.append(None)
+        manager.add_entry("1+1", 2.0)
+        manager.add_entry("2+2", 4.0)
+        manager.clear_history()
+        
+        assert isinstance(history, list)
+        assert history[0].expression == "3+4"
+        assert recent[0].expression == "3+4"
+        assert manager.get_history(limit=0) == []
+    
+    def test_history_view_is_read_only(self):
+        """Test that a history view cannot modify the manager and goes stale on clear."""
+        self.manager.add_entry("3+4", 7.0)
+        view = self.manager.history_view()
+        
+        with pytest.raises((TypeError, AttributeError)):
+            view.append(None)
+        assert self.manager.history_view(limit=0) == []
+        assert self.manager.history_view(limit=5) == list(view)
+        
+        self.manager.clear_history()
+        with pytest.raises(RuntimeError, match="stale"):
+            view[0]
+    
+    def test_shrinking_max_entries(self):
+        """Test that lowering max_entries drops the oldest entries."""
+        for i in range(5):
+            self.manager.add_entry(f"{i}+1", i+1)
+        
+        self.manager.max_entries = 2
+        assert self.manager.size() == 2
+        assert self.manager.get_by_index(0).expression == "3+1"
+    
     def test_clear_history(self):
         """Test clearing history."""
         self.manager.add_entry("3+4", 7.0)
@@ -201,6 +253,27 @@ class TestHistoryManager:
             # Clean up
             os.unlink(filepath)
     
+    def test_load_rebuilds_storage_for_saved_capacity(self):
+        """Test that loading applies the file's max_entries to storage."""
+        manager = HistoryManager(max_entries=3)
+        for i in range(5):
+            manager.add_entry(f"{i}+1", i+1)
+        
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as f:
+            filepath = f.name
+        
+        try:
+            manager.save_to_file(filepath)
+            new_manager = HistoryManager(max_entries=100)
+            new_manager.load_from_file(filepath)
+            
+            assert new_manager.max_entries == 3
+            new_manager.add_entry("9+1", 10.0)
+            assert new_manager.size() == 3
+            assert [e.expression for e in new_manager.get_history()] == ["3+1", "4+1", "9+1"]
+        finally:
+            os.unlink(filepath)
+    
     def test_load_nonexistent_file(self):
         """Test loading from non-existent file."""
         with pytest.raises(FileNotFoundError):
@@ -0,0 +1,149 @@
+"""
+Tests for the memory-mapped binary history format.
+"""
+import json
+import math
+import os
+import tempfile
+import pytest
+from datetime import datetime, timedelta, timezone
+from calculator.history import HistoryEntry, HistoryManager
+from calculator.history_binary import (
+    BinaryHistory, binary_to_json, json_to_binary, main, write_binary_history
+)
+
+
+class TestBinaryHistory:
+    """Test cases for writing and reading binary history files."""
+
+    def setup_method(self):
+        """Set up entries and a temporary directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.chist')
+        base = datetime(2024, 3, 1, 12, 30, 15, 123456)
+        self.entries = [
+            HistoryEntry("2+2", 4.0, base),
+            HistoryEntry("√2 × π", 4.442882938158366, base + timedelta(seconds=1)),
+            HistoryEntry("", -0.5, base + timedelta(days=400)),
+            HistoryEntry("1/0", float('nan'), base + timedelta(microseconds=1)),
+        ]
+
+    def test_round_trip(self):
+        """Test that every field is read back exactly."""
+        assert write_binary_history(self.path, self.entries, 50) == 4
+
+        with BinaryHistory(self.path) as history:
+            assert len(history) == 4
+            assert history.max_entries == 50
+            for original, loaded in zip(self.entries, history):
+                assert loaded.expression == original.expression
+                assert loaded.timestamp == original.timestamp
+            assert [e.result for e in history[:3]] == [4.0, 4.442882938158366, -0.5]
+            assert math.isnan(history[3].result)
+
+    def test_random_access(self):
+        """Test indexing, negative indices and get_by_index."""
+        write_binary_history(self.path, self.entries, 50)
+
+        with BinaryHistory(self.path) as history:
+            assert history[1].expression == "√2 × π"
+            assert history[-2].expression == ""
+            assert history.get_by_index(-1).expression == "1/0"
+            assert history.get_by_index(4) is None
+            assert history.get_by_index(-5) is None
+            assert [e.expression for e in history[::2]] == ["2+2", ""]
+            with pytest.raises(IndexError):
+                history[4]
+
+    def test_empty_history(self):
+        """Test a file with no entries."""
+        write_binary_history(self.path, [], 10)
+
+        with BinaryHistory(self.path) as history:
+            assert len(history) == 0
+            assert list(history) == []
+            assert history.get_by_index(0) is None
+
+    def test_aware_timestamp_stored_as_local(self):
+        """Test that timezone-aware timestamps are stored in local time."""
+        aware = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        write_binary_history(self.path, [HistoryEntry("1", 1.0, aware)], 10)
+
+        with BinaryHistory(self.path) as history:
+            assert history[0].timestamp == aware.astimezone().replace(tzinfo=None)
+
+    def test_rejects_other_files(self):
+        """Test that non-binary, unknown-version and truncated files raise ValueError."""
+        with open(self.path, 'w') as f:
+            f.write('{"history": []}' * 10)
+        with pytest.raises(ValueError, match="not a binary history file"):
+            BinaryHistory(self.path)
+
+        write_binary_history(self.path, self.entries, 50)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with open(self.path, 'wb') as f:
+            f.write(data[:8] + b'\x09' + data[9:])
+        with pytest.raises(ValueError, match="unsupported"):
+            BinaryHistory(self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(data[:-4])
+        with pytest.raises(ValueError, match="truncated"):
+            BinaryHistory(self.path)
+
+
+class TestJsonConversion:
+    """Test cases for converting to and from the JSON format."""
+
+    def setup_method(self):
+        """Set up a saved JSON history."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.tmpdir, 'history.json')
+        self.binary_path = os.path.join(self.tmpdir, 'history.chist')
+        self.manager = HistoryManager(max_entries=3)
+        for i in range(5):
+            self.manager.add_entry(f"{i}*1.5", i * 1.5)
+        self.manager.save_to_file(self.json_path)
+
+    def test_json_round_trip_is_identical(self):
+        """Test that JSON -> binary -> JSON reproduces save_to_file output."""
+        assert json_to_binary(self.json_path, self.binary_path) == 3
+        out_path = os.path.join(self.tmpdir, 'out.json')
+        assert binary_to_json(self.binary_path, out_path) == 3
+
+        with open(self.json_path) as f, open(out_path) as g:
+            assert f.read() == g.read()
+
+    def test_empty_round_trip(self):
+        """Test converting an empty history."""
+        HistoryManager(max_entries=7).save_to_file(self.json_path)
+        json_to_binary(self.json_path, self.binary_path)
+        out_path = os.path.join(self.tmpdir, 'out.json')
+        binary_to_json(self.binary_path, out_path)
+
+        with open(self.json_path) as f, open(out_path) as g:
+            assert f.read() == g.read()
+
+    def test_converted_json_loads(self):
+        """Test that converted JSON loads into a HistoryManager."""
+        json_to_binary(self.json_path, self.binary_path)
+        out_path = os.path.join(self.tmpdir, 'out.json')
+        binary_to_json(self.binary_path, out_path)
+
+        manager = HistoryManager()
+        manager.load_from_file(out_path)
+        assert [e.expression for e in manager.get_history()] == ["2*1.5", "3*1.5", "4*1.5"]
+        assert manager.max_entries == 3
+
+    def test_command_line(self, capsys):
+        """Test that the CLI converts in the direction of the input format."""
+        main([self.json_path, self.binary_path])
+        out_path = os.path.join(self.tmpdir, 'out.json')
+        main([self.binary_path, out_path])
+
+        output = capsys.readouterr().out
+        assert "Wrote 3 entries as binary history" in output
+        assert "Wrote 3 entries as JSON" in output
+        with open(out_path) as f:
+            assert json.load(f)['max_entries'] == 3
@@ -0,0 +1,186 @@
+"""
+Tests for the GUI history panel view models.
+"""
+import os
+import tempfile
+from calculator.history import HistoryManager
+from calculator.history_view import HistoryPanel, VirtualHistoryPanel
+
+
+class _FakeListbox:
+    """Records rows the way a Tk Listbox would for the panel's operations."""
+
+    def __init__(self):
+        self.rows = []
+
+    def apply(self, operations):
+        for operation in operations:
+            if operation[0] == 'delete':
+                del self.rows[operation[1]:operation[2] + 1]
+            else:
+                self.rows[operation[1]:operation[1]] = operation[2]
+
+
+class TestHistoryPanel:
+    """Test cases for HistoryPanel."""
+
+    def setup_method(self):
+        """Set up a history manager and a panel showing three entries."""
+        self.manager = HistoryManager(max_entries=5)
+        self.panel = HistoryPanel(self.manager, limit=3)
+        self.listbox = _FakeListbox()
+
+    def _add(self, *values):
+        for value in values:
+            self.manager.add_entry(f"{value}+0", value)
+        self.listbox.apply(self.panel.sync())
+
+    def _expected(self, *values):
+        return [f"{value}+0 = {value}" for value in values]
+
+    def test_new_entry_inserted_at_top(self):
+        """Test that one calculation inserts exactly one row."""
+        self._add(1, 2)
+        self.manager.add_entry("3+0", 3)
+
+        operations = self.panel.sync()
+
+        assert operations == [('insert', 0, self._expected(3))]
+        self.listbox.apply(operations)
+        assert self.listbox.rows == self._expected(3, 2, 1)
+
+    def test_oldest_rows_dropped_from_bottom(self):
+        """Test that rows beyond the limit are deleted from the bottom only."""
+        self._add(1, 2, 3)
+        self.manager.add_entry("4+0", 4)
+
+        operations = self.panel.sync()
+
+        assert operations == [('delete', 2, 2), ('insert', 0, self._expected(4))]
+        self.listbox.apply(operations)
+        assert self.listbox.rows == self._expected(4, 3, 2)
+
+    def test_burst_larger_than_panel(self):
+        """Test that a burst of more entries than rows replaces every row."""
+        self._add(1, 2)
+        self._add(*range(3, 10))
+
+        assert self.listbox.rows == self._expected(9, 8, 7)
+        assert self.panel.sync() == []
+
+    def test_clear_deletes_all_rows(self):
+        """Test that clearing the history empties the panel."""
+        self._add(1, 2)
+        self.manager.clear_history()
+        self.listbox.apply(self.panel.sync())
+        assert self.listbox.rows == []
+
+        self._add(5)
+        assert self.listbox.rows == self._expected(5)
+
+    def test_load_resets_panel(self):
+        """Test that loading a file redraws the panel from scratch."""
+        path = os.path.join(tempfile.mkdtemp(), 'history.json')
+        other = HistoryManager(max_entries=5)
+        other.add_entry("7+0", 7)
+        other.save_to_file(path)
+        self._add(1)
+
+        self.manager.load_from_file(path)
+        self.listbox.apply(self.panel.sync())
+
+        assert self.listbox.rows == self._expected(7)
+
+    def test_entry_for_row(self):
+        """Test mapping rows back to entries."""
+        self._add(1, 2, 3, 4)
+
+        assert self.panel.entry_for_row(0).result == 4
+        assert self.panel.entry_for_row(2).result == 2
+        assert self.panel.entry_for_row(3) is None
+        assert self.panel.entry_for_row(-1) is None
+
+    def test_unlimited_panel(self):
+        """Test a panel showing the whole history."""
+        panel = HistoryPanel(self.manager, limit=None)
+        self._add(1, 2, 3, 4, 5, 6)
+        listbox = _FakeListbox()
+        listbox.apply(panel.sync())
+        assert listbox.rows == self._expected(6, 5, 4, 3, 2)
+
+
+class TestVirtualHistoryPanel:
+    """Test cases for VirtualHistoryPanel."""
+
+    def setup_method(self):
+        """Set up a large history and a panel showing ten rows."""
+        self.manager = HistoryManager(max_entries=200_000)
+        for i in range(100_000):
+            self.manager.add_entry(f"{i}", i)
+        self.panel = VirtualHistoryPanel(self.manager, visible_rows=10)
+
+    def test_renders_only_visible_rows(self):
+        """Test that only the rows in the window are produced."""
+        rows = self.panel.rows()
+
+        assert rows == [f"{i} = {i}" for i in range(99_999, 99_989, -1)]
+        assert self.panel.total == 100_000
+
+    def test_scrolling_and_clamping(self):
+        """Test scrolling by rows, by fraction and past either end."""
+        self.panel.scroll(5)
+        assert self.panel.top == 5
+        self.panel.scroll(-10)
+        assert self.panel.top == 0
+        self.panel.scroll_to(0.5)
+        assert self.panel.entry_for_row(0).result == 49_999
+        self.panel.scroll_to(1.0)
+        assert self.panel.top == 99_990
+        assert self.panel.rows()[-1] == "0 = 0"
+
+    def test_yview(self):
+        """Test the fractions reported to the scrollbar."""
+        self.panel.scroll(50_000)
+        assert self.panel.yview() == (0.5, 0.5001)
+
+        small = VirtualHistoryPanel(HistoryManager(), visible_rows=10)
+        assert small.yview() == (0.0, 1.0)
+
+    def test_handle_scroll(self):
+        """Test Tk scrollbar commands."""
+        self.panel.handle_scroll('scroll', '2', 'units')
+        assert self.panel.top == 2
+        self.panel.handle_scroll('scroll', '1', 'pages')
+        assert self.panel.top == 12
+        self.panel.handle_scroll('moveto', '0.25')
+        assert self.panel.top == 25_000
+
+    def test_new_entry_at_top_shown(self):
+        """Test that a panel at the top follows new entries."""
+        self.manager.add_entry("new", 1)
+
+        assert self.panel.sync()
+        assert self.panel.rows()[0] == "new = 1"
+        assert not self.panel.sync()
+
+    def test_scrolled_panel_stays_anchored(self):
+        """Test that a scrolled panel keeps showing the same entries."""
+        self.panel.scroll(100)
+        before = self.panel.rows()
+
+        self.manager.add_entry("new", 1)
+
+        assert self.panel.sync()
+        assert self.panel.rows() == before
+        assert self.panel.top == 101
+
+    def test_clear_and_entry_for_row(self):
+        """Test that a cleared history leaves no rows to select."""
+        self.panel.scroll(100)
+        self.manager.clear_history()
+
+        self.panel.sync()
+
+        assert self.panel.top == 0
+        assert self.panel.rows() == []
+        assert self.panel.entry_for_row(0) is None
@@ -0,0 +1,130 @@
+"""
+Tests for incremental re-parsing of edited expressions.
+"""
+import random
+import pytest
+from calculator.incremental import IncrementalParser
+from calculator.parser import ExpressionParser
+
+
+def _outcome(evaluate):
+    try:
+        return evaluate()
+    except (ValueError, ZeroDivisionError) as exc:
+        return type(exc), str(exc)
+
+
+class TestIncrementalParser:
+    """Test cases for IncrementalParser."""
+
+    def setup_method(self):
+        """Set up an incremental parser and a reference parser."""
+        self.parser = IncrementalParser()
+        self.reference = ExpressionParser(use_cache=False)
+
+    def assert_matches_parse(self, text: str, variables=None):
+        """Check the current text evaluates exactly as ExpressionParser.parse() does."""
+        assert self.parser.text == text
+        assert _outcome(self.parser.evaluate) == _outcome(
+            lambda: self.reference.parse(text, variables))
+
+    def test_parse(self):
+        """Test evaluating successive versions of an expression."""
+        for text in ("2", "2+", "2+3", "2+3*", "2+3*4", "(2+3*4", "(2+3*4)/7"):
+            self.parser.update(text)
+            self.assert_matches_parse(text)
+        assert self.parser.parse("(2+3*4)/2") == 7.0
+
+    def test_edit(self):
+        """Test replacing a range of characters."""
+        self.parser.update("12 + 34 * 5")
+
+        self.parser.edit(5, 7, "6")
+
+        assert self.parser.text == "12 + 6 * 5"
+        assert self.parser.evaluate() == 42.0
+        with pytest.raises(ValueError):
+            self.parser.edit(3, 50, "")
+
+    def test_digit_edit_is_local(self):
+        """Test that changing one number re-lexes and re-parses only that number."""
+        text = "+".join(f"({i}*2-1)" for i in range(2000))
+        self.parser.update(text)
+
+        edited = text[:-4] + "3-1)"
+        self.parser.update(edited)
+
+        assert self.parser.relexed <= 4
+        assert self.parser.reparsed == 1
+        assert self.parser.full_parses == 1
+        self.assert_matches_parse(edited)
+
+    def test_appending_reuses_previous_operands(self):
+        """Test that typing at the end parses only the new operands."""
+        text = "+".join(["(1.5*2)"] * 2000)
+        self.parser.update(text)
+
+        for key in "*(4-1)":
+            text += key
+            self.parser.update(text)
+            assert self.parser.reparsed <= 8
+            self.assert_matches_parse(text)
+
+    def test_operator_edit(self):
+        """Test changing an operator's precedence level regroups the operands."""
+        self.parser.update("1+2*3-4")
+
+        for text in ("1*2*3-4", "1*2+3-4", "1*2+3/4", "1/2/3/4"):
+            self.parser.update(text)
+            self.assert_matches_parse(text)
+
+    def test_parentheses(self):
+        """Test opening, closing and removing parentheses."""
+        for text in ("2*3+4", "2*(3+4", "2*(3+4)", "2*(3+4)*(", "2*(3+4)*()",
+                     "2*(3+4)*(1)", "2*3+4)*(1)", "(2*3+4)*(1)", "(2*(3+4)*(1)"):
+            self.parser.update(text)
+            self.assert_matches_parse(text)
+
+    def test_errors_match_parse(self):
+        """Test that invalid text fails with the same error as parse()."""
+        for text in ("", "  ", "1+", "*", "()", "(1", "1)", "2(3)", "1 2", "1/0",
+                     "1/(2-2)", "4x", "1+a", "1 # 2", "5"):
+            self.parser.update(text)
+            self.assert_matches_parse(text)
+
+    def test_variables(self):
+        """Test names looked up in the variables given."""
+        variables = {'x': 3.0, 'rate': 0.5}
+        parser = IncrementalParser(variables=variables)
+
+        assert parser.parse("x*rate") == 1.5
+        assert parser.parse("x*rate+x") == 4.5
+        with pytest.raises(ValueError, match="Undefined variable: y"):
+            parser.parse("(x+y)*rate+z")
+
+    def test_matches_parse_under_random_edits(self):
+        """Test random edits against evaluating each text from scratch."""
+        rng = random.Random(7)
+        pieces = ["1", "7", "0", "2.5", "+", "-", "*", "/", "(", ")", " ", "x", "(3)"]
+        variables = {'x': 2.0}
+        parser = IncrementalParser(variables=variables)
+        for _ in range(200):
+            text = "+".join(str(rng.randint(0, 9)) for _ in range(10))
+            parser.update(text)
+            for _ in range(20):
+                start = rng.randrange(len(text) + 1)
+                end = rng.randrange(start, min(len(text), start + 2) + 1)
+                replacement = "".join(rng.choice(pieces) for _ in range(rng.randrange(3)))
+                text = text[:start] + replacement + text[end:]
+                parser.update(text)
+                expected = _outcome(lambda: self.reference.parse(text, variables))
+                assert _outcome(parser.evaluate) == expected, text
+
+    def test_whitespace_edit(self):
+        """Test that edits to spaces alone leave the tree untouched."""
+        self.parser.update("1 + 2")
+
+        self.parser.update("1  +  2")
+
+        assert self.parser.reparsed == 0
+        assert self.parser.evaluate() == 3.0
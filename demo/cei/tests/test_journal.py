@@ -0,0 +1,182 @@
+"""
+Tests for append-only journal persistence.
+"""
+import json
+import os
+import tempfile
+import time
+import pytest
+from calculator.history import HistoryEntry, HistoryManager
+from calculator.journal import HistoryJournal
+
+
+class TestHistoryJournal:
+    """Test cases for HistoryJournal."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "history.jsonl")
+    
+    def teardown_method(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+    
+    def read_lines(self):
+        with open(self.path, 'rb') as f:
+            return f.read().splitlines()
+    
+    def test_append_writes_one_record(self):
+        """Test that each entry is one JSON line."""
+        journal = HistoryJournal(self.path)
+        assert journal.load() == []
+        journal.append(HistoryEntry("3+4", 7.0))
+        journal.append(HistoryEntry("5*2", 10.0))
+        journal.close()
+        
+        lines = self.read_lines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])['expression'] == "5*2"
+    
+    def test_load_keeps_last_max_entries(self):
+        """Test that replay applies max_entries and clear markers."""
+        journal = HistoryJournal(self.path, max_entries=2, min_compact_records=10 ** 6)
+        journal.load()
+        journal.append(HistoryEntry("1+0", 1.0))
+        journal.append_clear()
+        for i in range(2, 6):
+            journal.append(HistoryEntry(f"{i}+0", float(i)))
+        journal.close()
+        
+        reloaded = HistoryJournal(self.path, max_entries=2)
+        entries = reloaded.load()
+        assert [e.expression for e in entries] == ["4+0", "5+0"]
+        assert reloaded.records == 6
+        assert reloaded.dead == 4
+    
+    def test_torn_last_record_is_ignored(self):
+        """Test recovery from a partially written last record."""
+        journal = HistoryJournal(self.path)
+        journal.load()
+        journal.append(HistoryEntry("3+4", 7.0))
+        journal.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'{"expression": "5*2", "res')
+        
+        reloaded = HistoryJournal(self.path)
+        entries = reloaded.load()
+        assert [e.expression for e in entries] == ["3+4"]
+        reloaded.append(HistoryEntry("1+1", 2.0))
+        reloaded.close()
+        
+        assert [json.loads(line)['expression'] for line in self.read_lines()] == ["3+4", "1+1"]
+    
+    def test_corrupt_middle_record_raises(self):
+        """Test that damage before the last record is reported."""
+        with open(self.path, 'wb') as f:
+            f.write(b'not json\n')
+            f.write(json.dumps(HistoryEntry("3+4", 7.0).to_dict()).encode() + b'\n')
+        
+        with pytest.raises(ValueError, match="line 1"):
+            HistoryJournal(self.path).load()
+    
+    def test_invalid_fsync_policy(self):
+        """Test rejecting unknown fsync policies."""
+        with pytest.raises(ValueError, match="fsync policy"):
+            HistoryJournal(self.path, fsync='sometimes')
+    
+    def test_fsync_always(self):
+        """Test appending with fsync after every record."""
+        journal = HistoryJournal(self.path, fsync='always')
+        journal.load()
+        journal.append(HistoryEntry("3+4", 7.0))
+        journal.close()
+        
+        assert len(self.read_lines()) == 1
+    
+    def test_fsync_interval_syncs_after_idle(self, monkeypatch):
+        """Test that the last record before an idle period is synced within the interval."""
+        synced = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(os, 'fsync', lambda fd: (synced.append(fd), real_fsync(fd)))
+        journal = HistoryJournal(self.path, fsync='interval', fsync_interval=0.2)
+        journal.load()
+        journal.append(HistoryEntry("1+1", 2.0))
+        journal.append(HistoryEntry("2+2", 4.0))
+        assert len(synced) == 1
+        
+        time.sleep(0.5)
+        
+        assert len(synced) == 2
+        assert journal.sync_error is None
+        journal.close()
+    
+    def test_append_before_load_raises(self):
+        """Test that appending requires an open journal."""
+        with pytest.raises(ValueError, match="not open"):
+            HistoryJournal(self.path).append(HistoryEntry("3+4", 7.0))
+    
+    def test_inline_compaction(self):
+        """Test that dead records are dropped once they dominate."""
+        journal = HistoryJournal(self.path, max_entries=3, min_compact_records=10,
+                                 background=False)
+        journal.load()
+        for i in range(10):
+            journal.append(HistoryEntry(f"{i}+0", float(i)))
+        
+        assert journal.records == 3
+        assert len(self.read_lines()) == 3
+        journal.append(HistoryEntry("10+0", 10.0))
+        journal.close()
+        
+        entries = HistoryJournal(self.path, max_entries=3).load()
+        assert [e.expression for e in entries] == ["8+0", "9+0", "10+0"]
+    
+    def test_background_compaction_keeps_concurrent_appends(self):
+        """Test that appends made while compacting survive the rewrite."""
+        journal = HistoryJournal(self.path, max_entries=5, min_compact_records=20)
+        journal.load()
+        for i in range(500):
+            journal.append(HistoryEntry(f"{i}+0", float(i)))
+        journal.close()
+        
+        assert journal.compaction_error is None
+        assert len(self.read_lines()) < 500
+        entries = HistoryJournal(self.path, max_entries=5).load()
+        assert [e.expression for e in entries] == [f"{i}+0" for i in range(495, 500)]
+
+
+class TestHistoryManagerJournal:
+    """Test cases for HistoryManager journal persistence."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "history.jsonl")
+    
+    def teardown_method(self):
+        """Remove the temporary directory."""
+        self.tmpdir.cleanup()
+    
+    def test_entries_survive_reopen(self):
+        """Test that add_entry and clear_history are persisted."""
+        manager = HistoryManager(max_entries=3)
+        manager.open_journal(self.path)
+        manager.add_entry("1+1", 2.0)
+        manager.clear_history()
+        for i in range(5):
+            manager.add_entry(f"{i}*2", i * 2.0)
+        manager.close_journal()
+        
+        reopened = HistoryManager(max_entries=3)
+        reopened.open_journal(self.path)
+        assert [e.expression for e in reopened.get_history()] == ["2*2", "3*2", "4*2"]
+        assert reopened.get_by_index(-1).result == 8.0
+        reopened.close_journal()
+    
+    def test_close_without_journal(self):
+        """Test that closing without a journal is a no-op."""
+        manager = HistoryManager()
+        manager.close_journal()
+        manager.add_entry("1+1", 2.0)
+        assert manager.size() == 1
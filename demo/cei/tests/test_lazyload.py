@@ -0,0 +1,254 @@
+"""
+Tests for streaming, lazy history loading.
+"""
+import json
+import os
+import tempfile
+import pytest
+from datetime import datetime, timedelta
+from calculator.history import HistoryEntry, HistoryManager
+from calculator.lazyload import LazyRingBuffer, read_json_history, read_jsonl_tail
+
+
+def _record(i: int) -> dict:
+    timestamp = datetime(2024, 1, 1) + timedelta(seconds=i)
+    return {'expression': f"{i}+1", 'result': i + 1, 'timestamp': timestamp.isoformat()}
+
+
+class TestReadJsonHistory:
+    """Test cases for the incremental JSON reader."""
+
+    def setup_method(self):
+        """Set up a temporary directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.json')
+
+    def _write(self, data, **options):
+        with open(self.path, 'w') as f:
+            json.dump(data, f, **options)
+
+    def test_keeps_newest_records(self):
+        """Test that only the last max_entries records are returned."""
+        self._write({'max_entries': 3, 'history': [_record(i) for i in range(10)]}, indent=2)
+
+        max_entries, records = read_json_history(self.path, 100)
+
+        assert max_entries == 3
+        assert records == [_record(7), _record(8), _record(9)]
+
+    def test_small_chunks(self):
+        """Test records split across many chunk boundaries."""
+        data = {'max_entries': 50, 'history': [_record(i) for i in range(40)]}
+        self._write(data)
+
+        for chunk_size in (1, 7, 64):
+            assert read_json_history(self.path, 100, chunk_size=chunk_size) == \
+                (50, data['history'])
+
+    def test_number_at_chunk_boundary(self):
+        """Test that a number cut by a chunk boundary is read whole."""
+        with open(self.path, 'w') as f:
+            f.write('{"history": [], "max_entries": 12345}')
+
+        assert read_json_history(self.path, 100, chunk_size=33) == (12345, [])
+
+    def test_history_before_max_entries(self):
+        """Test a file whose limit comes after the records."""
+        self._write({'history': [_record(i) for i in range(5)], 'max_entries': 2})
+
+        assert read_json_history(self.path, 100) == (2, [_record(3), _record(4)])
+
+    def test_missing_keys_use_defaults(self):
+        """Test files without max_entries or history."""
+        self._write({'history': [_record(0)]})
+        assert read_json_history(self.path, 7) == (7, [_record(0)])
+
+        self._write({})
+        assert read_json_history(self.path, 7) == (7, [])
+
+    def test_zero_max_entries(self):
+        """Test that a zero limit keeps nothing."""
+        self._write({'max_entries': 0, 'history': [_record(0)]})
+
+        assert read_json_history(self.path, 100) == (0, [])
+
+    def test_invalid_json(self):
+        """Test that malformed documents raise JSONDecodeError."""
+        for text in ('not json', '{"history": [{"a": 1},', '{"history": [1 2]}', '[]'):
+            with open(self.path, 'w') as f:
+                f.write(text)
+            with pytest.raises(json.JSONDecodeError):
+                read_json_history(self.path, 100, chunk_size=4)
+
+
+class TestReadJsonlTail:
+    """Test cases for reading a journal from its end."""
+
+    def setup_method(self):
+        """Set up a temporary directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.jsonl')
+
+    def _write(self, lines):
+        with open(self.path, 'w') as f:
+            f.write(''.join(line + '\n' for line in lines))
+
+    def test_keeps_newest_records(self):
+        """Test reading the last records across block boundaries."""
+        self._write(json.dumps(_record(i)) for i in range(100))
+
+        for block_size in (1, 13, 4096):
+            assert read_jsonl_tail(self.path, 5, block_size=block_size) == \
+                [_record(i) for i in range(95, 100)]
+
+    def test_stops_at_clear(self):
+        """Test that records before the last clear marker are dropped."""
+        self._write([json.dumps(_record(0)), '{"clear": true}', json.dumps(_record(1))])
+
+        assert read_jsonl_tail(self.path, 10) == [_record(1)]
+
+    def test_torn_last_record_ignored(self):
+        """Test that a partially written last record is skipped."""
+        self._write([json.dumps(_record(0))])
+        with open(self.path, 'a') as f:
+            f.write('{"expression": "1+')
+
+        assert read_jsonl_tail(self.path, 10) == [_record(0)]
+
+    def test_corrupt_kept_record_raises(self):
+        """Test that corruption among kept records is reported."""
+        self._write(['garbage', json.dumps(_record(0))])
+
+        with pytest.raises(ValueError, match="corrupt"):
+            read_jsonl_tail(self.path, 10)
+        assert read_jsonl_tail(self.path, 1) == [_record(0)]
+
+    def test_empty_file(self):
+        """Test an empty journal."""
+        self._write([])
+
+        assert read_jsonl_tail(self.path, 10) == []
+
+
+class TestLazyRingBuffer:
+    """Test cases for deferred HistoryEntry construction."""
+
+    def setup_method(self):
+        """Set up a buffer of raw records."""
+        self.buffer = LazyRingBuffer(5)
+        self.buffer.extend(_record(i) for i in range(3))
+
+    def test_entries_built_on_access(self):
+        """Test that only read entries are materialized."""
+        assert self.buffer.pending() == 3
+
+        entry = self.buffer[1]
+
+        assert isinstance(entry, HistoryEntry)
+        assert entry.expression == "1+1"
+        assert self.buffer[1] is entry
+        assert self.buffer.pending() == 2
+
+    def test_iteration_and_seq_access(self):
+        """Test that every access path returns HistoryEntry objects."""
+        assert [e.result for e in self.buffer] == [1, 2, 3]
+        assert [e.result for e in reversed(self.buffer)] == [3, 2, 1]
+        assert self.buffer.get_seq(0).result == 1
+        assert [e.result for e in self.buffer.view(-2)] == [2, 3]
+
+    def test_evicted_raw_record_materialized(self):
+        """Test that eviction returns a HistoryEntry, not a dict."""
+        buffer = LazyRingBuffer(1)
+        buffer.append(_record(0))
+
+        evicted = buffer.append(HistoryEntry("x", 1))
+
+        assert isinstance(evicted, HistoryEntry)
+        assert evicted.expression == "0+1"
+
+    def test_resize_keeps_records_raw(self):
+        """Test that resizing does not build entries."""
+        self.buffer.resize(2)
+
+        assert self.buffer.pending() == 2
+        assert [e.result for e in self.buffer] == [2, 3]
+
+
+class TestLazyHistoryManager:
+    """Test cases for HistoryManager.load_from_file streaming."""
+
+    def setup_method(self):
+        """Set up a saved history."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'history.json')
+        with open(self.path, 'w') as f:
+            json.dump({'max_entries': 4, 'history': [_record(i) for i in range(10)]}, f)
+        self.manager = HistoryManager()
+
+    def test_load_defers_entries(self):
+        """Test that loading builds no entries until they are read."""
+        self.manager.load_from_file(self.path)
+
+        assert self.manager.size() == 4
+        assert self.manager.max_entries == 4
+        assert self.manager._history.pending() == 4
+        assert self.manager.get_by_index(-1).expression == "9+1"
+        assert self.manager._history.pending() == 3
+
+    def test_add_and_query_after_lazy_load(self):
+        """Test that later operations behave as after an eager load."""
+        self.manager.load_from_file(self.path)
+        self.manager.add_entry("2*3", 6)
+
+        assert [e.expression for e in self.manager.get_history()] == \
+            ["7+1", "8+1", "9+1", "2*3"]
+        assert [e.expression for e in self.manager.search("+1")] == ["7+1", "8+1", "9+1"]
+        since = datetime(2024, 1, 1) + timedelta(seconds=8)
+        assert [e.result for e in self.manager.query(since=since, result_max=9)] == [9, 6]
+
+    def test_lazy_load_detects_disorder(self):
+        """Test that timestamp order is checked on the first query."""
+        records = [_record(2), _record(0), _record(1)]
+        with open(self.path, 'w') as f:
+            json.dump({'max_entries': 10, 'history': records}, f)
+        self.manager.load_from_file(self.path)
+
+        since = datetime(2024, 1, 1) + timedelta(seconds=1)
+        assert sorted(e.result for e in self.manager.query(since=since)) == [2, 3]
+
+    def test_load_journal_tail(self):
+        """Test loading the newest records of a .jsonl journal."""
+        path = os.path.join(self.tmpdir, 'history.jsonl')
+        manager = HistoryManager(max_entries=2)
+        manager.open_journal(path)
+        for i in range(5):
+            manager.add_entry(f"{i}+1", i + 1)
+        manager.close_journal()
+
+        self.manager.max_entries = 3
+        self.manager.load_from_file(path)
+
+        assert [e.expression for e in self.manager.get_history()] == ["2+1", "3+1", "4+1"]
+
+    def test_malformed_record_fails_load(self):
+        """Test that a kept record without an entry field fails the load, not a later read."""
+        self.manager.add_entry("1+1", 2)
+        broken = _record(9)
+        del broken['timestamp']
+        with open(self.path, 'w') as f:
+            json.dump({'history': [_record(8), broken]}, f)
+        jsonl_path = os.path.join(self.tmpdir, 'history.jsonl')
+        with open(jsonl_path, 'w') as f:
+            f.write(json.dumps(_record(8)) + "\n" + json.dumps({'expression': "9+1"}) + "\n")
+
+        for path in (self.path, jsonl_path):
+            with pytest.raises(ValueError, match="record 2 of the last 2"):
+                self.manager.load_from_file(path)
+        assert [e.expression for e in self.manager.get_history()] == ["1+1"]
+
+    def test_columnar_load(self):
+        """Test streaming load into columnar storage."""
+        manager = HistoryManager(storage='columnar')
+        manager.load_from_file(self.path)
+
+        assert [e.expression for e in manager.get_history()] == ["6+1", "7+1", "8+1", "9+1"]
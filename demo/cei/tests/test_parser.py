@@ -3,6 +3,7 @@ Tests for the expression parser module.
 """
 import pytest
 from calculator.parser import ExpressionParser, Token, TokenType
+from calculator.program import Program, OP_CONST, OP_ADD, OP_MUL
 
 
 class TestExpressionParser:
@@ -48,6 +49,27 @@ class TestExpressionParser:
         with pytest.raises(ValueError, match="Invalid characters"):
             self.parser.tokenize("3+4x")
     
+    def test_tokenize_reports_offset(self):
+        """Test that the offset of the first invalid character is reported."""
+        with pytest.raises(ValueError, match=r"position 4: '\$'"):
+            self.parser.tokenize("3 + $4")
+        with pytest.raises(ValueError, match="position 1: '\u00b2'"):
+            self.parser.tokenize("2\u00b2")
+        with pytest.raises(ValueError, match="position 1: '\u00e9'"):
+            self.parser.tokenize("4\u00e9")
+    
+    def test_tokenize_bytes_and_memoryview(self):
+        """Test that ASCII bytes are tokenized without decoding."""
+        expected = [t.value for t in self.parser.tokenize("12.5*(3+4)")]
+        assert [t.value for t in self.parser.tokenize(b"12.5*(3+4)")] == expected
+        data = memoryview(bytearray(b"12.5*(3+4)"))
+        assert [t.value for t in self.parser.tokenize(data)] == expected
+    
+    def test_tokenize_spaces_separate_numbers(self):
+        """Test that spaces between digits do not join numbers."""
+        tokens = self.parser.tokenize("3 4")
+        assert [t.value for t in tokens] == [3.0, 4.0]
+    
     def test_parse_simple_addition(self):
         """Test parsing simple addition."""
         result = self.parser.parse("3+4")
@@ -176,4 +198,180 @@ class TestExpressionParser:
         assert result == pytest.approx(0.000001)
         
         result = self.parser.parse("0.1+0.2")
-        assert result == pytest.approx(0.3)
\ No newline at end of file
+        assert result == pytest.approx(0.3)
+
+class TestExpressionCache:
+    """Test cases for the compiled-expression cache."""
+    
+    def test_repeated_expression_hits_cache(self):
+        """Test that repeated expressions are served from the cache."""
+        parser = ExpressionParser()
+        assert parser.parse("3+4*2") == 11
+        assert parser.parse("3+4*2") == 11
+        assert parser.cache_misses == 1
+        assert parser.cache_hits == 1
+    
+    def test_whitespace_is_normalized(self):
+        """Test that spacing differences share a cache entry."""
+        parser = ExpressionParser()
+        parser.parse("3+4")
+        parser.parse(" 3 + 4 ")
+        assert parser.cache_info()['size'] == 1
+        assert parser.cache_hits == 1
+    
+    def test_spaces_between_numbers_not_merged(self):
+        """Test that "3 4" and "34" do not share a cache entry."""
+        parser = ExpressionParser()
+        assert parser.parse("34") == 34
+        with pytest.raises(ValueError):
+            parser.parse("3 4")
+    
+    def test_cache_skips_tokenize(self):
+        """Test that a cache hit does not tokenize again."""
+        parser = ExpressionParser()
+        parser.parse("(1+2)*3")
+        parser.tokenize = None  # Would fail if called
+        assert parser.parse("(1+2)*3") == 9
+    
+    def test_eviction(self):
+        """Test that the least recently used expression is evicted."""
+        parser = ExpressionParser(cache_size=2)
+        parser.parse("1+1")
+        parser.parse("2+2")
+        parser.parse("1+1")
+        parser.parse("3+3")
+        assert parser.cache_evictions == 1
+        parser.parse("1+1")
+        assert parser.cache_hits == 2
+        parser.parse("2+2")
+        assert parser.cache_misses == 4
+    
+    def test_cache_disabled(self):
+        """Test that the cache can be turned off."""
+        parser = ExpressionParser(use_cache=False)
+        assert parser.parse("2*3") == 6
+        assert parser.parse("2*3") == 6
+        assert parser.cache_info()['size'] == 0
+        assert parser.cache_hits == 0
+    
+    def test_errors_are_not_cached(self):
+        """Test that invalid expressions still raise on every call."""
+        parser = ExpressionParser()
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                parser.parse("(3+4")
+        assert parser.cache_info()['size'] == 0
+    
+    def test_division_by_zero_from_cache(self):
+        """Test that cached programs still raise ZeroDivisionError."""
+        parser = ExpressionParser()
+        for _ in range(2):
+            with pytest.raises(ZeroDivisionError):
+                parser.parse("1/0")
+    
+    def test_clear_cache(self):
+        """Test clearing the cache resets statistics."""
+        parser = ExpressionParser()
+        parser.parse("1+2")
+        parser.parse("1+2")
+        parser.clear_cache()
+        assert parser.cache_info() == {
+            'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 256
+        }
+
+
+class TestCompiledExpression:
+    """Test cases for ExpressionParser.compile."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+    
+    @pytest.mark.parametrize("expression", [
+        "3+4", "10-5-2", "20/4/5", "3+4*2", "(3+4)*2",
+        "((12+8)*3)/4-5", "0.1+0.2", "1000000*1000000", "7"
+    ])
+    def test_matches_parse(self, expression):
+        """Test that compiled expressions agree with parse()."""
+        compiled = self.parser.compile(expression)
+        assert compiled() == self.parser.parse(expression)
+    
+    def test_reusable(self):
+        """Test that a compiled expression can be called repeatedly."""
+        compiled = self.parser.compile("2*(3+4)")
+        assert [compiled() for _ in range(3)] == [14, 14, 14]
+    
+    def test_introspection(self):
+        """Test that compiled expressions expose their program."""
+        compiled = self.parser.compile("3 + 4 * 2")
+        assert compiled.expression == "3 + 4 * 2"
+        assert [t.value for t in compiled.program.to_postfix()] == [3.0, 4.0, 2.0, '*', '+']
+        assert compiled.cost == 5
+        assert "def _compiled" in compiled.source
+    
+    def test_division_by_zero(self):
+        """Test that division by zero raises at call time."""
+        compiled = self.parser.compile("5/(3-3)")
+        with pytest.raises(ZeroDivisionError, match="Division by zero"):
+            compiled()
+    
+    def test_invalid_expressions(self):
+        """Test that invalid expressions are rejected at compile time."""
+        with pytest.raises(ValueError, match="Empty expression"):
+            self.parser.compile("  ")
+        with pytest.raises(ValueError, match="not enough operands"):
+            self.parser.compile("3+")
+        with pytest.raises(ValueError, match="Mismatched parentheses"):
+            self.parser.compile("(3+4")
+    
+    def test_deeply_nested_expression(self):
+        """Test that deep nesting does not hit compiler recursion limits."""
+        expression = "(" * 500 + "1" + "+1)" * 500
+        assert self.parser.compile(expression)() == 501
+    
+    def test_overflowing_literal(self):
+        """Test that literals beyond float range compile to infinity."""
+        assert self.parser.compile("9" * 400 + "*2")() == float("inf")
+
+
+class TestProgram:
+    """Test cases for the compact program representation."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+    
+    def test_encoding(self):
+        """Test that postfix tokens encode to opcodes and constants."""
+        program = self.parser.get_program("3+4*2")
+        assert program.code == bytes([OP_CONST, OP_CONST, OP_CONST, OP_MUL, OP_ADD])
+        assert program.constants.tolist() == [3.0, 4.0, 2.0]
+        assert program.max_depth == 3
+    
+    def test_round_trip(self):
+        """Test decoding a program back into postfix tokens."""
+        tokens = self.parser.infix_to_postfix(self.parser.tokenize("(1+2)*3"))
+        decoded = Program.from_postfix(tokens).to_postfix()
+        assert [t.value for t in decoded] == [t.value for t in tokens]
+    
+    def test_evaluate_matches_postfix(self):
+        """Test that program evaluation agrees with evaluate_postfix."""
+        for expression in ["10-5-2", "20/4/5", "((12+8)*3)/4-5", "0.1+0.2"]:
+            tokens = self.parser.infix_to_postfix(self.parser.tokenize(expression))
+            assert Program.from_postfix(tokens).evaluate() == self.parser.evaluate_postfix(tokens)
+    
+    def test_invalid_programs_rejected(self):
+        """Test that malformed postfix is rejected when encoding."""
+        with pytest.raises(ValueError, match="not enough operands"):
+            Program.from_postfix(self.parser.tokenize("3+"))
+        with pytest.raises(ValueError, match="too many operands"):
+            Program.from_postfix(self.parser.tokenize("(3)(4)"))
+    
+    def test_shared_operator_tokens(self):
+        """Test that operator tokens are shared singletons."""
+        tokens = self.parser.tokenize("1+2+3")
+        assert tokens[1] is tokens[3]
+    
+    def test_token_has_slots(self):
+        """Test that tokens do not carry a per-instance dict."""
+        assert not hasattr(Token(TokenType.NUMBER, 1.0), '__dict__')
@@ -0,0 +1,126 @@
+"""
+Tests for the live result preview.
+"""
+import time
+from calculator.preview import LivePreview
+
+SLOW_EXPRESSION = "+".join(["1"] * 1_000_000)
+
+
+def _wait_for_preview(preview, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        outcome = preview.poll()
+        if outcome is not None:
+            return outcome
+        time.sleep(0.005)
+    return None
+
+
+class TestLivePreview:
+    """Test cases for LivePreview."""
+
+    def setup_method(self):
+        """Start a preview worker and wait until it is ready."""
+        self.preview = LivePreview(time_budget=None)
+        # Worker start-up would otherwise count towards supersede_after
+        self.preview.evaluator.submit("0")
+        self.preview.evaluator.wait(timeout=10)
+
+    def teardown_method(self):
+        """Stop the worker process."""
+        self.preview.close()
+
+    def test_request_and_poll(self):
+        """Test that a requested preview is delivered by poll()."""
+        assert self.preview.request("6*7") is None
+        assert self.preview.busy
+
+        outcome = _wait_for_preview(self.preview)
+
+        assert (outcome.expression, outcome.result) == ("6*7", 42.0)
+        assert not self.preview.busy
+        assert self.preview.poll() is None
+
+    def test_cached_text_returned_immediately(self):
+        """Test that text evaluated before is served without the worker."""
+        self.preview.request("2+3")
+        _wait_for_preview(self.preview)
+
+        outcome = self.preview.request("2+3")
+
+        assert outcome.result == 5.0
+        assert self.preview.evaluations == 1
+        assert self.preview.cache_hits == 1
+        assert not self.preview.busy
+
+    def test_errors_cached(self):
+        """Test that incomplete expressions are evaluated once."""
+        self.preview.request("2+")
+        assert isinstance(_wait_for_preview(self.preview).error, ValueError)
+
+        assert isinstance(self.preview.request("2+").error, ValueError)
+        assert self.preview.evaluations == 1
+
+    def test_newer_text_supersedes_pending_request(self):
+        """Test that only the latest text of a burst is delivered."""
+        for text in ("1", "12", "12+", "12+3"):
+            self.preview.request(text)
+
+        outcome = _wait_for_preview(self.preview)
+        while outcome is not None and outcome.expression != "12+3":
+            outcome = _wait_for_preview(self.preview)
+
+        assert outcome.result == 15.0
+        # The first text went to the worker; the two in between never did
+        assert self.preview.evaluations == 2
+        assert self.preview.superseded == 1
+        assert self.preview.cached("1").result == 1.0
+        assert self.preview.cached("12") is None
+
+    def test_slow_stale_evaluation_abandoned(self):
+        """Test that a long stale evaluation does not delay newer text."""
+        self.preview.request(SLOW_EXPRESSION)
+        time.sleep(0.1)
+        self.preview.request("7*6")
+
+        start = time.monotonic()
+        outcome = _wait_for_preview(self.preview)
+
+        assert outcome.result == 42.0
+        assert time.monotonic() - start < 2.0
+        assert self.preview.superseded == 1
+        assert self.preview.cached(SLOW_EXPRESSION) is None
+
+    def test_timeouts_not_cached(self):
+        """Test that a preview over budget is retried next time."""
+        preview = LivePreview(time_budget=0.1)
+        try:
+            preview.request(SLOW_EXPRESSION)
+            assert isinstance(_wait_for_preview(preview).error, TimeoutError)
+            assert preview.cached(SLOW_EXPRESSION) is None
+        finally:
+            preview.close()
+
+    def test_cancel(self):
+        """Test that a cancelled preview is not delivered."""
+        self.preview.request("1+1")
+        self.preview.cancel()
+
+        assert not self.preview.busy
+        assert _wait_for_preview(self.preview, timeout=0.5) is None
+        outcome = self.preview.request("1+1") or _wait_for_preview(self.preview)
+        assert outcome.result == 2.0
+
+    def test_finished_evaluation_kept_after_cancel(self):
+        """Test that cancelling after the worker answered keeps the outcome and the worker."""
+        self.preview.request("6*7")
+        pid = self.preview.evaluator._process.pid
+        time.sleep(0.3)
+        self.preview.cancel()
+
+        assert self.preview.cached("6*7").result == 42.0
+        self.preview.request("6*8")
+        assert _wait_for_preview(self.preview).result == 48.0
+        assert self.preview.superseded == 0
+        assert self.preview.evaluator._process.pid == pid
@@ -0,0 +1,132 @@
+"""
+Tests for per-stage parse profiling.
+"""
+import pytest
+from calculator.parser import ExpressionParser
+from calculator.profiling import LatencyHistogram, StageProfiler, STAGES
+
+
+class TestLatencyHistogram:
+    """Test cases for the log-bucketed histogram."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.histogram = LatencyHistogram()
+    
+    def test_empty_percentile_is_zero(self):
+        """Test percentiles of an empty histogram."""
+        assert self.histogram.count == 0
+        assert self.histogram.percentile(50) == 0.0
+    
+    def test_percentiles_within_bucket_precision(self):
+        """Test that percentiles are accurate to about one bucket."""
+        for micros in range(1, 101):
+            self.histogram.record(micros * 1e-6)
+        
+        assert self.histogram.count == 100
+        assert self.histogram.total == pytest.approx(5050e-6)
+        assert self.histogram.percentile(50) == pytest.approx(50e-6, rel=0.1)
+        assert self.histogram.percentile(95) == pytest.approx(95e-6, rel=0.1)
+        assert self.histogram.percentile(99) == pytest.approx(99e-6, rel=0.1)
+    
+    def test_extreme_values_are_clamped(self):
+        """Test that tiny and huge durations land in the end buckets."""
+        self.histogram.record(0.0)
+        self.histogram.record(1e6)
+        
+        assert self.histogram.count == 2
+        assert self.histogram.counts[0] == 1
+        assert self.histogram.counts[-1] == 1
+    
+    def test_reset(self):
+        """Test discarding recorded durations."""
+        self.histogram.record(1e-3)
+        self.histogram.reset()
+        
+        assert self.histogram.count == 0
+        assert sum(self.histogram.counts) == 0
+
+
+class TestParserProfiling:
+    """Test cases for ExpressionParser profiling."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+    
+    def test_disabled_by_default(self):
+        """Test that nothing is recorded unless profiling is enabled."""
+        self.parser.parse("1 + 2")
+        
+        assert self.parser.stats() == {}
+    
+    def test_stages_recorded(self):
+        """Test that each stage is counted and summarized."""
+        self.parser.enable_profiling()
+        self.parser.parse("1 + 2")
+        self.parser.parse("(3 + 4) * 5")
+        
+        stats = self.parser.stats()
+        assert set(stats) == set(STAGES)
+        for stage in STAGES:
+            assert stats[stage]['count'] == 2
+            assert 0 < stats[stage]['p50'] <= stats[stage]['p95'] <= stats[stage]['p99']
+    
+    def test_cache_hit_skips_front_end_stages(self):
+        """Test that a cached expression only records evaluation."""
+        self.parser.enable_profiling()
+        self.parser.parse("1 + 2")
+        self.parser.parse("1+2")
+        
+        stats = self.parser.stats()
+        assert stats['tokenize']['count'] == 1
+        assert stats['infix_to_postfix']['count'] == 1
+        assert stats['evaluate_postfix']['count'] == 2
+        assert self.parser.cache_hits == 1
+    
+    def test_failed_stage_still_recorded(self):
+        """Test that a stage that raises is still timed."""
+        self.parser.enable_profiling()
+        with pytest.raises(ZeroDivisionError):
+            self.parser.parse("1 / 0")
+        with pytest.raises(ValueError):
+            self.parser.parse("1 +")
+        
+        stats = self.parser.stats()
+        assert stats['evaluate_postfix']['count'] == 1
+        assert stats['infix_to_postfix']['count'] == 2
+        assert stats['parse']['count'] == 2
+    
+    def test_profiled_results_match(self):
+        """Test that profiling does not change results."""
+        expressions = ["2 + 3 * 4", "x * 2", "10 / 4 - 1"]
+        plain = [ExpressionParser().parse(e, {'x': 3}) for e in expressions]
+        self.parser.enable_profiling()
+        
+        assert [self.parser.parse(e, {'x': 3}) for e in expressions] == plain
+    
+    def test_shared_profiler_and_disable(self):
+        """Test sharing one profiler and turning profiling off."""
+        profiler = StageProfiler()
+        other = ExpressionParser()
+        self.parser.enable_profiling(profiler)
+        other.enable_profiling(profiler)
+        self.parser.parse("1 + 1")
+        other.parse("2 + 2")
+        
+        assert profiler.stats()['parse']['count'] == 2
+        
+        self.parser.disable_profiling()
+        self.parser.parse("3 + 3")
+        assert profiler.stats()['parse']['count'] == 2
+        assert self.parser.stats() == {}
+    
+    def test_format_summary(self):
+        """Test the --profile summary table."""
+        profiler = self.parser.enable_profiling()
+        self.parser.parse("1 + 2")
+        
+        summary = profiler.format_summary()
+        for stage in STAGES:
+            assert stage in summary
+        assert "p99" in summary
@@ -0,0 +1,139 @@
+"""
+Tests for result-range and time-range history queries.
+"""
+import random
+from datetime import datetime, timedelta
+from calculator.history import HistoryEntry, HistoryManager
+from calculator.ringbuffer import RingBuffer
+from calculator.sorted_index import SortedResultIndex
+
+
+class TestSortedResultIndex:
+    """Test cases for SortedResultIndex."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.index = SortedResultIndex()
+    
+    def test_irange(self):
+        """Test inclusive range scans in result order."""
+        for seq, value in enumerate([5.0, 1.0, 3.0, 3.0, -2.0]):
+            self.index.add(value, seq)
+        
+        assert list(self.index.irange(1.0, 3.0)) == [1, 2, 3]
+        assert list(self.index.irange(None, 0.0)) == [4]
+        assert list(self.index.irange(4.0)) == [0]
+        assert list(self.index.irange(6.0)) == []
+        assert len(self.index) == 5
+    
+    def test_count(self):
+        """Test counting a range across blocks without visiting it."""
+        values = [float(v % 100) for v in range(3000)]
+        index = SortedResultIndex.from_sorted(sorted((v, s) for s, v in enumerate(values)))
+        
+        assert index.count() == 3000
+        assert index.count(10.0, 19.0) == 300
+        assert index.count(None, 0.0) == 30
+        assert index.count(99.5) == 0
+        assert index.count(50.0, 40.0) == 0
+        assert list(index.irange(10.0, 10.0)) == list(range(10, 3000, 100))
+    
+    def test_remove_oldest_of_equal_run(self):
+        """Test that evicting removes the oldest entry with that value."""
+        for seq in range(5):
+            self.index.add(7.0, seq)
+        
+        assert self.index.remove_oldest(7.0, 0)
+        assert not self.index.remove_oldest(7.0, 3)
+        assert list(self.index.irange(7.0, 7.0)) == [1, 2, 3, 4]
+    
+    def test_many_blocks_match_sorted(self):
+        """Test block splitting and removal against a sorted list."""
+        rng = random.Random(3)
+        values = [float(rng.randint(0, 500)) for _ in range(5000)]
+        for seq, value in enumerate(values):
+            self.index.add(value, seq)
+        for seq in range(2000):
+            assert self.index.remove_oldest(values[seq], seq)
+        
+        expected = sorted((v, s) for s, v in enumerate(values) if s >= 2000 and 100 <= v <= 200)
+        assert list(self.index.irange(100.0, 200.0)) == [s for _, s in expected]
+        assert len(self.index) == 3000
+
+
+class TestHistoryQuery:
+    """Test cases for HistoryManager.query."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.manager = HistoryManager(max_entries=100)
+        self.start = datetime(2024, 1, 1, 12, 0, 0)
+        history = RingBuffer(100)
+        history.extend(
+            HistoryEntry(f"{i}*1", float(i % 10), self.start + timedelta(minutes=i))
+            for i in range(60)
+        )
+        self.manager._replace_storage(history)
+    
+    def expressions(self, entries):
+        return [e.expression for e in entries]
+    
+    def test_result_range(self):
+        """Test an inclusive result range, returned in history order."""
+        entries = self.manager.query(result_min=8, result_max=9)
+        
+        assert self.expressions(entries) == [f"{i}*1" for i in range(60) if i % 10 >= 8]
+    
+    def test_time_range(self):
+        """Test since (inclusive) and until (exclusive)."""
+        entries = self.manager.query(since=self.start + timedelta(minutes=10),
+                                     until=self.start + timedelta(minutes=13))
+        
+        assert self.expressions(entries) == ["10*1", "11*1", "12*1"]
+    
+    def test_combined_range_and_limit(self):
+        """Test combining ranges and keeping the most recent matches."""
+        entries = self.manager.query(result_max=1, since=self.start + timedelta(minutes=30),
+                                     limit=3)
+        
+        assert self.expressions(entries) == ["41*1", "50*1", "51*1"]
+        assert self.expressions(self.manager.query(result_min=9, limit=2)) == ["49*1", "59*1"]
+        assert self.manager.query(limit=0) == []
+        assert len(self.manager.query()) == 60
+    
+    def test_index_follows_evictions(self):
+        """Test that the result index stays correct as entries are evicted."""
+        manager = HistoryManager(max_entries=20)
+        for i in range(50):
+            manager.add_entry(f"{i}+0", float(i % 7))
+            if i % 9 == 0:
+                expected = [e for e in list(manager.get_history()) if 2 <= e.result <= 4]
+                assert manager.query(result_min=2, result_max=4) == expected
+        
+        manager.add_entry("0/0", float('nan'))
+        assert all(e.result == e.result for e in manager.query(result_min=-1))
+    
+    def test_out_of_order_timestamps_fall_back_to_scan(self):
+        """Test correctness when timestamps are not monotonic."""
+        history = RingBuffer(10)
+        for minute in (5, 1, 3, 2):
+            history.append(HistoryEntry(f"m{minute}", float(minute),
+                                        self.start + timedelta(minutes=minute)))
+        self.manager._replace_storage(history)
+        
+        entries = self.manager.query(since=self.start + timedelta(minutes=2),
+                                     until=self.start + timedelta(minutes=4))
+        assert self.expressions(entries) == ["m3", "m2"]
+    
+    def test_disorder_clears_after_eviction(self):
+        """Test that the binary search is used again once the disorder is evicted."""
+        manager = HistoryManager(max_entries=3)
+        manager.add_entry("a", 1.0)
+        manager._history[-1].timestamp = datetime.max
+        manager.add_entry("b", 2.0)
+        assert manager._disorder_seq > manager._history.first_seq
+        
+        manager.add_entry("c", 3.0)
+        manager.add_entry("d", 4.0)
+        assert manager._disorder_seq <= manager._history.first_seq
+        assert self.expressions(manager.query(since=datetime.min)) == ["b", "c", "d"]
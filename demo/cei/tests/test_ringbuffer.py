@@ -0,0 +1,132 @@
+"""
+Tests for the fixed-capacity ring buffer.
+"""
+import pytest
+from calculator.ringbuffer import RingBuffer, RingView
+
+
+class TestRingBuffer:
+    """Test cases for RingBuffer."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.buffer = RingBuffer(3)
+    
+    def test_append_until_full(self):
+        """Test appending without eviction."""
+        assert self.buffer.append('a') is None
+        assert self.buffer.append('b') is None
+        
+        assert len(self.buffer) == 2
+        assert list(self.buffer) == ['a', 'b']
+    
+    def test_append_evicts_oldest(self):
+        """Test that appending to a full buffer returns the evicted item."""
+        self.buffer.extend('abc')
+        
+        assert self.buffer.append('d') == 'a'
+        assert self.buffer.append('e') == 'b'
+        assert list(self.buffer) == ['c', 'd', 'e']
+        assert list(reversed(self.buffer)) == ['e', 'd', 'c']
+        assert self.buffer.first_seq == 2
+        assert self.buffer.next_seq == 5
+    
+    def test_indexing_after_wraparound(self):
+        """Test positive and negative indices once storage has wrapped."""
+        self.buffer.extend('abcde')
+        
+        assert self.buffer[0] == 'c'
+        assert self.buffer[-1] == 'e'
+        assert self.buffer[-3] == 'c'
+        assert self.buffer[1:] == ['d', 'e']
+        with pytest.raises(IndexError):
+            self.buffer[3]
+        with pytest.raises(IndexError):
+            self.buffer[-4]
+    
+    def test_zero_capacity(self):
+        """Test that a zero-capacity buffer keeps nothing."""
+        buffer = RingBuffer(0)
+        
+        assert buffer.append('a') == 'a'
+        assert len(buffer) == 0
+        
+        with pytest.raises(ValueError):
+            RingBuffer(-1)
+    
+    def test_clear_keeps_sequence_numbers(self):
+        """Test that clearing continues sequence numbering."""
+        self.buffer.extend('abcd')
+        self.buffer.clear()
+        
+        assert len(self.buffer) == 0
+        assert self.buffer.first_seq == 4
+        self.buffer.append('e')
+        assert self.buffer.get_seq(4) == 'e'
+    
+    def test_resize(self):
+        """Test shrinking and growing the capacity."""
+        self.buffer.extend('abcde')
+        self.buffer.resize(2)
+        
+        assert list(self.buffer) == ['d', 'e']
+        assert self.buffer.get_seq(3) == 'd'
+        
+        self.buffer.resize(4)
+        self.buffer.extend('fg')
+        assert list(self.buffer) == ['d', 'e', 'f', 'g']
+        assert self.buffer.append('h') == 'd'
+
+
+class TestRingView:
+    """Test cases for RingView."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.buffer = RingBuffer(4)
+        self.buffer.extend('abcdef')
+    
+    def test_view_contents(self):
+        """Test reading a view like a list."""
+        view = self.buffer.view(-2)
+        
+        assert isinstance(view, RingView)
+        assert len(view) == 2
+        assert view == ['e', 'f']
+        assert view[-1] == 'f'
+        assert list(reversed(view)) == ['f', 'e']
+        assert view[::-1] == ['f', 'e']
+        assert self.buffer.view() == ['c', 'd', 'e', 'f']
+    
+    def test_view_is_read_only(self):
+        """Test that a view cannot be modified."""
+        view = self.buffer.view()
+        
+        with pytest.raises(TypeError):
+            view[0] = 'x'
+        assert not hasattr(view, 'append')
+    
+    def test_view_stable_across_appends(self):
+        """Test that appends do not shift a view."""
+        view = self.buffer.view(-2)
+        self.buffer.append('g')
+        
+        assert view == ['e', 'f']
+    
+    def test_stale_view_raises(self):
+        """Test reading entries that were evicted after the view was made."""
+        view = self.buffer.view()
+        self.buffer.append('g')
+        
+        with pytest.raises(RuntimeError):
+            view[0]
+        assert view[1] == 'd'
+    
+    def test_empty_view(self):
+        """Test views with no items."""
+        view = self.buffer.view(0, 0)
+        
+        assert len(view) == 0
+        assert view == []
+        with pytest.raises(IndexError):
+            view[0]
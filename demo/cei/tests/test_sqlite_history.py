@@ -0,0 +1,237 @@
+"""
+Tests for the SQLite-backed history manager.
+"""
+import os
+import sqlite3
+import tempfile
+import time
+import pytest
+from calculator.sqlite_history import SqliteHistoryManager
+
+
+class TestSqliteHistoryManager:
+    """Test cases for SqliteHistoryManager."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "history.db")
+        self.manager = SqliteHistoryManager(self.path, batch_size=3)
+    
+    def teardown_method(self):
+        """Close the database and remove it."""
+        self.manager.close()
+        self.tmpdir.cleanup()
+    
+    def add_samples(self):
+        self.manager.add_entry("3+4", 7.0)
+        self.manager.add_entry("5*2", 10.0)
+        self.manager.add_entry("10/2", 5.0)
+        self.manager.add_entry("2+5", 7.0)
+    
+    def test_wal_mode(self):
+        """Test that file databases use write-ahead logging."""
+        mode = self.manager._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+    
+    def test_indexes_exist(self):
+        """Test that timestamp and result are indexed."""
+        names = {row[0] for row in self.manager._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"history_timestamp", "history_result"} <= names
+    
+    def test_pending_entries_are_visible(self):
+        """Test that reads include entries not yet written."""
+        self.manager.add_entry("3+4", 7.0)
+        
+        assert self.manager._pending
+        assert self.manager.size() == 1
+        assert self.manager.get_by_index(0).expression == "3+4"
+        assert not self.manager._pending
+    
+    def test_get_history_pages(self):
+        """Test paging backwards from the most recent entry."""
+        for i in range(10):
+            self.manager.add_entry(f"{i}+1", i + 1.0)
+        
+        assert [e.expression for e in self.manager.get_history(limit=3)] == ["7+1", "8+1", "9+1"]
+        page = self.manager.get_history(limit=3, offset=3)
+        assert [e.expression for e in page] == ["4+1", "5+1", "6+1"]
+        assert len(self.manager.get_history()) == 10
+        assert self.manager.get_history(limit=0) == []
+        assert self.manager.get_recent(2)[-1].result == 10.0
+    
+    def test_max_entries(self):
+        """Test that the oldest rows are deleted past max_entries."""
+        manager = SqliteHistoryManager(max_entries=3, batch_size=2)
+        for i in range(7):
+            manager.add_entry(f"{i}+1", i + 1.0)
+        
+        assert manager.size() == 3
+        assert [e.expression for e in manager.get_history()] == ["4+1", "5+1", "6+1"]
+        assert [e.expression for e in manager.search("1")] == ["4+1", "5+1", "6+1"]
+        manager.close()
+    
+    def test_search(self):
+        """Test FTS search and the short-query fallback."""
+        if not self.manager.has_fts:
+            pytest.skip("SQLite has no FTS5 trigram tokenizer")
+        self.add_samples()
+        
+        assert [e.expression for e in self.manager.search("+")] == ["3+4", "2+5"]
+        assert [e.expression for e in self.manager.search("7")] == ["3+4", "2+5"]
+        assert [e.expression for e in self.manager.search("10/")] == ["10/2"]
+        assert [e.expression for e in self.manager.search("10.0")] == ["5*2"]
+        assert self.manager.search("zzz") == []
+    
+    def test_search_escapes_special_characters(self):
+        """Test that FTS and LIKE syntax in queries is matched literally."""
+        self.manager.add_entry("a_b", 1.0)
+        self.manager.add_entry("ab", 2.0)
+        self.manager.add_entry('"x" OR y', 3.0)
+        
+        assert [e.expression for e in self.manager.search("_")] == ["a_b"]
+        assert [e.expression for e in self.manager.search('"x" OR')] == ['"x" OR y']
+    
+    def test_search_without_fts(self):
+        """Test the Python-side scan used when FTS5 is unavailable."""
+        self.add_samples()
+        self.manager.has_fts = False
+        
+        assert [e.expression for e in self.manager.search("+")] == ["3+4", "2+5"]
+    
+    def test_get_by_index(self):
+        """Test positive, negative and out-of-range indices."""
+        self.add_samples()
+        
+        assert self.manager.get_by_index(0).expression == "3+4"
+        assert self.manager.get_by_index(-1).expression == "2+5"
+        assert self.manager.get_by_index(-4).expression == "3+4"
+        assert self.manager.get_by_index(4) is None
+        assert self.manager.get_by_index(-5) is None
+    
+    def test_get_by_index_after_trim_and_clear(self):
+        """Test that indices follow trimmed and cleared history."""
+        manager = SqliteHistoryManager(max_entries=3, batch_size=1)
+        for i in range(7):
+            manager.add_entry(f"{i}+1", i + 1.0)
+        
+        assert manager.get_by_index(0).expression == "4+1"
+        assert manager.get_by_index(-1).expression == "6+1"
+        assert manager.get_by_index(3) is None
+        assert [e.expression for e in manager.get_history(limit=1, offset=2)] == ["4+1"]
+        assert manager.get_history(offset=3) == []
+        
+        manager.clear_history()
+        assert manager.get_by_index(0) is None
+        manager.add_entry("9+9", 18.0)
+        assert manager.get_by_index(-1).expression == "9+9"
+        manager.close()
+    
+    def test_query(self):
+        """Test result and time range queries."""
+        self.add_samples()
+        self.manager.add_entry("0/0", float('nan'))
+        history = self.manager.get_history()
+        
+        assert [e.expression for e in self.manager.query(result_min=7.0)] == ["3+4", "5*2", "2+5"]
+        assert [e.expression for e in self.manager.query(result_min=5, result_max=7)] == \
+            ["3+4", "10/2", "2+5"]
+        assert [e.expression for e in self.manager.query(result_max=7.0, limit=2)] == \
+            ["10/2", "2+5"]
+        since = history[1].timestamp
+        until = history[3].timestamp
+        assert [e.expression for e in self.manager.query(since=since, until=until)] == \
+            [e.expression for e in history if since <= e.timestamp < until]
+        assert len(self.manager.query()) == 5
+        assert self.manager.query(limit=0) == []
+    
+    def test_query_uses_indexes(self):
+        """Test that range queries are planned on the indexes."""
+        for column, index in (("result", "history_result"), ("timestamp", "history_timestamp")):
+            plan = " ".join(row[-1] for row in self.manager._conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM history WHERE {column} > ?", (0,)))
+            assert index in plan
+    
+    def test_clear_history(self):
+        """Test clearing written and pending entries."""
+        self.add_samples()
+        self.manager.clear_history()
+        
+        assert self.manager.is_empty()
+        assert self.manager.search("3+4") == []
+        self.manager.add_entry("1+1", 2.0)
+        assert self.manager.get_by_index(0).expression == "1+1"
+    
+    def test_history_survives_reopen(self):
+        """Test persistence across connections."""
+        self.add_samples()
+        self.manager.close()
+        
+        self.manager = SqliteHistoryManager(self.path)
+        assert self.manager.size() == 4
+        assert self.manager.get_by_index(-1).timestamp is not None
+    
+    def test_nan_result_round_trip(self):
+        """Test that NaN results (stored as NULL) read back as NaN."""
+        self.manager.add_entry("x", float('nan'))
+        
+        result = self.manager.get_by_index(0).result
+        assert result != result
+    
+    def test_failed_batch_is_kept(self):
+        """Test that a batch that fails to write can be retried."""
+        self.manager.add_entry("3+4", 7.0)
+        self.manager._conn.execute("BEGIN")  # Makes BEGIN IMMEDIATE fail
+        
+        with pytest.raises(sqlite3.OperationalError):
+            self.manager.flush()
+        self.manager._conn.execute("ROLLBACK")
+        assert self.manager.size() == 1
+    
+    def test_save_and_load_file(self):
+        """Test JSON export and import."""
+        self.add_samples()
+        json_path = os.path.join(self.tmpdir.name, "history.json")
+        self.manager.save_to_file(json_path)
+        
+        other = SqliteHistoryManager()
+        other.add_entry("9+9", 18.0)
+        other.load_from_file(json_path)
+        assert [e.expression for e in other.get_history()] == ["3+4", "5*2", "10/2", "2+5"]
+        assert other.format_history_display(limit=1).endswith("2+5 = 7")
+        other.close()
+    
+    def test_partial_batch_flushed_on_timer(self):
+        """Test that a partial batch is written after flush_interval."""
+        manager = SqliteHistoryManager(self.path, batch_size=100, flush_interval=0.05)
+        manager.add_entry("3+4", 7.0)
+        reader = sqlite3.connect(self.path)
+        
+        # The batch leaves _pending before it commits, so wait for the row itself
+        deadline = time.monotonic() + 5
+        rows = []
+        while not rows and time.monotonic() < deadline:
+            time.sleep(0.01)
+            rows = reader.execute("SELECT expression FROM history").fetchall()
+        
+        assert rows == [("3+4",)]
+        reader.close()
+        manager.close()
+    
+    def test_failed_load_keeps_history(self):
+        """Test that a load that fails part-way leaves the old history intact."""
+        self.add_samples()
+        json_path = os.path.join(self.tmpdir.name, "history.json")
+        self.manager.save_to_file(json_path)
+        self.manager.add_entry("9+9", 18.0)
+        
+        def fail(entries):
+            raise sqlite3.OperationalError("disk full")
+        self.manager._insert = fail
+        with pytest.raises(sqlite3.OperationalError):
+            self.manager.load_from_file(json_path)
+        del self.manager._insert
+        
+        assert [e.expression for e in self.manager.get_history()] == [
+            "3+4", "5*2", "10/2", "2+5", "9+9"]
@@ -0,0 +1,91 @@
+"""
+Tests for streaming stdin/stdout evaluation.
+"""
+import io
+import json
+import pytest
+from calculator.stream import run_stream, read_expressions, write_results
+
+
+class TestRunStream:
+    """Test cases for run_stream."""
+    
+    def run(self, text, **kwargs):
+        """Run the stream over text and return (errors, output)."""
+        output = io.StringIO()
+        errors = run_stream(io.StringIO(text), output, **kwargs)
+        return errors, output.getvalue()
+    
+    def test_plain(self):
+        """Test plain output, one result per line."""
+        errors, output = self.run("3+4*2\n10/0\n(1+2\n")
+        assert errors == 2
+        assert output.splitlines() == [
+            "11", "Error: Division by zero",
+            "Error: Mismatched parentheses: unclosed opening parenthesis"
+        ]
+    
+    def test_blank_lines_skipped(self):
+        """Test that blank, whitespace-only and trailing blank lines are not errors."""
+        errors, output = self.run("1+1\n\n  \t\n2*3\r\n\n")
+        assert errors == 0
+        assert output.splitlines() == ["2", "6"]
+        
+        errors, _ = self.run("1+1\n\n2*3\n\n", jobs=2)
+        assert errors == 0
+    
+    def test_ndjson(self):
+        """Test NDJSON records."""
+        _, output = self.run("1.5*2\n1/0\n", fmt='ndjson')
+        records = [json.loads(line) for line in output.splitlines()]
+        assert records[0] == {'expression': "1.5*2", 'result': 3.0}
+        assert records[1]['error_type'] == "ZeroDivisionError"
+    
+    def test_ndjson_non_finite(self):
+        """Test that overflowing results remain valid JSON."""
+        _, output = self.run("9" * 400 + "\n", fmt='ndjson')
+        assert json.loads(output)['result'] == "inf"
+    
+    def test_csv(self):
+        """Test CSV output with a header and quoting."""
+        _, output = self.run("0.1+0.2\n1,2\n", fmt='csv')
+        lines = output.splitlines()
+        assert lines[0] == "expression,result,error,error_type"
+        assert lines[1] == "0.1+0.2,0.30000000000000004,,"
+        assert lines[2].startswith('"1,2",,"Invalid characters')
+        assert lines[2].endswith(',ValueError')
+    
+    def test_parallel_matches_sequential(self):
+        """Test that pooled streaming gives the same output."""
+        text = "".join(f"{i}*2/({i % 3})\n" for i in range(200))
+        assert self.run(text, jobs=2) == self.run(text)
+    
+    def test_invalid_format(self):
+        """Test that unknown formats are rejected."""
+        with pytest.raises(ValueError, match="Invalid format"):
+            self.run("1\n", fmt='xml')
+
+
+class TestBlockedOutput:
+    """Test cases for buffered output."""
+    
+    def test_writes_in_blocks(self):
+        """Test that output is written in blocks, not per result."""
+        class CountingStream(io.StringIO):
+            writes = 0
+            
+            def write(self, text):
+                CountingStream.writes += 1
+                return super().write(text)
+        
+        output = CountingStream()
+        results = ((str(i), float(i)) for i in range(10000))
+        write_results(results, output, block_size=4096)
+        assert len(output.getvalue().splitlines()) == 10000
+        assert CountingStream.writes < 20
+    
+    def test_read_expressions_is_lazy(self):
+        """Test that lines are read on demand."""
+        lines = read_expressions(iter(["1+1\n", "2+2\r\n"]))
+        assert next(lines) == "1+1"
+        assert next(lines) == "2+2"
@@ -0,0 +1,118 @@
+"""
+Tests for the trigram search index.
+"""
+import random
+from calculator.history import HistoryManager
+from calculator.trigram import TrigramIndex, trigrams
+
+
+class TestTrigramIndex:
+    """Test cases for TrigramIndex."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.index = TrigramIndex()
+        self.index.add(0, ["3+4", "7.0"])
+        self.index.add(1, ["12+34", "46.0"])
+        self.index.add(2, ["3+45", "48.0"])
+    
+    def test_trigrams(self):
+        """Test extracting distinct trigrams."""
+        assert trigrams("abcab") == {"abc", "bca", "cab"}
+        assert trigrams("ab") == set()
+    
+    def test_candidates(self):
+        """Test narrowing to items containing every trigram."""
+        assert self.index.candidates("3+4") == [0, 2]
+        assert self.index.candidates("+45") == [2]
+        assert self.index.candidates("+3") is None
+        assert self.index.candidates("2+3") == [1]
+        assert self.index.candidates("zzz") == []
+    
+    def test_short_query_not_indexed(self):
+        """Test that queries under three characters bypass the index."""
+        assert self.index.candidates("3+") is None
+    
+    def test_remove_oldest(self):
+        """Test evicting the oldest item."""
+        self.index.remove_oldest(0, ["3+4", "7.0"])
+        
+        assert self.index.candidates("3+4") == [2]
+        assert self.index.candidates("7.0") == []
+    
+    def test_remove_trims_posting_lists(self):
+        """Test that evicted heads are eventually dropped from storage."""
+        index = TrigramIndex()
+        for seq in range(2000):
+            index.add(seq, ["abc"])
+        for seq in range(1500):
+            index.remove_oldest(seq, ["abc"])
+        
+        items, head = index._postings["abc"]
+        assert len(items) - head == 500
+        assert len(items) < 2000
+        assert index.candidates("abc") == list(range(1500, 2000))
+    
+    def test_memory_usage(self):
+        """Test that memory usage grows with the index."""
+        before = self.index.memory_usage()
+        for seq in range(3, 1000):
+            self.index.add(seq, [f"{seq}*{seq}", str(seq * seq)])
+        
+        assert self.index.memory_usage() > before > 0
+        self.index.clear()
+        assert len(self.index) == 0
+
+
+class TestHistorySearchIndex:
+    """Test cases for indexed HistoryManager.search."""
+    
+    def scan(self, manager, query):
+        query = query.lower()
+        return [e for e in list(manager.get_history())
+                if query in e.expression.lower() or query in str(e.result).lower()]
+    
+    def test_matches_scan_with_evictions(self):
+        """Test that indexed search equals a full scan as entries are evicted."""
+        rng = random.Random(7)
+        manager = HistoryManager(max_entries=50)
+        queries = ["1+2", "+12", "*3", "0.5", "inf", "12", "99"]
+        for step in range(600):
+            a, b = rng.randint(0, 200), rng.randint(0, 200)
+            manager.add_entry(f"{a}+{b}*3", a + b * 3 + 0.5 * (step % 2))
+            if step % 37 == 0:
+                for query in queries:
+                    assert manager.search(query) == self.scan(manager, query)
+    
+    def test_index_is_built_lazily(self):
+        """Test that the index costs nothing until the first search."""
+        manager = HistoryManager()
+        manager.add_entry("3+4", 7.0)
+        assert manager.search_index_memory() == 0
+        
+        assert [e.expression for e in manager.search("3+4")] == ["3+4"]
+        assert manager.search_index_memory() > 0
+    
+    def test_search_after_clear_and_resize(self):
+        """Test that clearing and resizing keep search consistent."""
+        manager = HistoryManager(max_entries=10)
+        for i in range(10):
+            manager.add_entry(f"{i}+100", i + 100.0)
+        assert len(manager.search("+100")) == 10
+        
+        manager.max_entries = 3
+        assert [e.expression for e in manager.search("+100")] == ["7+100", "8+100", "9+100"]
+        
+        manager.clear_history()
+        assert manager.search("+100") == []
+        manager.add_entry("1+100", 101.0)
+        assert len(manager.search("+100")) == 1
+    
+    def test_case_insensitive(self):
+        """Test matching regardless of case, as before."""
+        manager = HistoryManager()
+        manager.add_entry("Rate*2", 4.0)
+        manager.add_entry("1/0.0", float('inf'))
+        
+        assert len(manager.search("RATE")) == 1
+        assert len(manager.search("INF")) == 1
@@ -0,0 +1,159 @@
+"""
+Tests for vectorized evaluation over NumPy arrays.
+"""
+import pytest
+from calculator.parser import ExpressionParser
+
+np = pytest.importorskip("numpy")
+
+
+class TestVariables:
+    """Test cases for named variables in scalar expressions."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+    
+    def test_parse_with_variables(self):
+        """Test evaluating an expression with variables."""
+        assert self.parser.parse("a*x + b/(x+1)", {'a': 2, 'x': 3, 'b': 8}) == 8
+    
+    def test_undefined_variable(self):
+        """Test that missing variables raise ValueError."""
+        with pytest.raises(ValueError, match="Undefined variable: y"):
+            self.parser.parse("x+y", {'x': 1})
+    
+    def test_number_followed_by_name_is_invalid(self):
+        """Test that there is no implicit multiplication."""
+        with pytest.raises(ValueError, match="Invalid characters"):
+            self.parser.tokenize("4x")
+    
+    def test_compiled_with_variables(self):
+        """Test compiled expressions take variables as keyword arguments."""
+        compiled = self.parser.compile("rate*hours - tax")
+        assert compiled(rate=10, hours=4, tax=5) == 35
+        assert compiled.program.names == ('rate', 'hours', 'tax')
+        with pytest.raises(ValueError, match="Undefined variable"):
+            compiled(rate=1)
+
+
+class TestEvaluateVectorized:
+    """Test cases for ExpressionParser.evaluate_vectorized."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+    
+    def scalar_reference(self, expression, **values):
+        """Evaluate element by element with the scalar parser, NaN on zero division."""
+        arrays = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values.values()])
+        results = []
+        for items in zip(*[a.ravel() for a in arrays]):
+            try:
+                results.append(self.parser.parse(expression, dict(zip(values, items))))
+            except ZeroDivisionError:
+                results.append(np.nan)
+        return np.array(results).reshape(arrays[0].shape)
+    
+    def test_matches_scalar_semantics(self):
+        """Test vectorized results agree with calculator.core semantics."""
+        x = np.linspace(-5, 5, 101)
+        expression = "a*x + b/(x+1)"
+        result = self.parser.evaluate_vectorized(expression, x=x, a=2.5, b=-3)
+        expected = self.scalar_reference(expression, x=x, a=2.5, b=-3)
+        np.testing.assert_array_equal(result, expected)
+    
+    def test_broadcasting(self):
+        """Test that inputs broadcast against each other."""
+        x = np.arange(3.0)
+        y = np.arange(4.0).reshape(4, 1)
+        result = self.parser.evaluate_vectorized("x*10+y", x=x, y=y)
+        assert result.shape == (4, 3)
+        assert result[2, 1] == 12
+    
+    def test_zero_division_nan(self):
+        """Test that division by zero yields NaN by default."""
+        result = self.parser.evaluate_vectorized("1/x + 1", x=np.array([1.0, 0.0, 2.0]))
+        assert result[0] == 2
+        assert np.isnan(result[1])
+        assert result[2] == 1.5
+    
+    def test_zero_division_mask(self):
+        """Test the masked-array policy."""
+        result = self.parser.evaluate_vectorized(
+            "0*(1/x) + 7", zero_division='mask', x=np.array([1.0, 0.0])
+        )
+        assert result.mask.tolist() == [False, True]
+        assert result[0] == 7
+    
+    def test_zero_division_raise(self):
+        """Test the raising policy."""
+        with pytest.raises(ZeroDivisionError):
+            self.parser.evaluate_vectorized("1/x", zero_division='raise', x=np.array([1.0, 0.0]))
+    
+    def test_invalid_policy(self):
+        """Test that unknown policies are rejected."""
+        with pytest.raises(ValueError, match="Invalid zero_division policy"):
+            self.parser.evaluate_vectorized("x", zero_division='ignore', x=np.ones(2))
+    
+    def test_missing_array(self):
+        """Test that missing inputs raise ValueError."""
+        with pytest.raises(ValueError, match="Undefined variable: x"):
+            self.parser.evaluate_vectorized("x+1")
+
+
+class TestEvaluateBlocked:
+    """Test cases for ExpressionParser.evaluate_blocked."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.parser = ExpressionParser()
+    
+    @pytest.mark.parametrize("expression", [
+        "a*x + b/(x+1)", "x", "3", "(x-1)*(x+1)/(x*x+1)", "x*(2+3) - 4/2", "x/x"
+    ])
+    def test_matches_unblocked(self, expression):
+        """Test that blocked and unblocked evaluation agree across chunk edges."""
+        x = np.linspace(-3, 3, 1001)
+        expected = self.parser.evaluate_vectorized(expression, x=x, a=2.0, b=0.5)
+        result = self.parser.evaluate_blocked(expression, chunk_size=64, x=x, a=2.0, b=0.5)
+        np.testing.assert_array_equal(result, np.broadcast_to(expected, result.shape))
+    
+    def test_writes_into_out(self):
+        """Test that results are written into a caller-supplied array."""
+        x = np.arange(10.0)
+        out = np.empty(10)
+        result = self.parser.evaluate_blocked("x*2", out=out, chunk_size=3, x=x)
+        assert result is out
+        np.testing.assert_array_equal(out, x * 2)
+    
+    def test_multidimensional_inputs(self):
+        """Test that same-shaped N-d inputs are evaluated element-wise."""
+        x = np.arange(12.0).reshape(3, 4)
+        result = self.parser.evaluate_blocked("x+y", chunk_size=5, x=x, y=x)
+        np.testing.assert_array_equal(result, x * 2)
+    
+    def test_zero_division_policies(self):
+        """Test NaN and mask policies in blocked mode."""
+        x = np.array([1.0, 0.0, 2.0, 0.0])
+        result = self.parser.evaluate_blocked("1/x", chunk_size=3, x=x)
+        assert np.isnan(result).tolist() == [False, True, False, True]
+        masked = self.parser.evaluate_blocked("0*(1/x)", chunk_size=3, zero_division='mask', x=x)
+        assert masked.mask.tolist() == [False, True, False, True]
+        with pytest.raises(ZeroDivisionError):
+            self.parser.evaluate_blocked("1/x", zero_division='raise', x=x)
+    
+    def test_constant_zero_division(self):
+        """Test division by a constant zero masks every element."""
+        masked = self.parser.evaluate_blocked("x + 1/0", zero_division='mask', x=np.ones(3))
+        assert masked.mask.all()
+    
+    def test_shape_mismatch(self):
+        """Test that differently shaped inputs are rejected."""
+        with pytest.raises(ValueError, match="inputs of one shape"):
+            self.parser.evaluate_blocked("x+y", x=np.ones(3), y=np.ones(4))
+    
+    def test_bad_out(self):
+        """Test that a mismatched out array is rejected."""
+        with pytest.raises(ValueError, match="out must be"):
+            self.parser.evaluate_blocked("x", out=np.empty(2), x=np.ones(3))